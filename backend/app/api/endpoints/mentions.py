@@ -0,0 +1,78 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import Dict, Any
+import time
+from services.mention_stream import MentionStream
+
+router = APIRouter()
+
+MENTION_SORT_FIELDS = ['acceleration', 'mentions_5m', 'mentions_1h', 'mentions_24h']
+
+def get_mention_stream(request: Request) -> MentionStream:
+    """새 포스트/댓글 스트림으로 갱신되는 티커별 실시간 언급 카운터"""
+    return request.app.state.mention_stream
+
+@router.get("/mentions")
+async def get_mention_rates(
+    sort: str = Query('acceleration', description=f"정렬 기준: {', '.join(MENTION_SORT_FIELDS)}"),
+    limit: int = Query(50, ge=1, le=500),
+    stream: MentionStream = Depends(get_mention_stream)
+) -> Dict[str, Any]:
+    """
+    티커별 실시간 언급 수(최근 5분/1시간/24시간), 시간당 언급 속도와 가속도를 반환합니다.
+    가속도는 최근 5분 속도에서 그 전 5분 속도를 뺀 값(시간당 언급 수)입니다.
+    live 가 false 이면 다른 노드가 저장한 체크포인트 기준이라 최대 MENTION_CHECKPOINT_SECONDS 만큼 늦을 수 있습니다.
+    """
+    if sort not in MENTION_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"지원하지 않는 정렬 기준입니다: {sort}")
+    rates = sorted(stream.counters.snapshot_all(), key=lambda entry: entry[sort], reverse=True)
+    return {
+        "timestamp": int(time.time()),
+        "live": stream.live,
+        "tickers": rates[:limit],
+        "total": len(rates),
+        "status": "success"
+    }
+
+@router.get("/stocks/{ticker}/mentions")
+async def get_ticker_mention_rates(
+    ticker: str,
+    series: int = Query(0, ge=0, le=1440, description="최근 몇 분의 분별 언급 수를 함께 반환할지"),
+    stream: MentionStream = Depends(get_mention_stream)
+) -> Dict[str, Any]:
+    """특정 티커의 실시간 언급 수와 속도, 가속도 (series 를 주면 분별 언급 수 포함)"""
+    ticker = ticker.upper()
+    rates = stream.counters.snapshot(ticker, series_minutes=series)
+    if rates is None:
+        raise HTTPException(status_code=404, detail=f"{ticker}의 실시간 언급 데이터가 없습니다")
+    return {
+        "timestamp": int(time.time()),
+        "live": stream.live,
+        **rates,
+        "status": "success"
+    }
+
+@router.get("/trending")
+async def get_trending_symbols(
+    limit: int = Query(20, ge=1, le=200),
+    stream: MentionStream = Depends(get_mention_stream)
+) -> Dict[str, Any]:
+    """
+    감시 목록 밖까지 포함한 급상승 심볼 후보 (최근 언급 속도 / 기준선 속도 비율 순).
+    flagged 는 자동 추가 기준(DISCOVERY_MIN_MENTIONS, DISCOVERY_SPIKE_FACTOR)을 넘은 심볼이며,
+    기준선이 DISCOVERY_WARMUP_EPOCHS 만큼 쌓이기 전(warm 이 false)에는 표시하지 않습니다.
+    빈도는 수집 노드에서만 세므로, live 가 false 이면 수집 노드가 저장한 목록이라 최대 MENTION_CHECKPOINT_SECONDS
+    만큼 늦을 수 있고, 아직 저장된 목록이 없으면 빈 목록입니다. (updated_at 은 목록을 계산한 시각)
+    """
+    discovery = stream.discovery
+    view = discovery.export() if stream.live else discovery.replica
+    if view is None:
+        view = {"warm": False, "symbols": [], "added": [], "updated_at": None}
+    return {
+        "timestamp": int(time.time()),
+        "live": stream.live,
+        "warm": view['warm'],
+        "updated_at": int(view['updated_at']) if view['updated_at'] else None,
+        "symbols": view['symbols'][:limit],
+        "added": view['added'],
+        "status": "success"
+    }
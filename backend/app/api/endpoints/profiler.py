@@ -0,0 +1,61 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import Dict, Any, Optional
+import asyncio
+import time
+from services.profiler import SamplingProfiler
+
+router = APIRouter()
+
+def get_profiler(request: Request) -> SamplingProfiler:
+    """스케줄러가 분석 실행에 연결해 둔 샘플링 프로파일러 (API 전용 모드에서는 seconds 지정 측정만 가능)"""
+    return request.app.state.profiler
+
+@router.post("/profile", status_code=202)
+async def start_profile(
+    request: Request,
+    seconds: Optional[float] = Query(None, gt=0, le=300, description="지정하면 지금부터 이 시간 동안 프로파일"),
+    runs: int = Query(8, ge=1, le=1000, description="seconds 가 없을 때 프로파일할 다음 스케줄 실행 수"),
+    profiler: SamplingProfiler = Depends(get_profiler)
+) -> Dict[str, Any]:
+    """
+    샘플링 프로파일러를 켭니다.
+    seconds 가 없으면 다음 스케줄 실행 runs 개(그 전에 POST /api/v1/analyze 가 시작되면 그 사이클 한 번)를
+    프로파일하고, 있으면 지금부터 seconds 초 동안 프로파일합니다. 결과는 GET /api/v1/profile 로 조회합니다.
+    """
+    if profiler.running:
+        raise HTTPException(status_code=409, detail="프로파일러가 이미 실행 중입니다")
+
+    if seconds is None:
+        if request.app.state.scheduler is None:
+            raise HTTPException(status_code=400, detail="API 전용 모드에는 분석 실행이 없으므로 seconds 를 지정하세요")
+        profiler.arm(runs)
+        message = f"다음 스케줄 실행 {runs}개를 프로파일합니다"
+    else:
+        profiler.start(label=f"{seconds:g}s")
+
+        def stop():
+            if profiler.running:
+                profiler.stop()
+
+        asyncio.get_running_loop().call_later(seconds, stop)
+        message = f"{seconds:g}초 동안 프로파일합니다"
+    return {
+        "timestamp": int(time.time()),
+        "profiler": profiler.stats(),
+        "status": "accepted",
+        "message": message
+    }
+
+@router.get("/profile")
+async def get_profile(profiler: SamplingProfiler = Depends(get_profiler)) -> Dict[str, Any]:
+    """
+    마지막 프로파일 결과 (함수별 self/누적 샘플 상위 목록과 flamegraph 용 접힌 스택)
+    """
+    if profiler.report is None:
+        raise HTTPException(status_code=404, detail="프로파일 결과가 없습니다")
+    return {
+        "timestamp": int(time.time()),
+        "profiler": profiler.stats(),
+        "report": profiler.report,
+        "status": "success"
+    }
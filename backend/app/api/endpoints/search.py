@@ -0,0 +1,82 @@
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import Dict, Any, Optional
+from datetime import datetime, timezone
+import time
+from services.database_service import DatabaseService
+
+router = APIRouter()
+
+# 키워드 추이의 기본 기간 (초)
+DEFAULT_TREND_SECONDS = 24 * 3600
+
+def get_db_service(request: Request) -> DatabaseService:
+    """lifespan 에서 연결해 둔 공유 DatabaseService 를 반환합니다."""
+    return request.app.state.db_service
+
+def to_timestamp(value: datetime) -> float:
+    """ISO 8601/유닉스 시간 쿼리 값을 포스트의 created_utc 와 같은 유닉스 시간으로 변환 (시간대가 없으면 UTC)"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+@router.get("/search")
+async def search_posts(
+    q: str = Query(..., min_length=1, max_length=200, description='검색어 ("short squeeze" 는 구문, -word 는 제외)'),
+    ticker: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="이 시각 이후 작성된 포스트만 (ISO 8601 또는 유닉스 시간)"),
+    offset: int = Query(0, ge=0, le=1000),
+    limit: int = Query(20, ge=1, le=100),
+    db_service: DatabaseService = Depends(get_db_service)
+) -> Dict[str, Any]:
+    """
+    분석된 포스트를 키워드와 제목 단어로 검색합니다. (티커와 무관하게 모든 포스트 대상)
+    결과는 텍스트 일치 점수(분석 키워드 일치가 제목 일치보다 높음) 순, 같으면 최신순이며
+    offset 부터 limit 개를 반환합니다. 검색 대상은 POST_RETENTION_HOURS 동안 보존된 포스트입니다.
+    """
+    try:
+        # 다음 페이지가 있는지 알기 위해 하나 더 읽음
+        posts = await db_service.search_posts(
+            q, ticker=ticker, since=to_timestamp(since) if since else None, offset=offset, limit=limit + 1
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"검색 실패: {str(e)}")
+    for post in posts:
+        post['text_score'] = round(post['text_score'], 3)
+    return {
+        "timestamp": int(time.time()),
+        "query": q,
+        "ticker": ticker.upper() if ticker else None,
+        "posts": posts[:limit],
+        "offset": offset,
+        "limit": limit,
+        "has_more": len(posts) > limit,
+        "status": "success"
+    }
+
+@router.get("/search/trends")
+async def get_keyword_trends(
+    q: Optional[str] = Query(None, max_length=200, description="이 검색어와 일치하는 포스트의 키워드만 집계"),
+    ticker: Optional[str] = None,
+    since: Optional[datetime] = Query(None, description="집계 시작 시각 (기본: 24시간 전)"),
+    limit: int = Query(20, ge=1, le=100),
+    db_service: DatabaseService = Depends(get_db_service)
+) -> Dict[str, Any]:
+    """
+    티커를 가로지르는 키워드 추이. since 이후 분석된 포스트의 키워드별 언급 수, 평균 감정, 언급한 티커와
+    바로 앞 같은 길이 구간의 언급 수(previous_mentions)를 언급 수 순으로 반환합니다.
+    """
+    until = time.time()
+    start = to_timestamp(since) if since else until - DEFAULT_TREND_SECONDS
+    if start >= until:
+        raise HTTPException(status_code=400, detail="since 는 현재 시각보다 이전이어야 합니다")
+    try:
+        keywords = await db_service.get_keyword_trends(start, until, ticker=ticker, query=q, limit=limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"키워드 추이 조회 실패: {str(e)}")
+    return {
+        "timestamp": int(until),
+        "since": start,
+        "ticker": ticker.upper() if ticker else None,
+        "keywords": keywords,
+        "status": "success"
+    }
@@ -1,145 +1,259 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Header, Request, Response, Query
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timedelta, timezone
+import hashlib
+import re
 import time
 import asyncio
-from services.reddit_service import RedditService
-from services.openai_service import OpenAIService
 from services.database_service import DatabaseService
-from services.stock_price_service import StockPriceService
+from services.snapshot_cache import SnapshotCache
+from services.stream_broker import StreamBroker
+from services.job_service import Job, JobService
+from services.scheduler_service import SchedulerService
 from models.stock_data import StockDataResponse, StockDetailResponse
 
 router = APIRouter()
 
-async def get_db_service():
-    db_service = DatabaseService()
-    try:
-        await db_service.connect()
-        yield db_service
-    finally:
-        await db_service.disconnect()
+# 히스토리 다운샘플링 구간 단위와 한 응답의 최대 구간 수
+BUCKET_UNITS = {'m': ('minute', 60), 'h': ('hour', 3600), 'd': ('day', 86400), 'w': ('week', 604800)}
+AUTO_BUCKETS = ['15m', '1h', '6h', '1d', '1w']
+MAX_HISTORY_POINTS = 1000
+
+POST_SORT_FIELDS = ['score', 'created_utc', 'comments', 'sentiment']
+
+# APP_MODE=api 로 실행 중이면 스케줄러와 작업 큐가 없음
+API_ONLY_DETAIL = "API 전용 모드에서는 사용할 수 없습니다"
+
+def get_db_service(request: Request) -> DatabaseService:
+    """lifespan 에서 연결해 둔 공유 DatabaseService 를 반환합니다."""
+    return request.app.state.db_service
+
+def get_scheduler(request: Request) -> SchedulerService:
+    """스케줄러가 보유한 서비스 인스턴스(및 동시성 한도)를 요청 간에 공유합니다."""
+    if request.app.state.scheduler is None:
+        raise HTTPException(status_code=503, detail=API_ONLY_DETAIL)
+    return request.app.state.scheduler
+
+def get_job_service(request: Request) -> JobService:
+    """분석 요청을 실행하는 공유 작업 큐"""
+    if request.app.state.job_service is None:
+        raise HTTPException(status_code=503, detail=API_ONLY_DETAIL)
+    return request.app.state.job_service
+
+def get_snapshot_cache(request: Request) -> SnapshotCache:
+    """읽기 API 가 사용하는 미리 직렬화된 스냅샷 캐시"""
+    return request.app.state.snapshot_cache
+
+def get_stream_broker(request: Request) -> StreamBroker:
+    """스냅샷 변경을 SSE 구독자에게 전달하는 브로커"""
+    return request.app.state.stream_broker
+
+def make_etag(snapshot: SnapshotCache, *params) -> str:
+    """공유 데이터 버전(마지막 분석 주기)과 요청 파라미터로 약한 ETag 생성"""
+    digest = hashlib.md5("|".join(map(str, params)).encode()).hexdigest()[:8]
+    return f'W/"{snapshot.version}-{digest}"'
+
+def check_not_modified(request: Request, etag: str) -> Optional[Response]:
+    """If-None-Match 가 현재 ETag 와 같으면 본문 없이 304 응답을 반환합니다."""
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match and (if_none_match.strip() == '*' or etag in [tag.strip() for tag in if_none_match.split(',')]):
+        return Response(status_code=304, headers={'ETag': etag, 'Cache-Control': 'no-cache'})
+    return None
+
+def json_bytes_response(body: bytes, etag: str) -> Response:
+    return Response(content=body, media_type='application/json', headers={'ETag': etag, 'Cache-Control': 'no-cache'})
 
 @router.get("/stocks")
-async def get_stock_data(db_service: DatabaseService = Depends(get_db_service)) -> Dict[str, Any]:
+async def get_stock_data(
+    request: Request,
+    fields: str = Query('full', regex='^(full|summary)$'),
+    snapshot: SnapshotCache = Depends(get_snapshot_cache)
+) -> Dict[str, Any]:
     """
     모든 주식 데이터를 반환합니다.
+    fields=summary 이면 포스트를 제외한 요약만 반환합니다.
+    응답은 스냅샷 캐시에서 미리 직렬화된 본문을 그대로 사용합니다. (timestamp 는 직렬화 시각)
     """
     try:
-        stock_data_list = await db_service.get_all_stock_data()
-
-        # 데이터를 적절한 형식으로 변환
-        stocks = {}
-        total_mentions = 0
-
-        for stock_data in stock_data_list:
-            ticker = stock_data['ticker']
-            stocks[ticker] = {
-                "sentiment": stock_data.get('sentiment', 0.0),
-                "mentions": stock_data.get('mentions', 0),
-                "price_change_24h": stock_data.get('price_change_24h'),
-                "key_words": stock_data.get('key_words', []),
-                "posts": stock_data.get('posts', [])
-            }
-            total_mentions += stock_data.get('mentions', 0)
-
-        return {
-            "timestamp": int(time.time()),
-            "stocks": stocks,
-            "total_mentions": total_mentions,
-            "status": "success"
-        }
+        await snapshot.ensure_ready()
+        etag = make_etag(snapshot, 'stocks', fields)
+        not_modified = check_not_modified(request, etag)
+        if not_modified:
+            return not_modified
+        return json_bytes_response(snapshot.list_response(fields), etag)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"데이터 조회 실패: {str(e)}")
 
-@router.post("/stocks/{ticker}/analyze")
-async def analyze_stock(ticker: str):
+@router.get("/stream")
+async def stream_stock_updates(
+    request: Request,
+    tickers: Optional[str] = Query(None, description="쉼표로 구분한 티커 목록 (생략 시 전체)"),
+    last_event_id: Optional[int] = Query(None, ge=0),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID"),
+    broker: StreamBroker = Depends(get_stream_broker),
+    snapshot: SnapshotCache = Depends(get_snapshot_cache)
+):
     """
-    특정 주식에 대한 실시간 데이터 수집 및 분석을 수행합니다.
+    티커 데이터가 저장될 때마다 해당 티커의 요약 델타를 SSE 로 전송합니다.
+    이벤트 id 는 데이터 버전이며, 재접속 시 Last-Event-ID 헤더(또는 last_event_id)
+    이후에 바뀐 티커의 현재 값을 먼저 보냅니다.
     """
-    ticker = ticker.upper()
+    if last_event_id_header is not None:
+        try:
+            last_event_id = int(last_event_id_header)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Last-Event-ID 형식이 올바르지 않습니다")
 
-    try:
-        # 서비스 인스턴스 생성
-        reddit_service = RedditService()
-        openai_service = OpenAIService()
-        stock_price_service = StockPriceService()
-        db_service = DatabaseService()
-        await db_service.connect()
-
-        # Reddit 데이터 수집
-        posts = reddit_service.search_stock_mentions(ticker, limit=20)
+    ticker_filter = {t.strip().upper() for t in tickers.split(',') if t.strip()} if tickers else None
 
-        # OpenAI로 감정 분석 및 키워드 추출
-        analyzed_posts = openai_service.analyze_posts_batch(posts)
+    try:
+        await snapshot.ensure_ready()
+        subscriber = broker.subscribe(ticker_filter, last_event_id)
+    except OverflowError:
+        raise HTTPException(status_code=503, detail="스트림 구독자 수가 한도를 초과했습니다")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"스트림 시작 실패: {str(e)}")
 
-        # 주식 가격 데이터 가져오기
-        price_change = await stock_price_service.get_stock_price_change(ticker)
+    return StreamingResponse(
+        broker.events(subscriber, request.is_disconnected),
+        media_type='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
 
-        # 모든 키워드 수집
-        all_keywords = []
-        total_sentiment = 0.0
+def accepted_job_response(job: Job, message: str) -> JSONResponse:
+    """202 응답과 함께 작업 상태 조회 경로를 알려줍니다."""
+    status_url = f"/api/v1/jobs/{job.id}"
+    return JSONResponse(
+        status_code=202,
+        content={
+            "timestamp": int(time.time()),
+            "job": job.to_dict(),
+            "status_url": status_url,
+            "status": "accepted",
+            "message": message
+        },
+        headers={'Location': status_url}
+    )
 
-        for post in analyzed_posts:
-            all_keywords.extend(post['keywords'])
-            total_sentiment += post['sentiment']
+@router.post("/stocks/{ticker}/analyze", status_code=202)
+async def analyze_stock(
+    ticker: str,
+    scheduler: SchedulerService = Depends(get_scheduler),
+    jobs: JobService = Depends(get_job_service)
+):
+    """
+    특정 주식에 대한 데이터 수집 및 분석 작업을 등록하고 작업 ID 를 반환합니다.
+    같은 티커의 작업이 대기/실행 중이면 새로 실행하지 않고 그 작업을 반환합니다.
+    """
+    ticker = ticker.upper()
 
-        # 평균 감정 점수 계산
-        avg_sentiment = total_sentiment / len(analyzed_posts) if analyzed_posts else 0.0
+    try:
+        job = jobs.submit('ticker', ticker, lambda: scheduler.analyze_ticker(ticker, require_analysis=True))
+    except OverflowError:
+        raise HTTPException(status_code=503, detail="분석 작업 대기열이 가득 찼습니다")
+    return accepted_job_response(job, f"{ticker} 분석 작업이 등록되었습니다")
 
-        # 상위 키워드 추출 (빈도 기준)
-        from collections import Counter
-        keyword_counts = Counter(all_keywords)
-        top_keywords = [k for k, v in keyword_counts.most_common(5)]
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: str, jobs: JobService = Depends(get_job_service)) -> Dict[str, Any]:
+    """분석 작업의 상태(queued/running/succeeded/failed)와 결과를 반환합니다."""
+    job = jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"작업 {job_id}을 찾을 수 없습니다")
+    return {
+        "timestamp": int(time.time()),
+        "job": job.to_dict(),
+        "status": "success"
+    }
 
-        # 데이터 구조화
-        stock_data = {
-            "ticker": ticker,
-            "sentiment": round(avg_sentiment, 3),
-            "mentions": len(analyzed_posts),
-            "price_change_24h": price_change,
-            "key_words": top_keywords,
-            "posts": analyzed_posts
-        }
+@router.get("/stocks/{ticker}")
+async def get_stock_detail(
+    ticker: str,
+    request: Request,
+    posts_offset: int = Query(0, ge=0),
+    posts_limit: int = Query(20, ge=1, le=100),
+    posts_sort: str = Query('score', regex=f"^({'|'.join(POST_SORT_FIELDS)})$"),
+    posts_order: str = Query('desc', regex='^(asc|desc)$'),
+    snapshot: SnapshotCache = Depends(get_snapshot_cache)
+) -> Dict[str, Any]:
+    """
+    특정 주식의 상세 데이터를 반환합니다.
+    포스트는 posts_sort/posts_order 로 정렬하여 posts_offset 부터 posts_limit 개만 반환합니다.
+    """
+    ticker = ticker.upper()
 
-        # 데이터베이스에 저장
-        await db_service.save_stock_data(ticker, stock_data)
+    try:
+        await snapshot.ensure_ready()
+        etag = make_etag(snapshot, 'stock', ticker, posts_offset, posts_limit, posts_sort, posts_order)
+        not_modified = check_not_modified(request, etag)
+        if not_modified:
+            return not_modified
 
-        await db_service.disconnect()
+        body = snapshot.detail_response(
+            ticker, offset=posts_offset, limit=posts_limit,
+            sort_by=posts_sort, descending=posts_order == 'desc'
+        )
+        if body is None:
+            raise HTTPException(status_code=404, detail=f"주식 {ticker}을 찾을 수 없습니다")
+        return json_bytes_response(body, etag)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"데이터 조회 실패: {str(e)}")
 
-        return {
-            "timestamp": int(time.time()),
-            "ticker": ticker,
-            "status": "success",
-            "message": f"{ticker} 데이터 분석 및 저장 완료"
-        }
+def parse_bucket(bucket: str) -> Tuple[str, int, int]:
+    """'15m', '1h', '1d' 형식을 (MongoDB 단위, binSize, 초) 로 변환합니다."""
+    match = re.fullmatch(r'(\d+)([mhdw])', bucket or '')
+    if not match or int(match.group(1)) <= 0:
+        raise HTTPException(status_code=400, detail=f"잘못된 bucket 값입니다: {bucket} (예: 15m, 1h, 1d)")
+    size = int(match.group(1))
+    unit, seconds = BUCKET_UNITS[match.group(2)]
+    return unit, size, size * seconds
 
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"분석 실패: {str(e)}")
+def to_naive_utc(value: datetime) -> datetime:
+    """MongoDB 에 저장된 naive UTC 값과 비교할 수 있도록 변환"""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
 
-@router.get("/stocks/{ticker}")
-async def get_stock_detail(ticker: str, db_service: DatabaseService = Depends(get_db_service)) -> Dict[str, Any]:
+@router.get("/stocks/{ticker}/history")
+async def get_stock_history(
+    ticker: str,
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    bucket: Optional[str] = None,
+    db_service: DatabaseService = Depends(get_db_service)
+) -> Dict[str, Any]:
     """
-    특정 주식의 상세 데이터를 반환합니다.
+    특정 주식의 감정/멘션/가격 변동 히스토리를 구간별로 다운샘플링하여 반환합니다.
+    from/to 는 ISO 8601 또는 유닉스 시간, bucket 을 생략하면 구간 수가 적당하도록 자동 선택합니다.
     """
     ticker = ticker.upper()
+    end = to_naive_utc(end) if end else datetime.utcnow()
+    start = to_naive_utc(start) if start else end - timedelta(days=7)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="from 은 to 보다 이전이어야 합니다")
 
-    try:
-        stock_data = await db_service.get_stock_data(ticker)
-        if not stock_data:
-            raise HTTPException(status_code=404, detail=f"주식 {ticker}을 찾을 수 없습니다")
+    span_seconds = (end - start).total_seconds()
+    if bucket is None:
+        bucket = next(
+            (candidate for candidate in AUTO_BUCKETS if span_seconds / parse_bucket(candidate)[2] <= 200),
+            AUTO_BUCKETS[-1]
+        )
+    unit, bin_size, bucket_seconds = parse_bucket(bucket)
+    if span_seconds / bucket_seconds > MAX_HISTORY_POINTS:
+        raise HTTPException(status_code=400, detail=f"구간 수가 너무 많습니다 (최대 {MAX_HISTORY_POINTS}개). bucket 을 늘려주세요")
 
+    try:
+        points = await db_service.get_history(ticker, start, end, unit, bin_size)
         return {
             "timestamp": int(time.time()),
             "ticker": ticker,
-            "data": {
-                "sentiment": stock_data.get('sentiment', 0.0),
-                "mentions": stock_data.get('mentions', 0),
-                "price_change_24h": stock_data.get('price_change_24h'),
-                "key_words": stock_data.get('key_words', []),
-                "posts": stock_data.get('posts', [])
-            },
+            "from": start,
+            "to": end,
+            "bucket": bucket,
+            "points": points,
             "status": "success"
         }
-    except HTTPException:
-        raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"데이터 조회 실패: {str(e)}")
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"히스토리 조회 실패: {str(e)}")
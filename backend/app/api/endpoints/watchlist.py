@@ -0,0 +1,73 @@
+from fastapi import APIRouter, HTTPException, Depends, Path, Request
+from typing import Dict, Any
+import time
+from services.scheduler_service import SchedulerService
+from api.endpoints.stock_data import API_ONLY_DETAIL
+
+router = APIRouter()
+
+TICKER_PATTERN = r'^[A-Za-z][A-Za-z.\-]{0,9}$'
+
+def get_scheduler(request: Request) -> SchedulerService:
+    """감시 목록과 티커별 스케줄을 관리하는 공유 스케줄러"""
+    if request.app.state.scheduler is None:
+        raise HTTPException(status_code=503, detail=API_ONLY_DETAIL)
+    return request.app.state.scheduler
+
+@router.get("/watchlist")
+async def get_watchlist(scheduler: SchedulerService = Depends(get_scheduler)) -> Dict[str, Any]:
+    """
+    감시 목록과 티커별 스케줄 상태(분석 간격, 다음 실행 시각, 언급 속도, 변동성)를 반환합니다.
+    여러 노드가 실행 중이면 다른 노드가 담당하는 티커는 담당 노드(owner)만 표시합니다.
+    """
+    states = []
+    for ticker in sorted(scheduler.watchlist):
+        state = scheduler.schedule.states.get(ticker)
+        entry = state.to_dict() if state is not None else {"ticker": ticker}
+        entry["owner"] = scheduler.owner_of(ticker)
+        states.append(entry)
+    return {
+        "timestamp": int(time.time()),
+        "tickers": states,
+        "total": len(states),
+        "status": "success"
+    }
+
+@router.put("/watchlist/{ticker}")
+async def add_watchlist_ticker(
+    ticker: str = Path(..., regex=TICKER_PATTERN),
+    scheduler: SchedulerService = Depends(get_scheduler)
+) -> Dict[str, Any]:
+    """감시 목록에 티커를 추가합니다. 추가된 티커는 바로 분석이 예약됩니다."""
+    ticker = ticker.upper()
+    try:
+        added = await scheduler.add_ticker(ticker)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"감시 목록 추가 실패: {str(e)}")
+    return {
+        "timestamp": int(time.time()),
+        "ticker": ticker,
+        "added": added,
+        "status": "success",
+        "message": f"{ticker}이(가) 감시 목록에 {'추가되었습니다' if added else '이미 있습니다'}"
+    }
+
+@router.delete("/watchlist/{ticker}")
+async def remove_watchlist_ticker(
+    ticker: str,
+    scheduler: SchedulerService = Depends(get_scheduler)
+) -> Dict[str, Any]:
+    """감시 목록에서 티커를 제거합니다. 이미 저장된 분석 데이터는 그대로 둡니다."""
+    ticker = ticker.upper()
+    try:
+        removed = await scheduler.remove_ticker(ticker)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"감시 목록 삭제 실패: {str(e)}")
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"감시 목록에 {ticker}이(가) 없습니다")
+    return {
+        "timestamp": int(time.time()),
+        "ticker": ticker,
+        "status": "success",
+        "message": f"{ticker}이(가) 감시 목록에서 제거되었습니다"
+    }
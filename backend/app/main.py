@@ -1,18 +1,165 @@
-from fastapi import FastAPI
+import time
+# 모듈 import 시작 시각 (서버 시작 시간 측정용, 다른 import 보다 먼저)
+IMPORT_STARTED = time.perf_counter()
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from contextlib import asynccontextmanager
 import asyncio
+import logging
+import os
+from typing import Any, Dict, Optional
+from services.concurrency import shutdown_executor
+from services.database_service import DatabaseService
 from services.scheduler_service import SchedulerService
+from services.coordination import ClusterCoordinator
+from services.post_store import PostStore
+from services.snapshot_cache import SnapshotCache
+from services.stream_broker import StreamBroker
+from services.job_service import JobService
+from services.mention_stream import MentionStream
+from services.profiler import SamplingProfiler
+from services.metrics import REGISTRY, HTTP_SECONDS
 
-scheduler = SchedulerService()
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# all: 읽기 API + 스케줄러/수집/분석 / api: 읽기 API 만 (스케줄러, 클러스터 조정, 작업 큐를 만들지 않음)
+APP_MODE = os.getenv('APP_MODE', 'all').lower()
+API_ONLY = APP_MODE == 'api'
+# import 부터 시작 완료까지의 목표 시간 (넘으면 경고 로그)
+STARTUP_BUDGET_SECONDS = float(os.getenv('STARTUP_BUDGET_SECONDS', '10'))
+# 시작 시 MongoDB 에 연결하지 못하면 서버는 그대로 띄우고 이 간격(최대 60초까지 두 배씩)으로 재시도
+STARTUP_RETRY_SECONDS = float(os.getenv('STARTUP_RETRY_SECONDS', '5'))
+
+# 엔드포인트와 스케줄러가 함께 사용하는 단일 MongoDB 커넥션 풀
+db_service = DatabaseService()
+coordinator: Optional[ClusterCoordinator] = None
+scheduler: Optional[SchedulerService] = None
+job_service: Optional[JobService] = None
+if API_ONLY:
+    post_store = PostStore(db_service)
+    sampling_profiler = SamplingProfiler()
+else:
+    # 여러 레플리카가 티커를 나눠 맡고 수집은 임대를 가진 한 노드만 수행
+    coordinator = ClusterCoordinator(db_service)
+    scheduler = SchedulerService(db_service=db_service, coordinator=coordinator)
+    # 수동 분석 요청을 HTTP 요청 밖에서 실행하는 작업 큐 (같은 대상 요청은 하나로 합침)
+    job_service = JobService()
+    post_store = scheduler.post_store
+    sampling_profiler = scheduler.profiler
+# 읽기 API 용 미리 직렬화된 응답 캐시 (저장 시 갱신, 레플리카 간 버전 폴링)
+snapshot_cache = SnapshotCache(db_service, post_store=post_store)
+# 스냅샷 변경을 SSE 구독자에게 티커별 델타로 전달
+stream_broker = StreamBroker(snapshot_cache)
+# 새 포스트/댓글 스트림의 티커별 분 단위 언급 카운터 (수집 리더가 읽고 주기적으로 체크포인트, API 전용 모드는 사본)
+mention_stream = MentionStream(db_service, scheduler)
+
+# 시작 시간과 상태 (/health, /metrics)
+startup: Dict[str, Any] = {
+    "mode": APP_MODE,
+    "state": "starting",
+    "import_seconds": None,
+    "startup_seconds": None,
+    "budget_seconds": STARTUP_BUDGET_SECONDS,
+    "over_budget": False,
+    "database_attempts": 0,
+    "error": None,
+}
+
+# /metrics 수집 시점에 각 서비스의 stats() 를 게이지로 내보냄
+# (분석기와 가격 서비스는 첫 분석 때 만들어지므로 그 전에는 비어 있음)
+REGISTRY.add_stats_source("startup", lambda: startup)
+REGISTRY.add_stats_source("posts", post_store.stats)
+REGISTRY.add_stats_source("snapshot_cache", snapshot_cache.stats)
+REGISTRY.add_stats_source("stream", stream_broker.stats)
+REGISTRY.add_stats_source("mentions", mention_stream.stats)
+REGISTRY.add_stats_source("discovery", mention_stream.discovery.stats)
+REGISTRY.add_stats_source("mongodb_pool", db_service.pool_listener.snapshot)
+REGISTRY.add_stats_source("profiler", sampling_profiler.stats)
+if scheduler is not None:
+    REGISTRY.add_stats_source("analysis_cache", scheduler.analysis_cache.stats)
+    REGISTRY.add_stats_source("analyzer", scheduler.lazy_analyzer.stats)
+    REGISTRY.add_stats_source("prices", scheduler.lazy_prices.stats)
+    REGISTRY.add_stats_source("scheduler", scheduler.stats)
+    REGISTRY.add_stats_source("jobs", job_service.stats)
+
+async def start_services(started: float):
+    await db_service.bootstrap()
+    if coordinator is not None:
+        await coordinator.start()
+    await snapshot_cache.start()
+    if scheduler is not None:
+        await scheduler.start_scheduler()
+    await mention_stream.start()
+    startup["state"] = "ready"
+    startup["startup_seconds"] = round(time.perf_counter() - started, 3)
+    total = startup["import_seconds"] + startup["startup_seconds"]
+    startup["over_budget"] = total > STARTUP_BUDGET_SECONDS
+    log = logger.warning if startup["over_budget"] else logger.info
+    log(f"Started in {total:.2f}s (mode={APP_MODE}, import {startup['import_seconds']:.2f}s, "
+        f"startup {startup['startup_seconds']:.2f}s, budget {STARTUP_BUDGET_SECONDS:g}s)")
+
+async def start_when_connected(started: float):
+    """MongoDB 에 연결될 때까지 재시도한 뒤 나머지 시작 단계를 수행합니다."""
+    delay = STARTUP_RETRY_SECONDS
+    while True:
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, 60.0)
+        startup["database_attempts"] += 1
+        try:
+            await db_service.connect()
+            break
+        except Exception as e:
+            startup["error"] = str(e)
+            logger.error(f"MongoDB still unavailable, retrying in {delay:g}s: {str(e)}")
+    startup["error"] = None
+    await start_services(started)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # 애플리케이션 시작 시
-    await scheduler.start_scheduler()
+    started = time.perf_counter()
+    app.state.db_service = db_service
+    app.state.scheduler = scheduler
+    app.state.snapshot_cache = snapshot_cache
+    app.state.stream_broker = stream_broker
+    app.state.job_service = job_service
+    app.state.mention_stream = mention_stream
+    app.state.profiler = sampling_profiler
+    if job_service is not None:
+        # DB 와 무관하므로 먼저 시작 (DB 연결을 기다리는 동안에도 작업 등록 가능)
+        await job_service.start()
+    background: Optional[asyncio.Task] = None
+    try:
+        startup["database_attempts"] += 1
+        await db_service.connect()
+    except Exception as e:
+        # 자격 증명 누락/DB 장애로 서버 시작이 실패하지 않도록, 연결될 때까지 /health 는 degraded 로 응답하고
+        # 나머지 시작 단계는 백그라운드에서 재시도 후 이어서 수행
+        startup["state"] = "waiting_for_database"
+        startup["error"] = str(e)
+        logger.error(f"MongoDB unavailable at startup, retrying in the background: {str(e)}")
+        background = asyncio.create_task(start_when_connected(started))
+    else:
+        await start_services(started)
     yield
     # 애플리케이션 종료 시
-    await scheduler.stop_scheduler()
+    if background is not None:
+        background.cancel()
+        await asyncio.gather(background, return_exceptions=True)
+    stream_broker.close()
+    await mention_stream.stop()
+    if scheduler is not None:
+        await job_service.stop()
+        await scheduler.stop_scheduler()
+        if db_service.is_connected:
+            await coordinator.stop()
+    await snapshot_cache.stop()
+    if scheduler is not None:
+        await scheduler.close()
+    await db_service.disconnect()
+    shutdown_executor()
 
 app = FastAPI(
     title="Reddit Stock Monitor API",
@@ -29,9 +176,27 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """엔드포인트별 응답 시간 (레이블은 경로 대신 엔드포인트 함수 이름을 사용하여 종류 수를 제한)"""
+    started = time.perf_counter()
+    response = await call_next(request)
+    endpoint = request.scope.get("endpoint")
+    HTTP_SECONDS.observe(
+        time.perf_counter() - started,
+        method=request.method,
+        route=endpoint.__name__ if endpoint is not None else "unmatched",
+        status=response.status_code
+    )
+    return response
+
 # API 라우터 포함
-from api.endpoints import stock_data
+from api.endpoints import stock_data, watchlist, mentions, search, profiler
 app.include_router(stock_data.router, prefix="/api/v1", tags=["stocks"])
+app.include_router(mentions.router, prefix="/api/v1", tags=["mentions"])
+app.include_router(search.router, prefix="/api/v1", tags=["search"])
+app.include_router(watchlist.router, prefix="/api/v1", tags=["watchlist"])
+app.include_router(profiler.router, prefix="/api/v1", tags=["diagnostics"])
 
 @app.get("/")
 async def root():
@@ -39,15 +204,42 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"}
+    database = await db_service.health_check()
+    health = {
+        "status": "healthy" if database["status"] == "ok" and startup["state"] == "ready" else "degraded",
+        "mode": APP_MODE,
+        "startup": startup,
+        "database": database,
+        "snapshot_cache": snapshot_cache.stats(),
+        "stream": stream_broker.stats(),
+        "mentions": mention_stream.stats(),
+        "discovery": mention_stream.discovery.stats(),
+    }
+    if scheduler is not None:
+        health.update({
+            "analysis_cache": scheduler.analysis_cache.stats(),
+            "jobs": job_service.stats(),
+            "scheduler": scheduler.stats(),
+            "prices": scheduler.lazy_prices.stats(),
+            "cluster": coordinator.stats(),
+        })
+    return health
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus 텍스트 형식 지표 (단계별 지연 히스토그램, 외부 호출/오류 카운터, 캐시 적중률 등)"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
 
 # 수동 분석을 위한 엔드포인트
-@app.post("/api/v1/analyze")
+@app.post("/api/v1/analyze", status_code=202)
 async def manual_analyze():
-    """모든 주식에 대한 수동 분석 실행"""
+    """모든 주식에 대한 수동 분석 작업 등록 (진행 중인 전체 분석이 있으면 그 작업을 반환)"""
+    if scheduler is None:
+        raise HTTPException(status_code=503, detail=stock_data.API_ONLY_DETAIL)
     try:
-        await scheduler.manual_run()
-        return {"status": "success", "message": "수동 분석이 완료되었습니다"}
-    except Exception as e:
-        from fastapi import HTTPException
-        raise HTTPException(status_code=500, detail=f"분석 실패: {str(e)}")
\ No newline at end of file
+        job = job_service.submit('all', 'all', scheduler.manual_run)
+    except OverflowError:
+        raise HTTPException(status_code=503, detail="분석 작업 대기열이 가득 찼습니다")
+    return stock_data.accepted_job_response(job, "수동 분석 작업이 등록되었습니다")
+
+startup["import_seconds"] = round(time.perf_counter() - IMPORT_STARTED, 3)
@@ -7,8 +7,10 @@ class RedditPost(BaseModel):
     score: int
     comments: int
     url: str
-    sentiment: float = Field(default=0.0, ge=-1.0, le=1.0)
+    # 분석에 실패한 포스트는 sentiment 가 None 이고 analysis_status 가 'unanalyzed'
+    sentiment: Optional[float] = Field(default=None, ge=-1.0, le=1.0)
     keywords: List[str] = Field(default_factory=list)
+    analysis_status: str = "analyzed"
     created_utc: float
     subreddit: str
     selftext: Optional[str] = None
@@ -17,6 +19,7 @@ class StockData(BaseModel):
     ticker: str = Field(..., min_length=1, max_length=10)
     sentiment: float = Field(default=0.0, ge=-1.0, le=1.0)
     mentions: int = Field(default=0, ge=0)
+    analyzed_mentions: int = Field(default=0, ge=0)
     price_change_24h: Optional[float] = None
     key_words: List[str] = Field(default_factory=list)
     posts: List[RedditPost] = Field(default_factory=list)
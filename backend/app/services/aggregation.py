@@ -0,0 +1,124 @@
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# 티커 집계에 반영하는 기간(초)과 화면에 보여줄 포스트 수
+DEFAULT_WINDOW_SECONDS = 24 * 3600
+DEFAULT_MAX_POSTS = 20
+TOP_KEYWORDS = 5
+
+
+def post_reference(post: Dict[str, Any]) -> Dict[str, Any]:
+    """티커 문서에 저장하는 포스트 참조. 본문과 분석 결과는 posts 컬렉션에 한 번만 저장됩니다."""
+    return {
+        'id': post.get('id') or post['url'],
+        'score': post.get('score', 0),
+        'created_utc': post['created_utc'],
+        'relevance': post.get('relevance', 1.0),
+    }
+
+
+def expired_window_ids(existing: Optional[Dict[str, Any]], now: float,
+                       window_seconds: int = DEFAULT_WINDOW_SECONDS) -> List[str]:
+    """기간이 지나 기여분을 빼야 하는 창 항목 중 분석 결과를 posts 컬렉션에서 읽어야 하는 포스트 id"""
+    cutoff = now - window_seconds
+    return [
+        entry['id'] for entry in (existing or {}).get('window', [])
+        if entry['created_utc'] < cutoff and 'sentiment' not in entry
+    ]
+
+
+def merge_ticker_aggregate(existing: Optional[Dict[str, Any]], new_posts: List[Dict[str, Any]],
+                           now: Optional[float] = None, window_seconds: int = DEFAULT_WINDOW_SECONDS,
+                           max_posts: int = DEFAULT_MAX_POSTS,
+                           analyses: Optional[Dict[str, Dict[str, Any]]] = None,
+                           rebuild: bool = False) -> Dict[str, Any]:
+    """
+    기존 티커 집계에 새로 분석된 포스트를 더하고, 기간이 지난 포스트의 기여분을 뺍니다.
+    전체 포스트를 다시 계산하지 않으며 이미 반영된 포스트(id 기준)는 건너뜁니다.
+
+    집계 문서는 기간 내 포스트 참조(window: id, created_utc, relevance)와 누적값(sentiment_sum, keyword_counts)을,
+    화면용 포스트(posts)는 post_reference 참조만 보관합니다. 기간이 지난 포스트의 sentiment/keywords 는
+    analyses(id → 분석된 포스트)에서 읽습니다. rebuild 이면 analyses 에 있는 창 항목만 남기고 누적값을 다시 계산합니다.
+    (보존 기간이 지나 posts 에서 삭제된 포스트가 있어 기여분을 뺄 수 없을 때, analyses 는 창 전체를 담아야 함)
+    """
+    now = now if now is not None else time.time()
+    cutoff = now - window_seconds
+    existing = existing or {}
+    analyses = analyses or {}
+
+    def contribution(entry: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        # 이전 형식의 창 항목은 sentiment/keywords 를 직접 가짐
+        return entry if 'sentiment' in entry else analyses.get(entry['id'])
+
+    window: List[Dict[str, Any]] = list(existing.get('window', []))
+    if rebuild:
+        window = [entry for entry in window if entry['created_utc'] >= cutoff and contribution(entry)]
+        sentiment_sum, analyzed_mentions, keyword_counts = 0.0, 0, Counter()
+        for entry in window:
+            analysis = contribution(entry)
+            if analysis.get('sentiment') is not None:
+                sentiment_sum += analysis['sentiment']
+                analyzed_mentions += 1
+            keyword_counts.update(analysis.get('keywords', []))
+    else:
+        sentiment_sum = float(existing.get('sentiment_sum', 0.0))
+        analyzed_mentions = int(existing.get('analyzed_mentions', 0)) if 'window' in existing else 0
+        keyword_counts = Counter({
+            entry['keyword']: entry['count'] for entry in existing.get('keyword_counts', [])
+        })
+
+        # 기간이 지난 포스트의 기여분 제거
+        kept = []
+        for entry in window:
+            if entry['created_utc'] >= cutoff:
+                kept.append(entry)
+                continue
+            analysis = contribution(entry) or {}
+            if analysis.get('sentiment') is not None:
+                sentiment_sum -= analysis['sentiment']
+                analyzed_mentions -= 1
+            keyword_counts.subtract(analysis.get('keywords', []))
+        window = kept
+
+    # 새 포스트 기여분 추가 (중복 id 와 기간 밖 포스트는 제외)
+    seen_ids = {entry['id'] for entry in window}
+    added = []
+    for post in new_posts:
+        post_id = post.get('id') or post['url']
+        if post_id in seen_ids or post['created_utc'] < cutoff:
+            continue
+        seen_ids.add(post_id)
+        sentiment = post.get('sentiment')
+        window.append({
+            'id': post_id,
+            'created_utc': post['created_utc'],
+            'relevance': post.get('relevance', 1.0)
+        })
+        if sentiment is not None:
+            sentiment_sum += sentiment
+            analyzed_mentions += 1
+        keyword_counts.update(post.get('keywords', []))
+        added.append(post)
+
+    keyword_counts = +keyword_counts  # 0 이하 항목 제거
+    if analyzed_mentions <= 0:
+        analyzed_mentions, sentiment_sum = 0, 0.0
+
+    # 화면용 포스트 참조: 기존 목록 + 새 포스트 중 기간 내 상위 점수
+    display_posts = [
+        post_reference(post) for post in existing.get('posts', []) if post.get('created_utc', 0) >= cutoff
+    ] + [post_reference(post) for post in added]
+    display_posts = sorted(display_posts, key=lambda x: x.get('score', 0), reverse=True)[:max_posts]
+
+    return {
+        'sentiment': round(sentiment_sum / analyzed_mentions, 3) if analyzed_mentions else 0.0,
+        'mentions': len(window),
+        'analyzed_mentions': analyzed_mentions,
+        'key_words': [keyword for keyword, _ in keyword_counts.most_common(TOP_KEYWORDS)],
+        'posts': display_posts,
+        'window': window,
+        'sentiment_sum': sentiment_sum,
+        'keyword_counts': [{'keyword': k, 'count': c} for k, c in keyword_counts.items()],
+        'new_posts': len(added),
+    }
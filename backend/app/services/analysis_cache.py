@@ -0,0 +1,113 @@
+import hashlib
+import os
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Dict, Iterable, Optional
+import logging
+from pymongo import UpdateOne
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class AnalysisCache:
+    """
+    포스트 분석 결과 캐시.
+    키는 (모델, 프롬프트 버전, 포스트 텍스트)의 해시이며,
+    프로세스 내 LRU 와 TTL 인덱스가 걸린 MongoDB 컬렉션의 2단계로 구성됩니다.
+    """
+
+    def __init__(self, db_service=None, max_entries: Optional[int] = None, ttl_days: Optional[int] = None):
+        self.db_service = db_service
+        self.max_entries = max_entries or int(os.getenv('ANALYSIS_CACHE_MAX_ENTRIES', '10000'))
+        self.ttl_days = ttl_days or int(os.getenv('ANALYSIS_CACHE_TTL_DAYS', '7'))
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._indexes_ready = False
+        self.memory_hits = 0
+        self.persistent_hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(text: str, model: str, prompt_version: str) -> str:
+        payload = f"{model}\x00{prompt_version}\x00{text}".encode('utf-8')
+        return hashlib.sha256(payload).hexdigest()
+
+    @property
+    def collection(self):
+        if self.db_service is None or self.db_service.database is None:
+            return None
+        return self.db_service.database['analysis_cache']
+
+    async def ensure_indexes(self):
+        """영구 캐시 TTL 인덱스 생성"""
+        collection = self.collection
+        if collection is None or self._indexes_ready:
+            return
+        try:
+            await collection.create_index('created_at', expireAfterSeconds=self.ttl_days * 86400)
+            self._indexes_ready = True
+        except Exception as e:
+            logger.error(f"Error creating analysis cache index: {str(e)}")
+
+    def _remember(self, key: str, value: Dict[str, Any]):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def get_many(self, keys: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """캐시된 결과를 반환합니다. 메모리 → MongoDB 순으로 조회합니다."""
+        found: Dict[str, Dict[str, Any]] = {}
+        pending = []
+        for key in dict.fromkeys(keys):
+            value = self._memory.get(key)
+            if value is not None:
+                self._memory.move_to_end(key)
+                found[key] = value
+                self.memory_hits += 1
+            else:
+                pending.append(key)
+
+        collection = self.collection
+        if pending and collection is not None:
+            try:
+                async for doc in collection.find({'_id': {'$in': pending}}):
+                    value = {'sentiment': doc['sentiment'], 'keywords': doc['keywords']}
+                    found[doc['_id']] = value
+                    self._remember(doc['_id'], value)
+                    self.persistent_hits += 1
+            except Exception as e:
+                logger.error(f"Error reading analysis cache: {str(e)}")
+
+        self.misses += sum(1 for key in pending if key not in found)
+        return found
+
+    async def set_many(self, entries: Dict[str, Dict[str, Any]]):
+        """분석 결과를 두 단계 캐시에 모두 저장합니다."""
+        if not entries:
+            return
+        for key, value in entries.items():
+            self._remember(key, value)
+
+        collection = self.collection
+        if collection is None:
+            return
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne({'_id': key}, {'$set': {**value, 'created_at': now}}, upsert=True)
+            for key, value in entries.items()
+        ]
+        try:
+            await collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error writing analysis cache: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.memory_hits + self.persistent_hits + self.misses
+        return {
+            "entries": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "persistent_hits": self.persistent_hits,
+            "misses": self.misses,
+            "hit_ratio": round((self.memory_hits + self.persistent_hits) / lookups, 3) if lookups else None,
+        }
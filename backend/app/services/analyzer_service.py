@@ -0,0 +1,97 @@
+import asyncio
+import os
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional
+import logging
+from services.analysis_cache import AnalysisCache
+from services.metrics import record_call
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class BaseAnalyzer(ABC):
+    """포스트 감정/키워드 분석기 인터페이스"""
+
+    name = "base"
+
+    @abstractmethod
+    async def analyze_posts_batch(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        각 포스트에 sentiment, keywords, analyzer, analysis_status 필드를 채운 복사본 목록을 반환합니다.
+        분석하지 못한 포스트는 analysis_status='unanalyzed', sentiment=None 입니다.
+        """
+
+    async def close(self):
+        """분석기가 보유한 네트워크 자원 정리"""
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class FallbackAnalyzer(BaseAnalyzer):
+    """
+    기본 분석기가 제한 시간을 넘기거나 실패하면 보조 분석기로 전환합니다.
+    원격 API 가 느리거나 rate limit 에 걸려도 분석 주기가 막히지 않습니다.
+    """
+
+    def __init__(self, primary, fallback, timeout: float):
+        self.primary = primary
+        self.fallback = fallback
+        self.timeout = timeout
+        self.name = f"{primary.name}+{fallback.name}"
+        self.fallbacks = 0
+
+    async def analyze_posts_batch(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        try:
+            analyzed_posts = await asyncio.wait_for(self.primary.analyze_posts_batch(posts), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{self.primary.name} analyzer timed out after {self.timeout}s, using {self.fallback.name}")
+            self.fallbacks += 1
+            record_call(self.primary.name, 'fallback')
+            return await self.fallback.analyze_posts_batch(posts)
+        except Exception as e:
+            logger.error(f"{self.primary.name} analyzer failed, using {self.fallback.name}: {str(e)}")
+            self.fallbacks += 1
+            record_call(self.primary.name, 'fallback')
+            return await self.fallback.analyze_posts_batch(posts)
+
+        # 기본 분석기가 처리하지 못한 포스트만 보조 분석기로 채움
+        unanalyzed = [i for i, post in enumerate(analyzed_posts) if post.get('analysis_status') == 'unanalyzed']
+        if unanalyzed:
+            self.fallbacks += 1
+            filled = await self.fallback.analyze_posts_batch([posts[i] for i in unanalyzed])
+            for index, post in zip(unanalyzed, filled):
+                analyzed_posts[index] = post
+        return analyzed_posts
+
+    async def close(self):
+        await self.primary.close()
+        await self.fallback.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self.primary.stats(), "fallbacks": self.fallbacks}
+
+
+def create_analyzer(backend: Optional[str] = None, cache: Optional[AnalysisCache] = None):
+    """
+    ANALYZER_BACKEND 설정에 따라 분석기를 생성합니다.
+    - openai: OpenAI 만 사용
+    - local: 로컬 사전/TF-IDF 분석기만 사용
+    - auto (기본값): OpenAI 를 쓰되 ANALYZER_PRIMARY_TIMEOUT 초 안에 끝나지 않으면 로컬 분석기로 대체
+    """
+    backend = (backend or os.getenv('ANALYZER_BACKEND', 'auto')).lower()
+
+    from services.lexicon_analyzer import LexiconAnalyzer
+    if backend == 'local':
+        return LexiconAnalyzer()
+
+    from services.openai_service import OpenAIService
+    openai_service = OpenAIService(cache=cache)
+    if backend == 'openai':
+        return openai_service
+    if backend == 'auto':
+        timeout = float(os.getenv('ANALYZER_PRIMARY_TIMEOUT', '60'))
+        return FallbackAnalyzer(openai_service, LexiconAnalyzer(), timeout=timeout)
+
+    raise ValueError(f"Unknown analyzer backend: {backend}")
@@ -0,0 +1,481 @@
+"""
+Reddit 덤프 파일(JSONL, .zst, .gz) 오프라인 백필.
+
+실시간 수집과 같은 티커 매칭(TickerMatcher), 로컬 분석기(LexiconAnalyzer), 집계(merge_ticker_aggregate)를 거쳐
+과거 구간의 티커별 스냅샷을 stock_history 에, 매칭된 포스트를 posts 컬렉션에 bulk write 로 저장합니다.
+(stock_data 와 스냅샷 캐시는 건드리지 않으므로 실행 중인 서버와 함께 돌려도 됩니다)
+
+    cd backend/app
+    python -m services.backfill RS_2024-01.zst RS_2024-02.zst --tickers AAPL,TSLA,GME --workers 8
+    python -m services.backfill RS_2024-01.zst --dry-run --workers 4   # DB 없이 처리량만 측정
+
+- 파싱, 매칭, 감정/키워드 분석은 프로세스 풀(--workers)에서 청크(--chunk-mb) 단위로 수행하고,
+  동시에 처리 중인 청크를 워커 수의 두 배로 제한하여 메모리 사용량이 덤프 크기와 무관합니다.
+- 청크 결과는 읽은 순서대로 반영하며, --checkpoint-seconds 마다 (압축 해제 기준) 바이트 오프셋과 티커별
+  집계 상태를 저장합니다. 같은 --name 으로 다시 실행하면 그 오프셋부터 이어서 처리합니다.
+  닫힌 구간의 스냅샷도 체크포인트와 함께 저장하고 이미 있는 (ticker, 시각) 점은 건너뛰므로 중단 후 다시 실행해도
+  히스토리에 중복 점이 생기지 않습니다.
+- 포스트는 실시간 수집과 같은 posts 컬렉션에 저장되므로 포스트 시각과 관계없이 백필을 실행한 때부터
+  POST_RETENTION_HOURS 가 지나면 TTL 인덱스로 삭제됩니다. 오래 남는 것은 stock_history 의 스냅샷뿐입니다.
+"""
+import argparse
+import asyncio
+import gzip
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Deque, Dict, Iterator, List, Optional, Tuple
+import logging
+
+try:
+    import orjson
+except ImportError:  # orjson 이 없으면 표준 json 사용
+    orjson = None
+try:
+    import zstandard
+except ImportError:  # .zst 덤프를 읽을 때만 필요
+    zstandard = None
+
+from services.aggregation import merge_ticker_aggregate
+from services.post_store import PostStore, SELFTEXT_CHARS
+from services.reddit_service import SUBREDDITS
+from services.ticker_matcher import TickerMatcher
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Pushshift/Arctic Shift 덤프는 긴 윈도(최대 2GB)로 압축되어 있음
+ZSTD_MAX_WINDOW = 2 ** 31
+SKIP_BLOCK_BYTES = 16 * 1024 * 1024
+# 삭제된 포스트의 본문 자리표시
+REMOVED_TEXT = frozenset({'[removed]', '[deleted]'})
+# 집계 대기 목록에 남기는 포스트 필드 (merge_ticker_aggregate 와 post_reference 가 읽는 것만)
+PENDING_FIELDS = ['id', 'score', 'created_utc', 'sentiment', 'keywords']
+
+# 워커 프로세스별 매처/분석기 (_init_worker 에서 한 번 생성)
+_worker: Dict[str, Any] = {}
+
+
+def _init_worker(tickers: List[str], subreddits: Optional[List[str]], since: Optional[float], until: Optional[float]):
+    from services.lexicon_analyzer import LexiconAnalyzer
+    _worker.update(
+        matcher=TickerMatcher(tickers),
+        analyzer=LexiconAnalyzer(),
+        subreddits=frozenset(subreddits) if subreddits else None,
+        since=since,
+        until=until,
+    )
+
+
+def _loads(line: bytes) -> Any:
+    return orjson.loads(line) if orjson is not None else json.loads(line)
+
+
+def parse_submission(record: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    덤프의 submission 레코드를 RedditService 가 반환하는 포스트와 같은 형태로 바꿉니다.
+    제목이 없는 레코드(댓글 등)는 None 입니다. selftext 는 매칭/분석용 전체 본문입니다.
+    """
+    title = record.get('title')
+    post_id = record.get('id')
+    created_utc = record.get('created_utc')
+    if not title or not post_id or created_utc is None:
+        return None
+    selftext = record.get('selftext') or ''
+    if selftext in REMOVED_TEXT:
+        selftext = ''
+    parents = record.get('crosspost_parent_list') or []
+    if not selftext and parents:
+        # 크로스포스트는 원문 본문을 사용 (실시간 수집과 같은 내용 지문이 되도록)
+        selftext = parents[0].get('selftext') or ''
+    permalink = record.get('permalink') or f"/comments/{post_id}/"
+    return {
+        'id': post_id,
+        'fullname': record.get('name') or f"t3_{post_id}",
+        'title': title,
+        'score': int(record.get('score') or 0),
+        'comments': int(record.get('num_comments') or 0),
+        'url': f"https://reddit.com{permalink}",
+        'created_utc': float(created_utc),
+        'subreddit': record.get('subreddit') or '',
+        'selftext': selftext,
+    }
+
+
+def process_chunk(blob: bytes) -> Dict[str, Any]:
+    """
+    워커 프로세스에서 청크 하나를 파싱, 필터링, 티커 매칭하고 매칭된 포스트만 한 배치로 분석합니다.
+    반환하는 포스트의 selftext 는 저장 길이로 자른 값이고, relevances 는 {티커: 관련도} 입니다.
+    """
+    matcher: TickerMatcher = _worker['matcher']
+    subreddits, since, until = _worker['subreddits'], _worker['since'], _worker['until']
+    stats = {'lines': 0, 'errors': 0, 'posts': 0, 'matched': 0}
+    matched: List[Tuple[Dict[str, Any], Dict[str, float]]] = []
+    for line in blob.splitlines():
+        if not line.strip():
+            continue
+        stats['lines'] += 1
+        try:
+            post = parse_submission(_loads(line))
+        except (ValueError, TypeError, AttributeError):
+            stats['errors'] += 1
+            continue
+        if post is None:
+            continue
+        if subreddits is not None and post['subreddit'].lower() not in subreddits:
+            continue
+        if (since is not None and post['created_utc'] < since) or (until is not None and post['created_utc'] >= until):
+            continue
+        stats['posts'] += 1
+        relevances = matcher.match_post(post)
+        if relevances:
+            matched.append((post, relevances))
+
+    stats['matched'] = len(matched)
+    if matched:
+        scores = _worker['analyzer'].analyze_texts([f"{post['title']} {post['selftext']}" for post, _ in matched])
+        for (post, _), (sentiment, keywords) in zip(matched, scores):
+            post.update(selftext=post['selftext'][:SELFTEXT_CHARS], sentiment=sentiment, keywords=keywords,
+                        analyzer=_worker['analyzer'].name, analysis_status='analyzed')
+    return {**stats, 'results': matched}
+
+
+def open_dump(path: str) -> BinaryIO:
+    """확장자에 따라 압축을 풀며 읽는 바이너리 스트림"""
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError("Reading .zst dumps requires the 'zstandard' package")
+        decompressor = zstandard.ZstdDecompressor(max_window_size=ZSTD_MAX_WINDOW)
+        return io.BufferedReader(decompressor.stream_reader(open(path, 'rb'), closefd=True))
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def read_chunks(stream: BinaryIO, offset: int, chunk_bytes: int) -> Iterator[Tuple[int, bytes]]:
+    """
+    offset(압축 해제 기준 바이트)부터 줄 경계에서 끊은 약 chunk_bytes 크기의 청크를 (끝 오프셋, 청크) 로 반환합니다.
+    압축 스트림은 임의 위치로 이동할 수 없으므로 offset 까지 읽어서 버립니다. (파싱하지 않으므로 처리보다 훨씬 빠름)
+    """
+    if offset:
+        if isinstance(stream, io.BufferedReader) and isinstance(stream.raw, io.FileIO):
+            stream.seek(offset)
+        else:
+            remaining = offset
+            while remaining > 0:
+                skipped = len(stream.read(min(remaining, SKIP_BLOCK_BYTES)))
+                if not skipped:
+                    break
+                remaining -= skipped
+    position = offset
+    while True:
+        blob = stream.read(chunk_bytes)
+        if not blob:
+            return
+        if not blob.endswith(b'\n'):
+            blob += stream.readline()
+        position += len(blob)
+        yield position, blob
+
+
+class BackfillAggregator:
+    """
+    청크 결과를 시간순으로 모아 interval 마다 티커별 집계 스냅샷을 만듭니다.
+    티커 상태는 집계 기간(window) 안의 창 항목과 아직 닫히지 않은 구간의 포스트뿐이므로 덤프 크기와 무관합니다.
+    창 항목에는 sentiment/keywords 를 직접 넣어 두어 기간이 지난 기여분을 빼는 데 posts 조회가 필요 없습니다.
+    """
+
+    def __init__(self, tickers: List[str], window_seconds: int, interval_seconds: int):
+        self.window_seconds = window_seconds
+        self.interval_seconds = interval_seconds
+        self.states: Dict[str, Dict[str, Any]] = {ticker: {'aggregate': {}, 'pending': []} for ticker in tickers}
+        self.bucket_end: Optional[float] = None
+        self.late = 0
+
+    def restore(self, bucket_end: Optional[float], states: Dict[str, Dict[str, Any]]):
+        self.bucket_end = bucket_end
+        for ticker, state in states.items():
+            if ticker in self.states:
+                self.states[ticker] = {'aggregate': state.get('aggregate') or {}, 'pending': state.get('pending') or []}
+
+    def _active(self) -> bool:
+        return any(state['pending'] or state['aggregate'].get('window') for state in self.states.values())
+
+    def close_bucket(self) -> List[Dict[str, Any]]:
+        """현재 구간을 닫고 창이 비어 있지 않은 티커의 스냅샷(구간 끝 시각 기준)을 반환합니다."""
+        end = self.bucket_end
+        snapshots = []
+        for ticker, state in self.states.items():
+            pending = state['pending']
+            if not pending and not state['aggregate'].get('window'):
+                continue
+            aggregate = merge_ticker_aggregate(state['aggregate'], pending, now=end,
+                                               window_seconds=self.window_seconds)
+            aggregate.pop('new_posts', None)
+            analyses = {post['id']: post for post in pending}
+            for entry in aggregate['window']:
+                if 'sentiment' not in entry:
+                    analysis = analyses[entry['id']]
+                    entry['sentiment'] = analysis['sentiment']
+                    entry['keywords'] = analysis['keywords']
+            state['aggregate'], state['pending'] = aggregate, []
+            snapshots.append({
+                'ticker': ticker,
+                'last_updated': datetime.utcfromtimestamp(end),
+                'sentiment': aggregate['sentiment'],
+                'mentions': aggregate['mentions'],
+                'analyzed_mentions': aggregate['analyzed_mentions'],
+                'price_change_24h': None,
+                'key_words': aggregate['key_words'],
+            })
+        self.bucket_end += self.interval_seconds
+        return snapshots
+
+    def add(self, posts: List[Tuple[Dict[str, Any], Dict[str, float]]]) -> List[Dict[str, Any]]:
+        """(포스트, {티커: 관련도}) 를 시간순으로 넣고, 그 사이 닫힌 구간의 스냅샷을 반환합니다."""
+        snapshots: List[Dict[str, Any]] = []
+        for post, relevances in sorted(posts, key=lambda item: item[0]['created_utc']):
+            created = post['created_utc']
+            if self.bucket_end is None:
+                self.bucket_end = (created // self.interval_seconds + 1) * self.interval_seconds
+            while created >= self.bucket_end:
+                if not self._active():
+                    # 언급이 없는 긴 공백은 구간을 하나씩 닫지 않고 건너뜀
+                    self.bucket_end = (created // self.interval_seconds + 1) * self.interval_seconds
+                    break
+                snapshots.extend(self.close_bucket())
+            if created < self.bucket_end - self.interval_seconds:
+                self.late += 1  # 이미 닫힌 구간의 포스트는 현재 구간에 반영 (집계 기간 안이면 창에 들어감)
+            entry = {field: post[field] for field in PENDING_FIELDS}
+            for ticker, relevance in relevances.items():
+                self.states[ticker]['pending'].append({**entry, 'relevance': relevance})
+        return snapshots
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """덤프 끝에서 열린 구간을 닫습니다."""
+        if self.bucket_end is None or not any(state['pending'] for state in self.states.values()):
+            return []
+        return self.close_bucket()
+
+
+class BackfillRunner:
+    """덤프 파일 목록을 프로세스 풀로 처리하고 결과를 순서대로 MongoDB 에 반영합니다."""
+
+    def __init__(self, args: argparse.Namespace, tickers: List[str], db_service=None):
+        self.args = args
+        self.tickers = tickers
+        self.db_service = db_service
+        self.post_store = PostStore(db_service) if db_service is not None else None
+        self.aggregator = BackfillAggregator(tickers, window_seconds=args.window_hours * 3600,
+                                             interval_seconds=args.interval_minutes * 60)
+        self.name = args.name or os.path.basename(args.paths[0])
+        self.file_index = 0
+        self.offset = 0
+        self.totals = {'bytes': 0, 'lines': 0, 'errors': 0, 'posts': 0, 'matched': 0, 'snapshots': 0}
+        # 닫힌 구간의 스냅샷은 체크포인트와 함께 저장 (체크포인트 이후 청크를 다시 처리해도 중복되지 않도록)
+        self.unsaved: List[Dict[str, Any]] = []
+        self._retention_warned = False
+
+    async def restore(self):
+        if self.db_service is None:
+            return
+        if self.args.restart:
+            await self.db_service.delete_backfill_checkpoint(self.name)
+            return
+        checkpoint, states = await self.db_service.get_backfill_checkpoint(self.name)
+        if checkpoint is None:
+            return
+        self.file_index, self.offset = checkpoint['file_index'], checkpoint['offset']
+        self.totals.update(checkpoint.get('totals', {}))
+        self.aggregator.restore(checkpoint.get('bucket_end'), states)
+        logger.info(f"Resuming backfill {self.name} at file {self.file_index} offset {self.offset} "
+                    f"({self.totals['matched']} posts matched so far)")
+
+    async def commit(self, result: Dict[str, Any]):
+        """청크 결과 반영: 포스트 저장(크로스포스트 병합)과 분석 결과 저장, 집계 (닫힌 구간의 스냅샷은 다음 체크포인트에서 저장)"""
+        posts = result['results']
+        if posts and self.post_store is not None:
+            mentions: Dict[str, List[Dict[str, Any]]] = {}
+            for post, relevances in posts:
+                for ticker, relevance in relevances.items():
+                    mentions.setdefault(ticker, []).append({**post, 'relevance': relevance})
+            canonical = await self.post_store.canonicalize(mentions)
+            analyzed = {}
+            for post, _ in posts:
+                post['id'] = canonical[post['id']]
+                analyzed.setdefault(post['id'], post)
+            await self.db_service.save_post_analysis(list(analyzed.values()))
+
+        snapshots = self.aggregator.add(posts)
+        self.unsaved.extend(snapshots)
+        self.totals['snapshots'] += len(snapshots)
+        for key in ('lines', 'errors', 'posts', 'matched'):
+            self.totals[key] += result[key]
+
+    async def save_snapshots(self, snapshots: List[Dict[str, Any]]):
+        if not snapshots:
+            return
+        retention_cutoff = time.time() - self.db_service.history_retention_days * 86400
+        if not self._retention_warned and snapshots[0]['last_updated'].replace(tzinfo=timezone.utc).timestamp() < retention_cutoff:
+            self._retention_warned = True
+            logger.warning(f"Backfilled snapshots are older than HISTORY_RETENTION_DAYS="
+                           f"{self.db_service.history_retention_days} and will be expired by the TTL index")
+        # 히스토리 저장 후 체크포인트 저장 전에 중단되면 다음 실행이 같은 스냅샷을 다시 만드므로 이미 있는 점은 건너뜀
+        await self.db_service.save_history_entries(snapshots, skip_existing=True)
+
+    async def checkpoint(self, completed: bool = False):
+        """모아 둔 스냅샷을 저장한 뒤 오프셋과 집계 상태를 저장합니다."""
+        if self.db_service is None:
+            self.unsaved = []
+            return
+        await self.save_snapshots(self.unsaved)
+        self.unsaved = []
+        await self.db_service.save_backfill_checkpoint(self.name, {
+            'file_index': self.file_index,
+            'offset': self.offset,
+            'file': os.path.basename(self.args.paths[min(self.file_index, len(self.args.paths) - 1)]),
+            'bucket_end': self.aggregator.bucket_end,
+            'totals': self.totals,
+            'completed': completed,
+        }, self.aggregator.states)
+
+    def log_progress(self, started: float):
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        logger.info(f"Backfill {self.name}: file {min(self.file_index + 1, len(self.args.paths))}/{len(self.args.paths)}, "
+                    f"{self.totals['bytes'] / 1e6:.0f} MB, {self.totals['lines']} lines "
+                    f"({self.totals['lines'] / elapsed:.0f}/s), {self.totals['posts']} posts, "
+                    f"{self.totals['matched']} matched, {self.totals['snapshots']} snapshots")
+
+    async def run(self) -> Dict[str, Any]:
+        args = self.args
+        await self.restore()
+        if self.file_index >= len(args.paths):
+            logger.info(f"Backfill {self.name} already completed (use --restart to run it again)")
+            return self.totals
+
+        loop = asyncio.get_running_loop()
+        workers = args.workers or os.cpu_count() or 1
+        # 처리 중인 청크 수 제한 (메모리 = 청크 크기 x 이 값)
+        max_inflight = workers * 2
+        subreddits = None if args.subreddits == 'all' else [s.strip().lower() for s in args.subreddits.split(',')]
+        inflight: Deque[Tuple[int, int, int, asyncio.Future]] = deque()
+        started = last_checkpoint = time.perf_counter()
+        bytes_at_start = self.totals['bytes']
+
+        async def commit_oldest():
+            nonlocal last_checkpoint
+            file_index, end_offset, size, future = inflight.popleft()
+            await self.commit(await future)
+            self.file_index, self.offset = file_index, end_offset
+            self.totals['bytes'] += size
+            if time.perf_counter() - last_checkpoint >= args.checkpoint_seconds:
+                await self.checkpoint()
+                self.log_progress(started)
+                last_checkpoint = time.perf_counter()
+
+        # 워커는 spawn 으로 시작 (MongoDB 클라이언트 스레드가 있는 프로세스를 fork 하지 않도록)
+        with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=_init_worker,
+                                 initargs=(self.tickers, subreddits, args.since, args.until)) as pool:
+            for file_index in range(self.file_index, len(args.paths)):
+                offset = self.offset if file_index == self.file_index else 0
+                with open_dump(args.paths[file_index]) as stream:
+                    previous = offset
+                    for end_offset, blob in read_chunks(stream, offset, args.chunk_mb * 1024 * 1024):
+                        inflight.append((file_index, end_offset, end_offset - previous,
+                                         loop.run_in_executor(pool, process_chunk, blob)))
+                        previous = end_offset
+                        if len(inflight) >= max_inflight:
+                            await commit_oldest()
+                # 다음 파일은 처음부터 (남은 청크가 모두 반영되면 오프셋 0 으로 시작)
+                inflight.append((file_index + 1, 0, 0, _completed(loop, {'lines': 0, 'errors': 0, 'posts': 0,
+                                                                          'matched': 0, 'results': []})))
+            while inflight:
+                await commit_oldest()
+
+        finished = self.aggregator.finish()
+        self.unsaved.extend(finished)
+        self.totals['snapshots'] += len(finished)
+        await self.checkpoint(completed=True)
+        self.log_progress(started)
+        elapsed = time.perf_counter() - started
+        return {**self.totals, 'seconds': round(elapsed, 1),
+                'mb_per_second': round((self.totals['bytes'] - bytes_at_start) / 1e6 / max(elapsed, 1e-9), 2),
+                'late_posts': self.aggregator.late, 'workers': workers}
+
+
+def _completed(loop: asyncio.AbstractEventLoop, value: Any) -> asyncio.Future:
+    future = loop.create_future()
+    future.set_result(value)
+    return future
+
+
+def _timestamp(value: str) -> float:
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Backfill ticker history from Reddit submission dumps",
+        epilog="Matched posts are stored in the posts collection and expire POST_RETENTION_HOURS after the run "
+               "(not after their creation time); only the stock_history snapshots are kept long term."
+    )
+    parser.add_argument('paths', nargs='+', help="JSONL dumps (.zst, .gz or plain), processed in order")
+    parser.add_argument('--name', help="checkpoint name (default: first file name)")
+    parser.add_argument('--tickers', help="comma separated tickers (default: the stored watchlist)")
+    parser.add_argument('--subreddits', default=','.join(SUBREDDITS), help="comma separated, or 'all'")
+    parser.add_argument('--since', type=_timestamp, help="ISO 8601 date/time (UTC if no offset)")
+    parser.add_argument('--until', type=_timestamp, help="ISO 8601 date/time (exclusive)")
+    parser.add_argument('--workers', type=int, default=0, help="parser/analyzer processes (default: CPU count)")
+    parser.add_argument('--chunk-mb', type=int, default=8, help="uncompressed bytes per chunk")
+    parser.add_argument('--interval-minutes', type=int, default=60, help="history snapshot interval")
+    parser.add_argument('--window-hours', type=int, default=int(os.getenv('AGGREGATE_WINDOW_HOURS', '24')),
+                        help="aggregate window of each snapshot")
+    parser.add_argument('--checkpoint-seconds', type=float, default=30.0)
+    parser.add_argument('--restart', action='store_true', help="discard the saved checkpoint and start over")
+    parser.add_argument('--dry-run', action='store_true', help="process without MongoDB (throughput only)")
+    return parser.parse_args(argv)
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    db_service = None
+    if not args.dry_run:
+        from services.database_service import DatabaseService
+        db_service = DatabaseService()
+        await db_service.connect()
+        await db_service.bootstrap()
+    try:
+        if args.tickers:
+            tickers = [ticker.strip().upper() for ticker in args.tickers.split(',') if ticker.strip()]
+        elif db_service is not None:
+            tickers = await db_service.get_watchlist()
+        else:
+            raise SystemExit("--tickers is required with --dry-run")
+        if not tickers:
+            raise SystemExit("no tickers to backfill (pass --tickers or add tickers to the watchlist)")
+        if db_service is not None:
+            logger.warning(f"Backfilled posts expire POST_RETENTION_HOURS={db_service.post_retention_hours} "
+                           f"after this run; only stock_history snapshots are kept long term")
+        return await BackfillRunner(args, sorted(set(tickers)), db_service).run()
+    finally:
+        if db_service is not None:
+            await db_service.disconnect()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    result = asyncio.run(run(parse_args(argv)))
+    print(json.dumps(result, indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
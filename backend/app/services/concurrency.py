@@ -0,0 +1,55 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 외부 의존성별 동시 실행 한도 (환경 변수로 조정)
+_LIMIT_ENV = {
+    "reddit": ("REDDIT_MAX_CONCURRENCY", "4"),
+}
+
+_executor: Optional[ThreadPoolExecutor] = None
+_limiters: Dict[str, asyncio.Semaphore] = {}
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """블로킹 SDK 호출 전용 스레드 풀을 반환합니다. (기본 executor 와 분리)"""
+    global _executor
+    if _executor is None:
+        max_workers = int(os.getenv("BLOCKING_EXECUTOR_WORKERS", "16"))
+        _executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="blocking-io")
+        logger.info(f"Started blocking executor with {max_workers} workers")
+    return _executor
+
+
+def get_limiter(dependency: str) -> asyncio.Semaphore:
+    """의존성 이름별로 프로세스 전체에서 공유되는 세마포어를 반환합니다."""
+    limiter = _limiters.get(dependency)
+    if limiter is None:
+        env_name, default = _LIMIT_ENV.get(dependency, (f"{dependency.upper()}_MAX_CONCURRENCY", "4"))
+        limiter = asyncio.Semaphore(int(os.getenv(env_name, default)))
+        _limiters[dependency] = limiter
+    return limiter
+
+
+async def run_blocking(dependency: str, func: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    블로킹 함수를 전용 스레드 풀에서 실행합니다.
+    의존성별 세마포어로 동시 실행 수를 제한하여 이벤트 루프가 멈추지 않게 합니다.
+    """
+    async with get_limiter(dependency):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(get_executor(), partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """애플리케이션 종료 시 스레드 풀 정리"""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
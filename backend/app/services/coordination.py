@@ -0,0 +1,154 @@
+import asyncio
+import hashlib
+import os
+import socket
+import uuid
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from services.database_service import DatabaseService
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INGESTION_LEASE = 'ingestion'
+
+
+def rendezvous_owner(key: str, nodes: List[str]) -> Optional[str]:
+    """HRW(rendezvous) 해시로 키의 담당 노드를 고릅니다. 노드가 바뀌어도 그 노드의 키만 이동합니다."""
+    if not nodes:
+        return None
+    return max(nodes, key=lambda node: hashlib.md5(f"{node}\x00{key}".encode()).digest())
+
+
+class ClusterCoordinator:
+    """
+    여러 레플리카(uvicorn 워커/컨테이너) 사이의 작업 분배.
+    - 각 노드는 cluster_nodes 컬렉션에 하트비트를 기록하고, 최근 하트비트가 있는 노드를 살아 있는 노드로 봅니다.
+    - 티커는 살아 있는 노드 사이에서 rendezvous 해시로 나누며, 노드가 들어오거나 빠지면 자동으로 재분배됩니다.
+    - 서브레딧 수집은 leases 컬렉션의 만료 시간이 있는 임대를 가진 한 노드(리더)만 수행합니다.
+    시간 비교는 모두 MongoDB 서버 시각($$NOW)으로 하므로 노드 간 시계 차이의 영향을 받지 않습니다.
+    """
+
+    def __init__(self, db_service: DatabaseService, node_id: Optional[str] = None,
+                 lease_seconds: Optional[float] = None, heartbeat_interval: Optional[float] = None):
+        self.db_service = db_service
+        self.node_id = node_id or os.getenv('NODE_ID') or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.lease_seconds = lease_seconds or float(os.getenv('CLUSTER_LEASE_SECONDS', '30'))
+        self.heartbeat_interval = heartbeat_interval or float(os.getenv('CLUSTER_HEARTBEAT_SECONDS', '10'))
+        self.nodes: List[str] = [self.node_id]
+        self.is_leader = False
+        self._listeners: List[Callable[[], Awaitable[None]]] = []
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def lease_ms(self) -> int:
+        return int(self.lease_seconds * 1000)
+
+    @property
+    def nodes_collection(self):
+        return self.db_service.database['cluster_nodes']
+
+    @property
+    def leases_collection(self):
+        return self.db_service.database['leases']
+
+    def add_membership_listener(self, listener: Callable[[], Awaitable[None]]):
+        """살아 있는 노드 목록이 바뀔 때 호출될 콜백 등록 (티커 재분배)"""
+        self._listeners.append(listener)
+
+    def owns(self, key: str) -> bool:
+        return rendezvous_owner(key, self.nodes) == self.node_id
+
+    async def start(self):
+        try:
+            # 하트비트가 끊긴 노드 문서는 임대 기간의 몇 배가 지나면 자동 삭제
+            await self.nodes_collection.create_index('heartbeat_at', expireAfterSeconds=int(self.lease_seconds * 10))
+        except Exception as e:
+            logger.error(f"Error creating cluster_nodes index: {str(e)}")
+        await self.heartbeat()
+        self._task = asyncio.create_task(self._heartbeat_loop())
+        logger.info(f"Joined cluster as {self.node_id} ({len(self.nodes)} nodes)")
+
+    async def stop(self):
+        """하트비트를 멈추고 노드 등록과 임대를 반납하여 다른 노드가 바로 이어받게 합니다."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        try:
+            await self.nodes_collection.delete_one({'_id': self.node_id})
+            await self.leases_collection.delete_many({'owner': self.node_id})
+        except Exception as e:
+            logger.error(f"Error leaving cluster: {str(e)}")
+        self.is_leader = False
+
+    async def heartbeat(self):
+        """하트비트 기록, 살아 있는 노드 목록 갱신, 수집 임대 갱신"""
+        await self.nodes_collection.update_one(
+            {'_id': self.node_id},
+            {'$currentDate': {'heartbeat_at': True}, '$setOnInsert': {'host': socket.gethostname(), 'pid': os.getpid()}},
+            upsert=True
+        )
+        cursor = self.nodes_collection.find(
+            {'$expr': {'$gte': ['$heartbeat_at', {'$subtract': ['$$NOW', self.lease_ms]}]}},
+            {'_id': 1}
+        )
+        nodes = sorted({doc['_id'] async for doc in cursor} | {self.node_id})
+        changed = nodes != self.nodes
+        self.nodes = nodes
+        await self.renew_lease(INGESTION_LEASE)
+
+        if changed:
+            logger.info(f"Cluster membership changed: {len(nodes)} nodes, leader={self.is_leader}")
+            for listener in self._listeners:
+                try:
+                    await listener()
+                except Exception as e:
+                    logger.error(f"Membership listener failed: {str(e)}")
+
+    async def renew_lease(self, name: str) -> bool:
+        """
+        임대를 얻거나 연장합니다. 다른 노드가 유효한 임대를 갖고 있으면 False.
+        임대가 없거나 만료된 경우에만 소유자가 바뀝니다.
+        """
+        try:
+            doc = await self.leases_collection.find_one_and_update(
+                {'_id': name, '$or': [{'owner': self.node_id}, {'$expr': {'$lt': ['$expires_at', '$$NOW']}}]},
+                [{'$set': {'owner': self.node_id, 'expires_at': {'$add': ['$$NOW', self.lease_ms]}}}],
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            acquired = doc is not None and doc['owner'] == self.node_id
+        except DuplicateKeyError:
+            # 다른 노드가 유효한 임대를 보유 중 (조건 불일치로 upsert 가 같은 _id 삽입을 시도)
+            acquired = False
+        except Exception as e:
+            logger.error(f"Error renewing lease {name}: {str(e)}")
+            acquired = False
+
+        if name == INGESTION_LEASE and acquired != self.is_leader:
+            logger.info(f"{'Acquired' if acquired else 'Lost'} {name} lease")
+            self.is_leader = acquired
+        return acquired
+
+    async def _heartbeat_loop(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            try:
+                await self.heartbeat()
+            except Exception as e:
+                # Mongo 에 닿지 못하면 임대가 곧 만료되므로 수집을 멈춤
+                logger.error(f"Cluster heartbeat failed: {str(e)}")
+                self.is_leader = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "node_id": self.node_id,
+            "nodes": len(self.nodes),
+            "leader": self.is_leader,
+        }
@@ -1,7 +1,11 @@
 from motor.motor_asyncio import AsyncIOMotorClient
-from pymongo.errors import ConnectionFailure
+from pymongo import monitoring
+from pymongo.errors import BulkWriteError, CollectionInvalid, DuplicateKeyError, OperationFailure
+import asyncio
 import os
-from typing import List, Dict, Any, Optional
+import time
+from pymongo import ReplaceOne, ReturnDocument, UpdateOne
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import logging
 from models.stock_data import StockData, RedditPost
@@ -9,23 +13,153 @@ from models.stock_data import StockData, RedditPost
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class DatabaseService:
+# 읽기 API 에서 사용하는 필드 프로젝션 (집계 내부 필드 window 등은 제외)
+SUMMARY_FIELDS = ['ticker', 'sentiment', 'mentions', 'analyzed_mentions', 'price_change_24h', 'key_words', 'last_updated']
+SUMMARY_PROJECTION = {'_id': 0, **{field: 1 for field in SUMMARY_FIELDS}}
+FULL_PROJECTION = {**SUMMARY_PROJECTION, 'posts': 1}
+# posts 컬렉션에서 API 응답에 쓰는 필드 (지문, id 목록 등 내부 필드는 제외)
+POST_FIELDS = ['title', 'score', 'comments', 'url', 'created_utc', 'subreddits',
+               'selftext', 'sentiment', 'keywords', 'analyzer', 'analysis_status']
+POST_PROJECTION = {field: 1 for field in POST_FIELDS}
+# 검색 결과에 쓰는 필드 (본문 제외)와 텍스트 인덱스 가중치 (분석 키워드 > 제목 단어)
+SEARCH_FIELDS = ['title', 'url', 'subreddits', 'tickers', 'created_utc', 'score', 'comments', 'sentiment', 'keywords']
+SEARCH_INDEX_WEIGHTS = {'keywords': 5, 'title': 2}
+
+# 이미 있는 인덱스와 옵션/키가 다름 (TTL 보존 기간 변경 등)
+INDEX_CONFLICT_CODES = (85, 86)
+
+class StaleWriteError(Exception):
+    """읽은 뒤 다른 노드가 먼저 티커 문서를 저장하여 쓰기가 거부됨"""
+
+
+class PoolStatsListener(monitoring.ConnectionPoolListener):
+    """커넥션 풀 이벤트를 집계하여 /health 에서 풀 상태를 보여줍니다."""
+
     def __init__(self):
+        self.created = 0
+        self.closed = 0
+        self.checked_out = 0
+        self.checkout_failures = 0
+        self.pools_cleared = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pools_cleared += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "open_connections": self.created - self.closed,
+            "in_use": self.checked_out,
+            "checkout_failures": self.checkout_failures,
+            "pools_cleared": self.pools_cleared,
+        }
+
+
+class DatabaseService:
+    """
+    애플리케이션 전체가 공유하는 MongoDB 클라이언트.
+    FastAPI lifespan 에서 한 번 connect() 하고 종료 시 disconnect() 합니다.
+    """
+
+    def __init__(self, mongodb_url: Optional[str] = None):
+        self.mongodb_url = mongodb_url or os.getenv('MONGODB_URL')
+        self.database_name = os.getenv('MONGODB_DATABASE', 'reddit_stock_monitor')
+        self.max_pool_size = int(os.getenv('MONGODB_MAX_POOL_SIZE', '50'))
+        self.min_pool_size = int(os.getenv('MONGODB_MIN_POOL_SIZE', '0'))
+        self.max_idle_time_ms = int(os.getenv('MONGODB_MAX_IDLE_TIME_MS', '300000'))
+        self.server_selection_timeout_ms = int(os.getenv('MONGODB_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+        self.connect_timeout_ms = int(os.getenv('MONGODB_CONNECT_TIMEOUT_MS', '5000'))
+        self.socket_timeout_ms = int(os.getenv('MONGODB_SOCKET_TIMEOUT_MS', '20000'))
+        self.history_retention_days = int(os.getenv('HISTORY_RETENTION_DAYS', '365'))
+        # 이 기간 동안 갱신되지 않은 티커 문서(감시 목록에서 빠진 티커)와 대기 포스트는 TTL 인덱스로 자동 삭제
+        self.stock_retention_days = int(os.getenv('STOCK_DATA_RETENTION_DAYS', '7'))
+        self.pending_retention_hours = int(os.getenv('PENDING_RETENTION_HOURS', '48'))
+        # 정규화된 포스트는 마지막으로 수집된 뒤 이 시간 동안 보존 (집계 기간보다 길어야 함)
+        self.post_retention_hours = int(os.getenv('POST_RETENTION_HOURS', '48'))
+        # 실시간 언급 카운터 체크포인트는 24시간 링 버퍼이므로 그보다 오래 갱신되지 않으면 의미가 없음
+        self.mention_counter_retention_hours = int(os.getenv('MENTION_COUNTER_RETENTION_HOURS', '48'))
+        self.pool_listener = PoolStatsListener()
+        # save_stock_data 완료 후 호출되는 콜백 (스냅샷 캐시 등)
+        self._write_listeners: List[Callable[[str, Dict[str, Any]], Awaitable[None]]] = []
         self.client: Optional[AsyncIOMotorClient] = None
         self.database = None
         self.stock_collection = None
+        self.checkpoint_collection = None
+        self.history_collection = None
+        self.meta_collection = None
+        self.watchlist_collection = None
+        self.pending_collection = None
+        self.posts_collection = None
+        self.mention_counter_collection = None
+        self.backfill_collection = None
+
+    @property
+    def is_connected(self) -> bool:
+        return self.client is not None
 
     async def connect(self):
-        """MongoDB 연결"""
+        """MongoDB 연결 (이미 연결되어 있으면 기존 풀을 재사용)"""
+        if self.client is not None:
+            return
+        client = None
         try:
-            mongodb_url = os.getenv('MONGODB_URL')
-            self.client = AsyncIOMotorClient(mongodb_url)
-            # 연결 테스트
-            await self.client.admin.command('ping')
-            self.database = self.client['reddit_stock_monitor']
+            client = AsyncIOMotorClient(
+                self.mongodb_url,
+                maxPoolSize=self.max_pool_size,
+                minPoolSize=self.min_pool_size,
+                maxIdleTimeMS=self.max_idle_time_ms,
+                serverSelectionTimeoutMS=self.server_selection_timeout_ms,
+                connectTimeoutMS=self.connect_timeout_ms,
+                socketTimeoutMS=self.socket_timeout_ms,
+                event_listeners=[self.pool_listener],
+            )
+            # 연결 테스트 (시작 시 한 번만 수행)
+            await client.admin.command('ping')
+            self.client = client
+            self.database = self.client[self.database_name]
             self.stock_collection = self.database['stock_data']
-            logger.info("Connected to MongoDB")
-        except ConnectionFailure as e:
+            self.checkpoint_collection = self.database['ingestion_checkpoints']
+            self.history_collection = self.database['stock_history']
+            self.meta_collection = self.database['meta']
+            self.watchlist_collection = self.database['watchlist']
+            self.pending_collection = self.database['pending_mentions']
+            self.posts_collection = self.database['posts']
+            self.mention_counter_collection = self.database['mention_counters']
+            self.backfill_collection = self.database['backfill_state']
+            logger.info(f"Connected to MongoDB (maxPoolSize={self.max_pool_size})")
+        except Exception as e:
+            # 실패한 클라이언트의 모니터 스레드가 남지 않도록 닫음 (시작 시 재시도마다 새로 만듦)
+            if client is not None:
+                client.close()
             logger.error(f"Failed to connect to MongoDB: {e}")
             raise
 
@@ -33,27 +167,284 @@ class DatabaseService:
         """MongoDB 연결 해제"""
         if self.client:
             self.client.close()
+            self.client = None
+            self.database = None
+            self.stock_collection = None
+            self.checkpoint_collection = None
+            self.history_collection = None
+            self.meta_collection = None
+            self.watchlist_collection = None
+            self.pending_collection = None
+            self.posts_collection = None
+            self.mention_counter_collection = None
+            self.backfill_collection = None
             logger.info("Disconnected from MongoDB")
 
-    async def save_stock_data(self, ticker: str, data: Dict[str, Any]):
-        """주식 데이터를 MongoDB에 저장"""
+    async def _ensure_ttl_index(self, collection, field: str, seconds: int):
+        """TTL 인덱스 생성. 보존 기간 설정이 바뀌어 기존 인덱스와 충돌하면 collMod 로 갱신합니다."""
+        try:
+            await collection.create_index(field, expireAfterSeconds=seconds)
+        except OperationFailure as e:
+            if e.code not in INDEX_CONFLICT_CODES:
+                raise
+            await self.database.command(
+                'collMod', collection.name, index={'keyPattern': {field: 1}, 'expireAfterSeconds': seconds}
+            )
+            logger.info(f"Updated TTL of {collection.name}.{field} to {seconds}s")
+
+    async def bootstrap(self):
+        """
+        필요한 컬렉션과 인덱스 생성 (이미 있으면 건너뜀).
+        모든 조회가 인덱스를 타도록 하고, 보존 기간 정리는 TTL 인덱스가 서버에서 수행합니다.
+        컬렉션별 작업은 서로 독립적이므로 동시에 실행하여 시작 시간(왕복 대기)을 줄입니다.
+        """
+        await asyncio.gather(
+            self._bootstrap_history(),
+            self._bootstrap_stock_data(),
+            self._bootstrap_pending(),
+            self._bootstrap_posts(),
+            self._bootstrap_mention_counters(),
+            self._bootstrap_backfill(),
+        )
+
+    async def _bootstrap_history(self):
+        history_ttl = self.history_retention_days * 86400
+        try:
+            # 분석 주기별 스냅샷을 저장하는 시계열 컬렉션 (MongoDB 5.0+)
+            await self.database.create_collection(
+                'stock_history',
+                timeseries={'timeField': 'timestamp', 'metaField': 'ticker', 'granularity': 'hours'},
+                expireAfterSeconds=history_ttl
+            )
+            logger.info("Created stock_history time-series collection")
+        except CollectionInvalid:
+            try:
+                # 보존 기간 설정 변경 반영
+                await self.database.command('collMod', 'stock_history', expireAfterSeconds=history_ttl)
+            except Exception as e:
+                logger.error(f"Error updating stock_history retention: {str(e)}")
+        except Exception as e:
+            logger.error(f"Error creating stock_history collection: {str(e)}")
+
+        try:
+            # 히스토리/최근 스냅샷 조회 (ticker 일치 + timestamp 범위)
+            await self.history_collection.create_index([('ticker', 1), ('timestamp', 1)])
+        except Exception as e:
+            logger.error(f"Error creating stock_history indexes: {str(e)}")
+
+    async def _bootstrap_stock_data(self):
+        try:
+            # 버전 조건부 저장(upsert)이 중복 문서를 만들지 않도록 티커당 문서 하나를 보장 (티커 조회도 이 인덱스 사용)
+            await self.stock_collection.create_index('ticker', unique=True)
+            # 레플리카 스냅샷 캐시의 버전 폴링 (get_stock_data_since)
+            await self.stock_collection.create_index('version')
+            await self._ensure_ttl_index(self.stock_collection, 'last_updated', self.stock_retention_days * 86400)
+        except Exception as e:
+            logger.error(f"Error creating stock_data indexes: {str(e)}")
+
+    async def _bootstrap_pending(self):
+        try:
+            # 티커별 미분석 포스트 버퍼 (같은 포스트는 티커당 한 번만)
+            await self.pending_collection.create_index([('ticker', 1), ('post_id', 1)], unique=True)
+            await self.pending_collection.create_index([('ticker', 1), ('created_utc', 1)])
+            # 오래 분석되지 못한 포스트는 집계 기간을 벗어나므로 버퍼에서 자동 삭제
+            await self._ensure_ttl_index(self.pending_collection, 'buffered_at', self.pending_retention_hours * 3600)
+        except Exception as e:
+            logger.error(f"Error creating pending_mentions indexes: {str(e)}")
+
+    async def _bootstrap_posts(self):
+        try:
+            # 포스트는 내용 지문당 문서 하나 (_id 는 처음 본 Reddit id, 크로스포스트의 id 는 aliases 에 추가됨)
+            await self.posts_collection.create_index('fingerprint', unique=True)
+            await self.posts_collection.create_index('aliases', sparse=True)
+            await self._ensure_ttl_index(self.posts_collection, 'last_seen', self.post_retention_hours * 3600)
+            # 키워드/제목 검색용 역색인 (포스트 저장과 분석 결과 저장 시 서버가 증분 갱신)
+            await self.posts_collection.create_index(
+                [(field, 'text') for field in SEARCH_INDEX_WEIGHTS],
+                weights=SEARCH_INDEX_WEIGHTS, default_language='english', name='post_search'
+            )
+            # 기간별(티커별) 키워드 추이 집계
+            await self.posts_collection.create_index([('created_utc', -1)])
+            await self.posts_collection.create_index([('tickers', 1), ('created_utc', -1)])
+        except Exception as e:
+            logger.error(f"Error creating posts indexes: {str(e)}")
+
+    async def _bootstrap_mention_counters(self):
+        try:
+            # 감시 목록에서 빠진 티커의 카운터 체크포인트는 자동 삭제
+            await self._ensure_ttl_index(self.mention_counter_collection, 'updated_at',
+                                         self.mention_counter_retention_hours * 3600)
+        except Exception as e:
+            logger.error(f"Error creating mention_counters indexes: {str(e)}")
+
+    async def _bootstrap_backfill(self):
+        try:
+            # 덤프 파일별 백필 집계 상태 (재개 시 한 번에 읽음)
+            await self.backfill_collection.create_index('source')
+        except Exception as e:
+            logger.error(f"Error creating backfill_state indexes: {str(e)}")
+
+    async def health_check(self) -> Dict[str, Any]:
+        """ping 지연 시간과 커넥션 풀 상태를 반환합니다."""
+        pool = {
+            "max_pool_size": self.max_pool_size,
+            "min_pool_size": self.min_pool_size,
+            **self.pool_listener.snapshot(),
+        }
+        if self.client is None:
+            return {"status": "disconnected", "pool": pool}
         try:
-            # 마지막 업데이트 시간 추가
+            started = time.perf_counter()
+            await self.client.admin.command('ping')
+            latency_ms = round((time.perf_counter() - started) * 1000, 2)
+            return {"status": "ok", "ping_ms": latency_ms, "pool": pool}
+        except Exception as e:
+            logger.error(f"MongoDB health check failed: {str(e)}")
+            return {"status": "error", "error": str(e), "pool": pool}
+
+    def add_write_listener(self, listener: Callable[[str, Dict[str, Any]], Awaitable[None]]):
+        """주식 데이터가 저장될 때마다 (ticker, 저장된 문서) 로 호출될 콜백 등록"""
+        self._write_listeners.append(listener)
+
+    async def get_data_version(self) -> int:
+        """모든 레플리카가 공유하는 stock_data 버전 카운터 조회"""
+        doc = await self.meta_collection.find_one({'_id': 'stock_data_version'})
+        return doc['version'] if doc else 0
+
+    async def _next_data_version(self, count: int = 1) -> int:
+        """버전 count 개를 예약하고 마지막 값을 반환합니다. (예약 범위: 반환값 - count + 1 ~ 반환값)"""
+        doc = await self.meta_collection.find_one_and_update(
+            {'_id': 'stock_data_version'},
+            {'$inc': {'version': count}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc['version']
+
+    async def save_stock_data(self, ticker: str, data: Dict[str, Any], expected_version: Optional[int] = None):
+        """
+        주식 데이터를 MongoDB에 저장.
+        expected_version 이 주어지면 문서 버전이 그 값일 때만 저장하고 (0 은 문서 없음),
+        그 사이 다른 노드가 저장했으면 StaleWriteError 를 발생시킵니다.
+        """
+        try:
+            # 마지막 업데이트 시간과 공유 버전 추가 (다른 레플리카의 캐시 무효화에 사용)
             data['last_updated'] = datetime.utcnow()
             data['ticker'] = ticker.upper()
+            data['version'] = await self._next_data_version()
 
-            # upsert: 존재하면 업데이트, 없으면 삽입
-            result = await self.stock_collection.replace_one(
-                {'ticker': ticker.upper()},
-                data,
-                upsert=True
-            )
+            # upsert: 존재하면 업데이트, 없으면 삽입 (버전이 다르면 고유 인덱스에 걸려 거부)
+            try:
+                result = await self.stock_collection.replace_one(
+                    self._version_query(ticker, expected_version), data, upsert=True
+                )
+            except DuplicateKeyError:
+                raise StaleWriteError(f"{ticker} was updated by another writer (expected version {expected_version})")
             logger.info(f"Saved data for {ticker}: {result.modified_count if result.modified_count > 0 else 'inserted'}")
+
+            # 이번 주기의 스냅샷을 시계열 컬렉션에 추가
+            await self.history_collection.insert_one(self._history_entry(data))
+            await self._notify_write_listeners([data])
             return result
+        except StaleWriteError:
+            raise
         except Exception as e:
             logger.error(f"Error saving stock data for {ticker}: {str(e)}")
             raise
 
+    async def save_stock_data_many(self, writes: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        여러 티커의 데이터를 한 번에 저장합니다. writes 는 {'ticker', 'data', 'expected_version'} 목록입니다.
+        버전 예약 1회, 순서 없는 bulk_write 1회, 히스토리 insert_many 1회로 티커 수와 무관하게 왕복 횟수가 일정합니다.
+        거부된 티커를 {ticker: 사유} 로 반환합니다. ('stale' 은 다른 노드가 먼저 저장한 경우)
+        """
+        if not writes:
+            return {}
+        try:
+            last_version = await self._next_data_version(len(writes))
+            now = datetime.utcnow()
+            operations = []
+            for offset, write in enumerate(writes):
+                ticker = write['ticker'].upper()
+                data = write['data']
+                data['last_updated'] = now
+                data['ticker'] = ticker
+                data['version'] = last_version - len(writes) + 1 + offset
+                operations.append(ReplaceOne(self._version_query(ticker, write.get('expected_version')), data, upsert=True))
+
+            rejected: Dict[str, str] = {}
+            try:
+                await self.stock_collection.bulk_write(operations, ordered=False)
+            except BulkWriteError as e:
+                if e.details.get('writeConcernErrors'):
+                    raise
+                for error in e.details.get('writeErrors', []):
+                    ticker = writes[error['index']]['ticker'].upper()
+                    rejected[ticker] = 'stale' if error.get('code') == 11000 else error.get('errmsg', 'write error')
+
+            saved = [write['data'] for write in writes if write['ticker'].upper() not in rejected]
+            if saved:
+                await self.history_collection.insert_many([self._history_entry(data) for data in saved], ordered=False)
+                await self._notify_write_listeners(saved)
+            logger.info(f"Saved data for {len(saved)} tickers in one bulk write ({len(rejected)} rejected)")
+            return rejected
+        except Exception as e:
+            logger.error(f"Error saving stock data for {len(writes)} tickers: {str(e)}")
+            raise
+
+    @staticmethod
+    def _version_query(ticker: str, expected_version: Optional[int]) -> Dict[str, Any]:
+        """expected_version 이 주어지면 그 버전일 때만 일치하는 조건 (0 은 문서 없음)"""
+        query: Dict[str, Any] = {'ticker': ticker.upper()}
+        if expected_version is not None:
+            query['version'] = {'$in': [None, 0]} if expected_version == 0 else expected_version
+        return query
+
+    @staticmethod
+    def _history_entry(data: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            'timestamp': data['last_updated'],
+            'ticker': data['ticker'],
+            'sentiment': data.get('sentiment'),
+            'mentions': data.get('mentions', 0),
+            'analyzed_mentions': data.get('analyzed_mentions', 0),
+            'price_change_24h': data.get('price_change_24h'),
+            'key_words': data.get('key_words', [])
+        }
+
+    async def _notify_write_listeners(self, docs: List[Dict[str, Any]]):
+        for data in docs:
+            for listener in self._write_listeners:
+                try:
+                    await listener(data['ticker'], data)
+                except Exception as e:
+                    logger.error(f"Write listener failed for {data['ticker']}: {str(e)}")
+
+    async def save_history_entries(self, snapshots: List[Dict[str, Any]], skip_existing: bool = False) -> int:
+        """
+        티커 집계 스냅샷({ticker, last_updated, sentiment, mentions, ...})을 stock_history 에만 한 번에 추가합니다.
+        (stock_data 와 스냅샷 캐시는 건드리지 않으므로 백필처럼 과거 시점의 스냅샷을 채울 때 사용)
+        skip_existing 이면 같은 (ticker, 시각) 항목이 이미 있는 스냅샷은 건너뜁니다. 시계열 컬렉션에는 고유 인덱스를
+        만들 수 없으므로, 다시 실행해도 중복 점이 생기지 않도록 (ticker, timestamp) 인덱스로 먼저 조회합니다.
+        저장한 항목 수를 반환합니다.
+        """
+        entries = [self._history_entry(data) for data in snapshots]
+        try:
+            if entries and skip_existing:
+                cursor = self.history_collection.find({
+                    'ticker': {'$in': sorted({entry['ticker'] for entry in entries})},
+                    'timestamp': {'$gte': min(entry['timestamp'] for entry in entries),
+                                  '$lte': max(entry['timestamp'] for entry in entries)},
+                }, {'_id': 0, 'ticker': 1, 'timestamp': 1})
+                existing = {(doc['ticker'], doc['timestamp']) async for doc in cursor}
+                entries = [entry for entry in entries if (entry['ticker'], entry['timestamp']) not in existing]
+            if entries:
+                await self.history_collection.insert_many(entries, ordered=False)
+            return len(entries)
+        except Exception as e:
+            logger.error(f"Error saving {len(snapshots)} history entries: {str(e)}")
+            raise
+
     async def get_stock_data(self, ticker: str) -> Optional[Dict[str, Any]]:
         """특정 주식 데이터를 조회"""
         try:
@@ -63,39 +454,461 @@ class DatabaseService:
             logger.error(f"Error retrieving stock data for {ticker}: {str(e)}")
             raise
 
-    async def get_all_stock_data(self) -> List[Dict[str, Any]]:
-        """모든 주식 데이터를 조회"""
+    async def get_all_stock_data(self, projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """모든 주식 데이터를 조회 (projection 으로 필요한 필드만 가져옴)"""
         try:
-            cursor = self.stock_collection.find({})
+            cursor = self.stock_collection.find({}, projection)
             data = await cursor.to_list(length=None)
             return data
         except Exception as e:
             logger.error(f"Error retrieving all stock data: {str(e)}")
             raise
 
-    async def delete_old_data(self, days: int = 7):
-        """지정된 일수보다 오래된 데이터를 삭제"""
+    async def get_stock_data_since(self, version: int, projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        """주어진 버전 이후에 저장된 주식 데이터만 조회"""
         try:
-            cutoff_date = datetime.utcnow() - timedelta(days=days)
-            result = await self.stock_collection.delete_many(
-                {'last_updated': {'$lt': cutoff_date}}
-            )
-            logger.info(f"Deleted {result.deleted_count} old records")
-            return result.deleted_count
+            cursor = self.stock_collection.find({'version': {'$gt': version}}, projection)
+            return await cursor.to_list(length=None)
         except Exception as e:
-            logger.error(f"Error deleting old data: {str(e)}")
+            logger.error(f"Error retrieving stock data since version {version}: {str(e)}")
             raise
 
     async def get_recent_mentions(self, ticker: str, hours: int = 24) -> List[Dict[str, Any]]:
-        """최근 N시간 내의 멘션 데이터를 조회"""
+        """최근 N시간 내의 스냅샷을 시간순으로 조회"""
         try:
             cutoff_time = datetime.utcnow() - timedelta(hours=hours)
-            cursor = self.stock_collection.find({
-                'ticker': ticker.upper(),
-                'last_updated': {'$gte': cutoff_time}
-            })
+            cursor = self.history_collection.find(
+                {'ticker': ticker.upper(), 'timestamp': {'$gte': cutoff_time}},
+                {'_id': 0}
+            ).sort('timestamp', 1)
             data = await cursor.to_list(length=None)
             return data
         except Exception as e:
             logger.error(f"Error retrieving recent mentions for {ticker}: {str(e)}")
-            raise
\ No newline at end of file
+            raise
+
+    async def get_ingestion_checkpoints(self) -> Dict[str, Dict[str, Any]]:
+        """서브레딧별 마지막 수집 포스트(high-water mark)를 조회"""
+        try:
+            cursor = self.checkpoint_collection.find({})
+            return {doc['_id']: doc async for doc in cursor}
+        except Exception as e:
+            logger.error(f"Error retrieving ingestion checkpoints: {str(e)}")
+            raise
+
+    async def save_ingestion_checkpoint(self, subreddit: str, fullname: str, created_utc: float):
+        """서브레딧의 high-water mark 저장 (더 오래된 값으로 되돌리지 않음)"""
+        try:
+            await self.checkpoint_collection.update_one(
+                {'_id': subreddit, 'created_utc': {'$not': {'$gt': created_utc}}},
+                {'$set': {'fullname': fullname, 'created_utc': created_utc, 'updated_at': datetime.utcnow()}},
+                upsert=True
+            )
+        except DuplicateKeyError:
+            # 이미 더 새로운 체크포인트가 있음
+            pass
+        except Exception as e:
+            logger.error(f"Error saving ingestion checkpoint for {subreddit}: {str(e)}")
+            raise
+
+    async def get_history(self, ticker: str, start: datetime, end: datetime,
+                          unit: str, bin_size: int) -> List[Dict[str, Any]]:
+        """
+        스냅샷을 unit/bin_size 구간으로 다운샘플링하여 반환합니다.
+        집계는 서버(MongoDB)에서 수행되므로 응답 크기는 구간 수에만 비례합니다.
+        """
+        pipeline = [
+            {'$match': {'ticker': ticker.upper(), 'timestamp': {'$gte': start, '$lt': end}}},
+            {'$group': {
+                '_id': {'$dateTrunc': {'date': '$timestamp', 'unit': unit, 'binSize': bin_size}},
+                'sentiment': {'$avg': '$sentiment'},
+                'sentiment_min': {'$min': '$sentiment'},
+                'sentiment_max': {'$max': '$sentiment'},
+                'mentions': {'$avg': '$mentions'},
+                'mentions_max': {'$max': '$mentions'},
+                'price_change_24h': {'$avg': '$price_change_24h'},
+                'samples': {'$sum': 1}
+            }},
+            {'$sort': {'_id': 1}},
+            {'$project': {
+                '_id': 0,
+                'timestamp': '$_id',
+                'sentiment': {'$round': ['$sentiment', 3]},
+                'sentiment_min': 1,
+                'sentiment_max': 1,
+                'mentions': {'$round': ['$mentions', 1]},
+                'mentions_max': 1,
+                'price_change_24h': {'$round': ['$price_change_24h', 2]},
+                'samples': 1
+            }}
+        ]
+        try:
+            cursor = self.history_collection.aggregate(pipeline)
+            return await cursor.to_list(length=None)
+        except Exception as e:
+            logger.error(f"Error retrieving history for {ticker}: {str(e)}")
+            raise
+
+    async def get_watchlist(self) -> List[str]:
+        """감시 목록 티커 조회"""
+        try:
+            cursor = self.watchlist_collection.find({}, {'_id': 1})
+            return [doc['_id'] async for doc in cursor]
+        except Exception as e:
+            logger.error(f"Error retrieving watchlist: {str(e)}")
+            raise
+
+    async def seed_watchlist(self, tickers: List[str]):
+        """감시 목록이 비어 있으면 기본 티커로 채웁니다."""
+        try:
+            if await self.watchlist_collection.count_documents({}, limit=1):
+                return
+            now = datetime.utcnow()
+            await self.watchlist_collection.bulk_write([
+                UpdateOne({'_id': ticker.upper()}, {'$setOnInsert': {'added_at': now, 'source': 'default'}}, upsert=True)
+                for ticker in tickers
+            ], ordered=False)
+            logger.info(f"Seeded watchlist with {len(tickers)} tickers")
+        except Exception as e:
+            logger.error(f"Error seeding watchlist: {str(e)}")
+            raise
+
+    async def add_watchlist_ticker(self, ticker: str, source: str = 'manual') -> bool:
+        """감시 목록에 티커 추가. 새로 추가되었으면 True"""
+        try:
+            result = await self.watchlist_collection.update_one(
+                {'_id': ticker.upper()},
+                {'$setOnInsert': {'added_at': datetime.utcnow(), 'source': source}},
+                upsert=True
+            )
+            return result.upserted_id is not None
+        except Exception as e:
+            logger.error(f"Error adding {ticker} to watchlist: {str(e)}")
+            raise
+
+    async def count_watchlist(self, source: Optional[str] = None) -> int:
+        """감시 목록 티커 수 (source 를 주면 그 경로로 추가된 티커만)"""
+        try:
+            return await self.watchlist_collection.count_documents({'source': source} if source else {})
+        except Exception as e:
+            logger.error(f"Error counting watchlist: {str(e)}")
+            raise
+
+    async def remove_watchlist_ticker(self, ticker: str) -> bool:
+        """감시 목록에서 티커 제거. 제거되었으면 True"""
+        try:
+            result = await self.watchlist_collection.delete_one({'_id': ticker.upper()})
+            await self.pending_collection.delete_many({'ticker': ticker.upper()})
+            return result.deleted_count > 0
+        except Exception as e:
+            logger.error(f"Error removing {ticker} from watchlist: {str(e)}")
+            raise
+
+    async def add_pending_mentions(self, mentions: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+        """
+        티커별로 매칭된 새 포스트 참조({id, created_utc, relevance})를 분석 대기 버퍼에 추가합니다.
+        포스트 본문은 posts 컬렉션에 있습니다. 이미 있는 (ticker, post_id) 는 건너뛰며, 티커별 새로 추가된 수를 반환합니다.
+        """
+        operations, tickers = [], []
+        buffered_at = datetime.utcnow()
+        for ticker, refs in mentions.items():
+            for ref in refs:
+                operations.append(UpdateOne(
+                    {'ticker': ticker, 'post_id': ref['id']},
+                    {'$setOnInsert': {'created_utc': ref['created_utc'], 'relevance': ref['relevance'],
+                                      'buffered_at': buffered_at}},
+                    upsert=True
+                ))
+                tickers.append(ticker)
+        if not operations:
+            return {}
+        try:
+            result = await self.pending_collection.bulk_write(operations, ordered=False)
+            added: Dict[str, int] = {}
+            for index in result.upserted_ids:
+                added[tickers[index]] = added.get(tickers[index], 0) + 1
+            return added
+        except Exception as e:
+            logger.error(f"Error buffering pending mentions: {str(e)}")
+            raise
+
+    async def get_pending_mentions(self, ticker: str, limit: int) -> List[Dict[str, Any]]:
+        """티커의 분석 대기 포스트 참조를 오래된 순으로 조회"""
+        try:
+            cursor = self.pending_collection.find({'ticker': ticker.upper()}).sort('created_utc', 1).limit(limit)
+            return [
+                {'id': doc['post_id'], 'created_utc': doc['created_utc'], 'relevance': doc.get('relevance', 1.0)}
+                async for doc in cursor
+            ]
+        except Exception as e:
+            logger.error(f"Error retrieving pending mentions for {ticker}: {str(e)}")
+            raise
+
+    async def delete_pending_mentions(self, ticker: str, post_ids: List[str]):
+        """집계에 반영된 대기 포스트 삭제"""
+        try:
+            await self.pending_collection.delete_many({'ticker': ticker.upper(), 'post_id': {'$in': post_ids}})
+        except Exception as e:
+            logger.error(f"Error deleting pending mentions for {ticker}: {str(e)}")
+            raise
+
+    async def upsert_posts(self, posts: List[Dict[str, Any]]) -> Dict[str, str]:
+        """
+        포스트를 posts 컬렉션에 정규화하여 저장하고 {Reddit id: 대표 포스트 id} 를 반환합니다.
+        posts 의 각 항목은 fingerprint 와 tickers 를 가집니다. 같은 Reddit id 나 같은 내용 지문의 문서가 있으면
+        새로 만들지 않고 크로스포스트 id(aliases)/서브레딧/티커 목록과 점수만 갱신하며, 분석 결과는 그대로 둡니다.
+        """
+        if not posts:
+            return {}
+        try:
+            try:
+                return await self._upsert_posts(posts)
+            except BulkWriteError as e:
+                # 다른 노드가 같은 포스트를 동시에 처음 저장함 → 다시 조회하면 그 문서에 합쳐짐
+                if e.details.get('writeConcernErrors') or any(
+                        error.get('code') != 11000 for error in e.details.get('writeErrors', [])):
+                    raise
+                return await self._upsert_posts(posts)
+        except Exception as e:
+            logger.error(f"Error saving {len(posts)} posts: {str(e)}")
+            raise
+
+    async def _upsert_posts(self, posts: List[Dict[str, Any]]) -> Dict[str, str]:
+        post_ids = [post['id'] for post in posts]
+        by_id: Dict[str, str] = {}
+        by_fingerprint: Dict[str, str] = {}
+        cursor = self.posts_collection.find(
+            {'$or': [{'_id': {'$in': post_ids}}, {'aliases': {'$in': post_ids}},
+                     {'fingerprint': {'$in': [post['fingerprint'] for post in posts]}}]},
+            {'aliases': 1, 'fingerprint': 1}
+        )
+        async for doc in cursor:
+            by_fingerprint[doc['fingerprint']] = doc['_id']
+            by_id.update({post_id: doc['_id'] for post_id in [doc['_id'], *doc.get('aliases', [])]})
+
+        # 같은 배치 안의 크로스포스트도 대표 문서 하나로 합쳐 한 번에 갱신
+        canonical: Dict[str, str] = {}
+        merged: Dict[str, Dict[str, Any]] = {}
+        for post in posts:
+            target = by_id.get(post['id']) or by_fingerprint.setdefault(post['fingerprint'], post['id'])
+            canonical[post['id']] = target
+            entry = merged.get(target)
+            if entry is None:
+                entry = merged[target] = {**post, 'aliases': [], 'subreddits': [], 'tickers': []}
+            if post['id'] != target and post['id'] not in entry['aliases']:
+                entry['aliases'].append(post['id'])
+            if post['subreddit'] not in entry['subreddits']:
+                entry['subreddits'].append(post['subreddit'])
+            entry['tickers'] = sorted(set(entry['tickers']) | set(post['tickers']))
+            entry['score'] = max(entry['score'], post['score'])
+            entry['comments'] = max(entry['comments'], post['comments'])
+
+        now = datetime.utcnow()
+        operations = []
+        for target, entry in merged.items():
+            add_to_set = {
+                'subreddits': {'$each': entry['subreddits']},
+                'tickers': {'$each': entry['tickers']},
+            }
+            if entry['aliases']:
+                add_to_set['aliases'] = {'$each': entry['aliases']}
+            operations.append(UpdateOne(
+                {'_id': target},
+                {
+                    '$setOnInsert': {
+                        'fingerprint': entry['fingerprint'],
+                        'title': entry['title'],
+                        'url': entry['url'],
+                        'selftext': entry.get('selftext', ''),
+                        'created_utc': entry['created_utc'],
+                        'sentiment': None,
+                        'keywords': [],
+                        'analysis_status': 'pending',
+                    },
+                    '$addToSet': add_to_set,
+                    '$max': {'score': entry['score'], 'comments': entry['comments']},
+                    '$set': {'last_seen': now},
+                },
+                upsert=True
+            ))
+        await self.posts_collection.bulk_write(operations, ordered=False)
+        return canonical
+
+    async def get_posts(self, post_ids: List[str]) -> List[Dict[str, Any]]:
+        """대표 포스트 id 로 포스트를 조회합니다. (없는 id 는 결과에서 빠짐)"""
+        if not post_ids:
+            return []
+        try:
+            cursor = self.posts_collection.find({'_id': {'$in': post_ids}}, POST_PROJECTION)
+            # subreddit 은 처음 수집된 서브레딧 (subreddits 의 첫 항목)
+            return [{'id': doc.pop('_id'), 'subreddit': doc['subreddits'][0], **doc} async for doc in cursor]
+        except Exception as e:
+            logger.error(f"Error retrieving {len(post_ids)} posts: {str(e)}")
+            raise
+
+    async def search_posts(self, query: str, ticker: Optional[str] = None, since: Optional[float] = None,
+                           offset: int = 0, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        분석된 포스트를 키워드/제목 텍스트 인덱스로 검색합니다. (텍스트 점수, 최신순)
+        query 는 MongoDB $text 문법 ("short squeeze" 는 구문, -word 는 제외)을 따릅니다.
+        """
+        match: Dict[str, Any] = {'$text': {'$search': query}, 'analysis_status': 'analyzed'}
+        if ticker:
+            match['tickers'] = ticker.upper()
+        if since is not None:
+            match['created_utc'] = {'$gte': since}
+        projection = {**{field: 1 for field in SEARCH_FIELDS}, 'text_score': {'$meta': 'textScore'}}
+        try:
+            cursor = self.posts_collection.find(match, projection).sort(
+                [('text_score', {'$meta': 'textScore'}), ('created_utc', -1)]
+            ).skip(offset).limit(limit)
+            return [{'id': doc.pop('_id'), **doc} async for doc in cursor]
+        except Exception as e:
+            logger.error(f"Error searching posts for '{query}': {str(e)}")
+            raise
+
+    async def get_keyword_trends(self, since: float, until: float, ticker: Optional[str] = None,
+                                 query: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        [since, until) 구간에 분석된 포스트의 키워드별 언급 수, 평균 감정, 언급한 티커 목록과
+        바로 앞 같은 길이 구간의 언급 수(previous_mentions)를 한 번의 집계로 계산합니다.
+        """
+        previous_start = since - (until - since)
+        match: Dict[str, Any] = {'analysis_status': 'analyzed', 'created_utc': {'$gte': previous_start, '$lt': until}}
+        if query:
+            match['$text'] = {'$search': query}
+        if ticker:
+            match['tickers'] = ticker.upper()
+        pipeline = [
+            {'$match': match},
+            {'$project': {'keywords': 1, 'tickers': 1, 'sentiment': 1,
+                          'current': {'$gte': ['$created_utc', since]}}},
+            {'$unwind': '$keywords'},
+            {'$group': {
+                '_id': {'$toLower': '$keywords'},
+                'mentions': {'$sum': {'$cond': ['$current', 1, 0]}},
+                'previous_mentions': {'$sum': {'$cond': ['$current', 0, 1]}},
+                'sentiment': {'$avg': {'$cond': ['$current', '$sentiment', None]}},
+                'tickers': {'$addToSet': {'$cond': ['$current', '$tickers', '$$REMOVE']}},
+            }},
+            {'$match': {'mentions': {'$gt': 0}}},
+            {'$sort': {'mentions': -1, '_id': 1}},
+            {'$limit': limit},
+            {'$project': {
+                '_id': 0, 'keyword': '$_id', 'mentions': 1, 'previous_mentions': 1,
+                'sentiment': {'$round': ['$sentiment', 3]},
+                'tickers': {'$reduce': {'input': '$tickers', 'initialValue': [],
+                                        'in': {'$setUnion': ['$$value', '$$this']}}},
+            }},
+        ]
+        try:
+            cursor = self.posts_collection.aggregate(pipeline)
+            return await cursor.to_list(length=None)
+        except Exception as e:
+            logger.error(f"Error aggregating keyword trends: {str(e)}")
+            raise
+
+    async def save_post_analysis(self, posts: List[Dict[str, Any]]):
+        """포스트 분석 결과 저장. 이미 분석된 포스트는 덮어쓰지 않습니다. (먼저 저장한 결과가 유지됨)"""
+        if not posts:
+            return
+        analyzed_at = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {'_id': post['id'], 'analysis_status': {'$ne': 'analyzed'}},
+                {'$set': {'sentiment': post['sentiment'], 'keywords': post.get('keywords', []),
+                          'analyzer': post.get('analyzer'), 'analysis_status': 'analyzed',
+                          'analyzed_at': analyzed_at}}
+            )
+            for post in posts
+        ]
+        try:
+            await self.posts_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error saving analysis of {len(posts)} posts: {str(e)}")
+            raise
+
+    async def get_backfill_checkpoint(self, source: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Dict[str, Any]]]:
+        """덤프 파일 백필의 체크포인트(바이트 오프셋 등)와 티커별 집계 상태 {ticker: 상태} 조회"""
+        try:
+            checkpoint = await self.checkpoint_collection.find_one({'_id': f"backfill:{source}"})
+            cursor = self.backfill_collection.find({'source': source}, {'_id': 0, 'source': 0, 'updated_at': 0})
+            states = {doc.pop('ticker'): doc async for doc in cursor}
+            return checkpoint, states
+        except Exception as e:
+            logger.error(f"Error retrieving backfill checkpoint for {source}: {str(e)}")
+            raise
+
+    async def save_backfill_checkpoint(self, source: str, checkpoint: Dict[str, Any],
+                                       states: Dict[str, Dict[str, Any]]):
+        """티커별 집계 상태를 bulk write 로 저장한 뒤 체크포인트를 전진합니다. (상태 저장이 실패하면 오프셋은 그대로)"""
+        updated_at = datetime.utcnow()
+        try:
+            if states:
+                await self.backfill_collection.bulk_write([
+                    ReplaceOne(
+                        {'_id': f"{source}:{ticker}"},
+                        {'source': source, 'ticker': ticker, **state, 'updated_at': updated_at},
+                        upsert=True
+                    )
+                    for ticker, state in states.items()
+                ], ordered=False)
+            await self.checkpoint_collection.replace_one(
+                {'_id': f"backfill:{source}"}, {**checkpoint, 'updated_at': updated_at}, upsert=True
+            )
+        except Exception as e:
+            logger.error(f"Error saving backfill checkpoint for {source}: {str(e)}")
+            raise
+
+    async def delete_backfill_checkpoint(self, source: str):
+        """백필을 처음부터 다시 하도록 체크포인트와 집계 상태 삭제"""
+        try:
+            await self.backfill_collection.delete_many({'source': source})
+            await self.checkpoint_collection.delete_one({'_id': f"backfill:{source}"})
+        except Exception as e:
+            logger.error(f"Error deleting backfill checkpoint for {source}: {str(e)}")
+            raise
+
+    async def save_mention_counters(self, checkpoints: Dict[str, Dict[str, Any]]):
+        """티커별 분 단위 언급 카운터 체크포인트({head, counts 바이트})를 한 번의 bulk write 로 저장"""
+        if not checkpoints:
+            return
+        updated_at = datetime.utcnow()
+        operations = [
+            ReplaceOne(
+                {'_id': ticker},
+                {'head': checkpoint['head'], 'counts': checkpoint['counts'], 'updated_at': updated_at},
+                upsert=True
+            )
+            for ticker, checkpoint in checkpoints.items()
+        ]
+        try:
+            await self.mention_counter_collection.bulk_write(operations, ordered=False)
+        except Exception as e:
+            logger.error(f"Error saving mention counters for {len(checkpoints)} tickers: {str(e)}")
+            raise
+
+    async def save_trending_snapshot(self, snapshot: Dict[str, Any]):
+        """수집 노드가 계산한 급상승 심볼 후보 목록 저장 (다른 노드와 API 전용 서버가 그대로 응답)"""
+        try:
+            await self.meta_collection.replace_one({'_id': 'trending'}, snapshot, upsert=True)
+        except Exception as e:
+            logger.error(f"Error saving trending snapshot: {str(e)}")
+            raise
+
+    async def get_trending_snapshot(self) -> Optional[Dict[str, Any]]:
+        """저장된 급상승 심볼 후보 목록 조회 (없으면 None)"""
+        try:
+            return await self.meta_collection.find_one({'_id': 'trending'}, {'_id': 0})
+        except Exception as e:
+            logger.error(f"Error retrieving trending snapshot: {str(e)}")
+            raise
+
+    async def get_mention_counters(self) -> Dict[str, Dict[str, Any]]:
+        """저장된 티커별 언급 카운터 체크포인트 조회"""
+        try:
+            cursor = self.mention_counter_collection.find({}, {'head': 1, 'counts': 1})
+            return {doc['_id']: {'head': doc['head'], 'counts': doc['counts']} async for doc in cursor}
+        except Exception as e:
+            logger.error(f"Error retrieving mention counters: {str(e)}")
+            raise
@@ -0,0 +1,151 @@
+import asyncio
+import os
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import logging
+from services.metrics import STAGE_SECONDS, span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = 'queued', 'running', 'succeeded', 'failed'
+
+
+class Job:
+    """비동기 분석 작업 하나의 상태"""
+
+    def __init__(self, kind: str, target: str, func: Callable[[], Awaitable[Any]]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.target = target
+        self.func = func
+        self.state = QUEUED
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # 같은 대상을 요청해 이 작업에 합류한 요청 수 (최초 요청 포함)
+        self.requests = 1
+
+    @property
+    def key(self) -> str:
+        return f"{self.kind}:{self.target}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "target": self.target,
+            "state": self.state,
+            "requests": self.requests,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+class JobService:
+    """
+    분석 요청을 HTTP 요청 밖에서 실행하는 작업 큐.
+    - 같은 대상(kind, target)의 대기/실행 중 작업이 있으면 새 작업을 만들지 않고 합류 (single-flight)
+    - 큐 길이와 워커 수를 제한하여 요청이 몰려도 파이프라인 동시 실행 수가 일정
+    - 끝난 작업은 JOB_RETENTION_SECONDS 동안 조회 가능
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 retention_seconds: Optional[float] = None, max_retained: int = 1000):
+        self.workers = workers or int(os.getenv('JOB_WORKERS', '4'))
+        self.max_queue = max_queue or int(os.getenv('JOB_QUEUE_SIZE', '100'))
+        self.retention_seconds = retention_seconds or float(os.getenv('JOB_RETENTION_SECONDS', '3600'))
+        self.max_retained = max_retained
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._inflight: Dict[str, Job] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self.deduplicated = 0
+
+    async def start(self):
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_queue)
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+        logger.info(f"Started job service with {self.workers} workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit(self, kind: str, target: str, func: Callable[[], Awaitable[Any]]) -> Job:
+        """
+        작업을 등록하고 반환합니다. 같은 대상의 작업이 이미 대기/실행 중이면 그 작업을 반환합니다.
+        큐가 가득 차면 OverflowError 를 발생시킵니다.
+        """
+        if self._queue is None:
+            raise RuntimeError("job service is not started")
+
+        existing = self._inflight.get(f"{kind}:{target}")
+        if existing is not None:
+            existing.requests += 1
+            self.deduplicated += 1
+            return existing
+
+        job = Job(kind, target, func)
+        try:
+            self._queue.put_nowait(job)
+        except asyncio.QueueFull:
+            raise OverflowError("job queue is full")
+
+        self._prune()
+        self.jobs[job.id] = job
+        self._inflight[job.key] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        """보존 기간이 지났거나 보존 개수를 넘은 완료 작업 제거 (오래된 순)"""
+        cutoff = time.time() - self.retention_seconds
+        for job_id in list(self.jobs):
+            job = self.jobs[job_id]
+            if len(self.jobs) < self.max_retained and (job.finished_at is None or job.finished_at >= cutoff):
+                break
+            if job.finished_at is not None:
+                del self.jobs[job_id]
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            job.state = RUNNING
+            job.started_at = time.time()
+            STAGE_SECONDS.observe(job.started_at - job.created_at, stage=f"job_{job.kind}_queued")
+            try:
+                with span(f"job_{job.kind}"):
+                    job.result = await job.func()
+                job.state = SUCCEEDED
+            except asyncio.CancelledError:
+                job.state, job.error = FAILED, "cancelled"
+                raise
+            except Exception as e:
+                logger.error(f"Job {job.key} ({job.id}) failed: {str(e)}")
+                job.state, job.error = FAILED, str(e)
+            finally:
+                job.finished_at = time.time()
+                self._inflight.pop(job.key, None)
+                self._queue.task_done()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "workers": len(self._tasks),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "inflight": len(self._inflight),
+            "retained": len(self.jobs),
+            "deduplicated": self.deduplicated,
+        }
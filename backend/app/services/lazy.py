@@ -0,0 +1,43 @@
+import time
+from typing import Any, Callable, Dict, Generic, Optional, TypeVar
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+
+class Lazy(Generic[T]):
+    """
+    처음 사용할 때 factory 로 객체를 만드는 지연 생성 슬롯.
+    무거운 모듈(aiohttp, numpy 등)을 import 하거나 자격 증명이 필요한 클라이언트를 서버 시작 시점이 아닌
+    첫 호출 시점으로 미뤄, 그 기능을 쓰지 않는 프로세스(API 전용 모드 등)는 비용을 치르지 않게 합니다.
+    이벤트 루프 안에서만 사용하므로 잠금은 없습니다.
+    """
+
+    def __init__(self, factory: Callable[[], T], name: str):
+        self.factory = factory
+        self.name = name
+        self._value: Optional[T] = None
+        self.construct_seconds: Optional[float] = None
+
+    @property
+    def created(self) -> bool:
+        return self._value is not None
+
+    def get(self) -> T:
+        if self._value is None:
+            started = time.perf_counter()
+            self._value = self.factory()
+            self.construct_seconds = time.perf_counter() - started
+            logger.info(f"Constructed {self.name} in {self.construct_seconds * 1000:.0f}ms")
+        return self._value
+
+    def peek(self) -> Optional[T]:
+        """만들어져 있으면 객체를, 아니면 None 을 반환합니다. (만들지 않음)"""
+        return self._value
+
+    def stats(self) -> Dict[str, Any]:
+        """만들어진 뒤에만 객체의 stats() 를 반환 (지표 수집이 객체를 만들지 않도록)"""
+        return self._value.stats() if self._value is not None else {}
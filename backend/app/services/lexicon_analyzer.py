@@ -0,0 +1,152 @@
+import re
+from typing import Any, Dict, List, Tuple
+import logging
+import numpy as np
+from services.analyzer_service import BaseAnalyzer
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 금융/Reddit 용어 감정 사전 (-1 ~ 1)
+FINANCE_LEXICON = {
+    # 긍정
+    "bull": 0.6, "bullish": 0.8, "buy": 0.4, "buying": 0.4, "calls": 0.5, "long": 0.3,
+    "moon": 0.8, "mooning": 0.9, "rally": 0.6, "rallying": 0.6, "breakout": 0.6, "beat": 0.5,
+    "beats": 0.5, "upgrade": 0.6, "upgraded": 0.6, "outperform": 0.6, "strong": 0.4,
+    "growth": 0.4, "profit": 0.5, "profitable": 0.5, "gain": 0.5, "gains": 0.5, "green": 0.4,
+    "soar": 0.7, "soaring": 0.7, "surge": 0.6, "surging": 0.6, "squeeze": 0.4, "undervalued": 0.5,
+    "tendies": 0.6, "rocket": 0.7, "winning": 0.5, "record": 0.3, "good": 0.3, "great": 0.5,
+    "love": 0.4, "hold": 0.2, "hodl": 0.4, "diamond": 0.3, "dividend": 0.3, "recovery": 0.4,
+    # 부정
+    "bear": -0.6, "bearish": -0.8, "sell": -0.4, "selling": -0.4, "puts": -0.5, "short": -0.3,
+    "crash": -0.9, "crashing": -0.9, "dump": -0.7, "dumping": -0.7, "tank": -0.7, "tanking": -0.7,
+    "miss": -0.5, "missed": -0.5, "downgrade": -0.6, "downgraded": -0.6, "underperform": -0.6,
+    "weak": -0.4, "loss": -0.5, "losses": -0.5, "red": -0.4, "plunge": -0.8, "plunging": -0.8,
+    "drop": -0.4, "dropping": -0.4, "overvalued": -0.5, "bagholder": -0.6, "bagholding": -0.6,
+    "rug": -0.6, "scam": -0.8, "fraud": -0.9, "bankruptcy": -0.9, "bankrupt": -0.9,
+    "recession": -0.6, "layoffs": -0.5, "lawsuit": -0.5, "bad": -0.4, "terrible": -0.7,
+    "fear": -0.4, "panic": -0.6, "worthless": -0.8, "guh": -0.6, "rekt": -0.7, "bubble": -0.4,
+    # 이모지
+    "🚀": 0.8, "🌙": 0.5, "💎": 0.4, "🙌": 0.3, "📈": 0.6, "🐂": 0.5, "🔥": 0.3, "🟢": 0.3,
+    "💰": 0.4, "🤑": 0.5, "📉": -0.6, "🐻": -0.5, "💀": -0.4, "🩸": -0.5, "🤡": -0.4,
+    "🔴": -0.3, "😭": -0.3, "🌈": -0.2,
+}
+
+NEGATIONS = frozenset({
+    "not", "no", "never", "dont", "don't", "isnt", "isn't", "cant", "can't", "wont", "won't",
+    "didnt", "didn't", "doesnt", "doesn't", "without", "hardly",
+})
+
+STOPWORDS = frozenset("""
+a about above after again against all also am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further had has
+have having he her here hers him his how i if in into is it its itself just me more most my no nor
+not now of off on once only or other our ours out over own same she should so some such than that
+the their theirs them then there these they this those through to too under until up very was we
+were what when where which while who whom why will with would you your yours im ive dont thats its
+get got going like know think really people one today still much even make time back want day
+https http www com reddit amp
+""".split())
+
+_TOKEN_RE = re.compile(r"[a-z][a-z']+|[\U0001F300-\U0001FAFF☀-➿]")
+
+
+class LexiconAnalyzer(BaseAnalyzer):
+    """
+    외부 API 없이 동작하는 로컬 분석기.
+    감정 점수는 금융/이모지 사전 기반, 키워드는 배치 내 TF-IDF 이며
+    배치 전체를 NumPy 배열 연산으로 한 번에 계산합니다.
+    """
+
+    name = "local"
+
+    def __init__(self, max_keywords: int = 5, negation_window: int = 2, alpha: float = 2.0):
+        self.max_keywords = max_keywords
+        self.negation_window = negation_window
+        # 합산 점수를 -1 ~ 1 로 정규화할 때 쓰는 상수 (VADER 방식)
+        self.alpha = alpha
+
+    @staticmethod
+    def tokenize(text: str) -> List[str]:
+        return _TOKEN_RE.findall(text.lower())
+
+    def _encode(self, texts: List[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+        """배치의 모든 토큰을 (문서 번호, 어휘 번호) 평탄 배열로 변환합니다."""
+        vocabulary: Dict[str, int] = {}
+        doc_ids: List[int] = []
+        term_ids: List[int] = []
+        for doc_index, text in enumerate(texts):
+            tokens = self.tokenize(text)
+            doc_ids.extend([doc_index] * len(tokens))
+            term_ids.extend(vocabulary.setdefault(token, len(vocabulary)) for token in tokens)
+        terms = list(vocabulary)
+        return np.asarray(doc_ids, dtype=np.int64), np.asarray(term_ids, dtype=np.int64), terms
+
+    def score_sentiment(self, doc_ids: np.ndarray, term_ids: np.ndarray, terms: List[str], n_docs: int) -> np.ndarray:
+        weights_by_term = np.array([FINANCE_LEXICON.get(term, 0.0) for term in terms], dtype=np.float64)
+        is_negation = np.array([term in NEGATIONS for term in terms], dtype=bool)
+
+        weights = weights_by_term[term_ids] if len(term_ids) else np.zeros(0)
+        negated = is_negation[term_ids] if len(term_ids) else np.zeros(0, dtype=bool)
+
+        # 부정어 뒤 negation_window 토큰 안의 감정어는 부호를 뒤집음 (같은 문서 안에서만)
+        flip = np.zeros(len(weights), dtype=bool)
+        for shift in range(1, self.negation_window + 1):
+            if len(weights) > shift:
+                flip[shift:] |= negated[:-shift] & (doc_ids[shift:] == doc_ids[:-shift])
+        weights = np.where(flip, -weights, weights)
+
+        totals = np.bincount(doc_ids, weights=weights, minlength=n_docs)
+        return np.round(totals / np.sqrt(totals * totals + self.alpha), 3)
+
+    def extract_keywords(self, doc_ids: np.ndarray, term_ids: np.ndarray, terms: List[str], n_docs: int) -> List[List[str]]:
+        keywords: List[List[str]] = [[] for _ in range(n_docs)]
+        if not len(term_ids):
+            return keywords
+
+        candidate = np.array(
+            [len(term) > 2 and term not in STOPWORDS and term.isalpha() for term in terms], dtype=bool
+        )
+        mask = candidate[term_ids]
+        doc_ids, term_ids = doc_ids[mask], term_ids[mask]
+        if not len(term_ids):
+            return keywords
+
+        vocab_size = len(terms)
+        pairs, counts = np.unique(doc_ids * vocab_size + term_ids, return_counts=True)
+        pair_docs, pair_terms = pairs // vocab_size, pairs % vocab_size
+
+        doc_lengths = np.bincount(pair_docs, weights=counts, minlength=n_docs)
+        document_frequency = np.bincount(pair_terms, minlength=vocab_size)
+        idf = np.log((1 + n_docs) / (1 + document_frequency)) + 1.0
+        scores = counts / doc_lengths[pair_docs] * idf[pair_terms]
+
+        # 문서별 점수 내림차순 정렬 후 상위 max_keywords 개만 선택
+        order = np.lexsort((-scores, pair_docs))
+        sorted_docs = pair_docs[order]
+        group_start = np.searchsorted(sorted_docs, sorted_docs, side='left')
+        rank = np.arange(len(order)) - group_start
+        selected = order[rank < self.max_keywords]
+
+        for doc_index, term_index in zip(pair_docs[selected].tolist(), pair_terms[selected].tolist()):
+            keywords[doc_index].append(terms[term_index])
+        return keywords
+
+    def analyze_texts(self, texts: List[str]) -> List[Tuple[float, List[str]]]:
+        """텍스트 목록의 (감정 점수, 키워드) 를 반환합니다."""
+        doc_ids, term_ids, terms = self._encode(texts)
+        sentiments = self.score_sentiment(doc_ids, term_ids, terms, len(texts))
+        keywords = self.extract_keywords(doc_ids, term_ids, terms, len(texts))
+        return list(zip(sentiments.tolist(), keywords))
+
+    async def analyze_posts_batch(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        texts = [f"{post['title']} {post.get('selftext', '')}" for post in posts]
+        analyzed_posts = []
+        for post, (sentiment, keywords) in zip(posts, self.analyze_texts(texts)):
+            analyzed_post = post.copy()
+            analyzed_post['sentiment'] = sentiment
+            analyzed_post['keywords'] = keywords
+            analyzed_post['analyzer'] = self.name
+            analyzed_post['analysis_status'] = 'analyzed'
+            analyzed_posts.append(analyzed_post)
+        return analyzed_posts
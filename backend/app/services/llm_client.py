@@ -0,0 +1,151 @@
+import asyncio
+import os
+import random
+import time
+from typing import Any, Dict, List, Optional
+import logging
+import aiohttp
+from services.rate_limiter import TokenBucket
+from services.metrics import record_call
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class LLMUnavailableError(Exception):
+    """재시도와 마감 시간을 모두 소진하여 응답을 얻지 못한 경우"""
+
+
+class AsyncLLMClient:
+    """
+    OpenAI 호환 Chat Completions 비동기 클라이언트.
+    - 분당 요청 수(RPM)와 분당 토큰 수(TPM) 토큰 버킷
+    - 지터가 적용된 지수 백오프 재시도 (Retry-After 헤더 우선)
+    - 요청별 마감 시간과 동시 요청 수 상한
+    OPENAI_API_BASE 를 바꾸면 로컬 가짜 서버로도 동작합니다.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 requests_per_minute: Optional[float] = None, tokens_per_minute: Optional[float] = None,
+                 max_in_flight: Optional[int] = None, max_retries: Optional[int] = None,
+                 request_timeout: Optional[float] = None, deadline: Optional[float] = None,
+                 base_backoff: float = 0.5, max_backoff: float = 20.0):
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = (base_url or os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')).rstrip('/')
+        self.request_bucket = TokenBucket(requests_per_minute or float(os.getenv('OPENAI_RPM_LIMIT', '500')))
+        self.token_bucket = TokenBucket(tokens_per_minute or float(os.getenv('OPENAI_TPM_LIMIT', '90000')))
+        self.max_in_flight = max_in_flight or int(os.getenv('OPENAI_MAX_CONCURRENCY', '8'))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv('OPENAI_MAX_RETRIES', '4'))
+        self.request_timeout = request_timeout or float(os.getenv('OPENAI_REQUEST_TIMEOUT', '30'))
+        self.deadline = deadline or float(os.getenv('OPENAI_REQUEST_DEADLINE', '90'))
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._semaphore = asyncio.Semaphore(self.max_in_flight)
+        self._session: Optional[aiohttp.ClientSession] = None
+
+        self.requests = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.failures = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                headers={"Authorization": f"Bearer {self.api_key}"},
+                timeout=aiohttp.ClientTimeout(total=self.request_timeout)
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+
+    def _backoff(self, attempt: int, retry_after: Optional[float]) -> float:
+        """Full jitter 지수 백오프. 서버가 Retry-After 를 주면 그 이상 대기합니다."""
+        delay = random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    @staticmethod
+    def _retry_after(response: aiohttp.ClientResponse) -> Optional[float]:
+        value = response.headers.get('Retry-After')
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    async def chat_completion(self, messages: List[Dict[str, str]], model: str,
+                              max_tokens: int, temperature: float = 0.3,
+                              estimated_prompt_tokens: int = 0) -> str:
+        """
+        Chat Completion 응답 본문을 반환합니다.
+        마감 시간 안에 성공하지 못하면 LLMUnavailableError 를 발생시킵니다.
+        """
+        payload = {"model": model, "messages": messages, "max_tokens": max_tokens, "temperature": temperature}
+        reserved_tokens = estimated_prompt_tokens + max_tokens
+        started = time.monotonic()
+        last_error = "unknown error"
+
+        for attempt in range(self.max_retries + 1):
+            remaining = self.deadline - (time.monotonic() - started)
+            if remaining <= 0:
+                break
+            retry_after = None
+            try:
+                await asyncio.wait_for(self._acquire(reserved_tokens), timeout=remaining)
+                async with self._semaphore:
+                    self.requests += 1
+                    async with self._get_session().post(f"{self.base_url}/chat/completions", json=payload) as response:
+                        if response.status == 200:
+                            data = await response.json()
+                            self._reconcile(data, reserved_tokens)
+                            record_call('openai')
+                            return data['choices'][0]['message']['content'].strip()
+
+                        last_error = f"HTTP {response.status}"
+                        if response.status == 429:
+                            self.rate_limited += 1
+                        record_call('openai', 'rate_limited' if response.status == 429 else 'http_error')
+                        if response.status not in RETRYABLE_STATUS:
+                            break
+                        retry_after = self._retry_after(response)
+            except asyncio.TimeoutError:
+                last_error = "timeout"
+                record_call('openai', 'timeout')
+            except aiohttp.ClientError as e:
+                last_error = str(e) or e.__class__.__name__
+                record_call('openai', 'connection_error')
+
+            if attempt == self.max_retries:
+                break
+            delay = self._backoff(attempt, retry_after)
+            if time.monotonic() - started + delay >= self.deadline:
+                break
+            self.retries += 1
+            logger.warning(f"LLM request failed ({last_error}), retrying in {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+        self.failures += 1
+        record_call('openai', 'unavailable')
+        raise LLMUnavailableError(f"LLM request failed after {attempt + 1} attempts: {last_error}")
+
+    async def _acquire(self, tokens: int):
+        await self.request_bucket.acquire(1)
+        await self.token_bucket.acquire(tokens)
+
+    def _reconcile(self, data: Dict[str, Any], reserved_tokens: int):
+        """응답의 실제 토큰 사용량으로 TPM 버킷을 보정합니다."""
+        used = (data.get('usage') or {}).get('total_tokens')
+        if used is not None:
+            self.token_bucket.adjust(used - reserved_tokens)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+            "failures": self.failures,
+        }
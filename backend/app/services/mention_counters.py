@@ -0,0 +1,189 @@
+import sys
+import time
+from array import array
+from typing import Any, Dict, Iterable, List, Optional
+
+# 분 단위 링 버퍼 크기 (24시간)와 조회하는 구간(분)
+RING_MINUTES = 24 * 60
+WINDOWS = {'5m': 5, '1h': 60, '24h': RING_MINUTES}
+ACCELERATION_MINUTES = 5
+
+
+def current_minute(now: Optional[float] = None) -> int:
+    return int((now if now is not None else time.time()) // 60)
+
+
+class MinuteRing:
+    """
+    티커 하나의 분 단위 언급 수 링 버퍼.
+    분 m 의 값은 counts[m % size] 에 있고, head 는 마지막으로 전진한 분입니다.
+    head 를 전진할 때 지나간 칸만 0 으로 비우므로 이벤트 기록은 O(1)(최대 size 칸 정리는 분마다 한 번),
+    구간 조회는 O(구간 길이) 입니다.
+    """
+    __slots__ = ('counts', 'head', 'dirty')
+
+    def __init__(self, size: int = RING_MINUTES, head: int = 0, counts: Optional[array] = None):
+        self.counts = counts if counts is not None else array('I', [0]) * size
+        self.head = head
+        self.dirty = False
+
+    @property
+    def size(self) -> int:
+        return len(self.counts)
+
+    def advance(self, minute: int):
+        if minute <= self.head:
+            return
+        size = self.size
+        if minute - self.head >= size:
+            self.counts = array('I', [0]) * size
+        else:
+            for m in range(self.head + 1, minute + 1):
+                self.counts[m % size] = 0
+        self.head = minute
+
+    def add(self, minute: int, count: int = 1) -> bool:
+        """분 minute 에 언급을 더합니다. 링보다 오래된 이벤트는 버리고 False 를 반환합니다."""
+        self.advance(minute)
+        if minute <= self.head - self.size:
+            return False
+        self.counts[minute % self.size] += count
+        self.dirty = True
+        return True
+
+    def total(self, minutes: int, end: Optional[int] = None) -> int:
+        """end 분(포함)까지 최근 minutes 분의 합. (현재 분은 진행 중이므로 일부만 포함됨)"""
+        end = self.head if end is None else end
+        start = max(end - minutes + 1, self.head - self.size + 1)
+        return sum(self.counts[m % self.size] for m in range(start, end + 1))
+
+    def series(self, minutes: int) -> List[int]:
+        """최근 minutes 분의 분별 언급 수 (오래된 순)"""
+        return [self.counts[m % self.size] for m in range(self.head - minutes + 1, self.head + 1)]
+
+
+class MentionCounters:
+    """
+    티커별 분 단위 언급 카운터 (실시간 스트림 수집용).
+    티커당 RING_MINUTES 칸의 고정 크기 배열(약 6KB)만 쓰므로 메모리는 티커 수에 비례하며,
+    기록(스트림 폴링)과 조회(API)는 모두 이벤트 루프에서 일어나므로 잠금이 없습니다.
+    체크포인트는 티커별 {head, counts 바이트} 로 내보내고 재시작 시 그대로 복원합니다.
+    """
+
+    def __init__(self, size: int = RING_MINUTES):
+        self.size = size
+        self._rings: Dict[str, MinuteRing] = {}
+        self.events = 0
+        self.dropped = 0
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    def record(self, tickers: Iterable[str], created_utc: float, now: Optional[float] = None):
+        """이벤트 하나(포스트/댓글)에서 언급된 티커들의 카운터를 올립니다. 미래 시각은 현재 분으로 자릅니다."""
+        now_minute = current_minute(now)
+        minute = min(current_minute(created_utc), now_minute)
+        self.events += 1
+        for ticker in tickers:
+            ring = self._rings.get(ticker)
+            if ring is None:
+                ring = self._rings[ticker] = MinuteRing(self.size, head=now_minute)
+            if not ring.add(minute):
+                self.dropped += 1
+
+    def _rates(self, ring: MinuteRing) -> Dict[str, Any]:
+        # 각 구간의 언급 수와 시간당 언급 속도, 가속도(최근 5분 속도 - 그 전 5분 속도, 시간당)
+        result: Dict[str, Any] = {}
+        for label, minutes in WINDOWS.items():
+            count = ring.total(minutes)
+            result[f'mentions_{label}'] = count
+            result[f'rate_{label}'] = round(count * 60 / minutes, 2)
+        previous = ring.total(ACCELERATION_MINUTES, end=ring.head - ACCELERATION_MINUTES)
+        result['acceleration'] = round((result['mentions_5m'] - previous) * 60 / ACCELERATION_MINUTES, 2)
+        return result
+
+    def snapshot(self, ticker: str, now: Optional[float] = None, series_minutes: int = 0) -> Optional[Dict[str, Any]]:
+        """티커의 5m/1h/24h 언급 수와 속도, 가속도. (기록된 적 없으면 None)"""
+        ring = self._rings.get(ticker)
+        if ring is None:
+            return None
+        ring.advance(current_minute(now))
+        result = {'ticker': ticker, **self._rates(ring)}
+        if series_minutes:
+            result['series'] = ring.series(min(series_minutes, ring.size))
+        return result
+
+    def snapshot_all(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        minute = current_minute(now)
+        results = []
+        for ticker, ring in self._rings.items():
+            ring.advance(minute)
+            results.append({'ticker': ticker, **self._rates(ring)})
+        return results
+
+    def spiking(self, min_mentions: int, factor: float, now: Optional[float] = None) -> List[str]:
+        """최근 5분 언급이 min_mentions 이상이고 속도가 24시간 평균의 factor 배 이상인 티커"""
+        minute = current_minute(now)
+        spikes = []
+        for ticker, ring in self._rings.items():
+            ring.advance(minute)
+            recent = ring.total(WINDOWS['5m'])
+            if recent < min_mentions:
+                continue
+            baseline = ring.total(WINDOWS['24h']) * WINDOWS['5m'] / WINDOWS['24h']
+            if recent >= factor * max(baseline, 1.0):
+                spikes.append(ticker)
+        return spikes
+
+    def retain(self, tickers: Iterable[str]):
+        """감시 목록에서 빠진 티커의 카운터를 버립니다."""
+        keep = set(tickers)
+        for ticker in [ticker for ticker in self._rings if ticker not in keep]:
+            del self._rings[ticker]
+
+    def export(self, dirty_only: bool = True) -> Dict[str, Dict[str, Any]]:
+        """체크포인트용 {ticker: {head, counts(bytes, little-endian uint32)}}. 내보낸 티커는 dirty 해제"""
+        exported = {}
+        for ticker, ring in self._rings.items():
+            if dirty_only and not ring.dirty:
+                continue
+            counts = array('I', ring.counts)
+            if sys.byteorder == 'big':
+                counts.byteswap()
+            exported[ticker] = {'head': ring.head, 'counts': counts.tobytes()}
+            ring.dirty = False
+        return exported
+
+    def mark_dirty(self, tickers: Iterable[str]):
+        """체크포인트 저장에 실패한 티커를 다음 저장에 다시 포함합니다."""
+        for ticker in tickers:
+            if ticker in self._rings:
+                self._rings[ticker].dirty = True
+
+    def restore(self, checkpoints: Dict[str, Dict[str, Any]], replace: bool = False):
+        """
+        체크포인트에서 카운터를 복원합니다. 크기가 다른(설정이 바뀐) 체크포인트는 무시합니다.
+        replace 이면 체크포인트에 없는 티커를 지우고 전체를 교체합니다. (스트림을 받지 않는 노드의 읽기 전용 사본)
+        """
+        rings = {}
+        for ticker, checkpoint in checkpoints.items():
+            counts = array('I')
+            raw = bytes(checkpoint['counts'])
+            if len(raw) != self.size * counts.itemsize:
+                continue
+            counts.frombytes(raw)
+            if sys.byteorder == 'big':
+                counts.byteswap()
+            rings[ticker] = MinuteRing(self.size, head=int(checkpoint['head']), counts=counts)
+        if replace:
+            self._rings = rings
+        else:
+            self._rings.update(rings)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tickers": len(self._rings),
+            "events": self.events,
+            "dropped_old": self.dropped,
+            "memory_bytes": sum(ring.counts.itemsize * len(ring.counts) for ring in self._rings.values()),
+        }
@@ -0,0 +1,205 @@
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import logging
+from services.mention_counters import MentionCounters
+from services.trending import TrendingDiscovery
+from services.metrics import span
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STREAM_KINDS = ['submissions', 'comments']
+# 한 번에 읽는 최신 항목 수 (Reddit 목록 API 최대값)와 중복 확인용으로 기억하는 최근 항목 수
+FETCH_LIMIT = 100
+SEEN_LIMIT = 1000
+
+
+class MentionStream:
+    """
+    감시 서브레딧 전체의 새 포스트와 댓글을 계속 읽어 티커별 분 단위 언급 카운터(MentionCounters)를 올리는 소비자.
+    - 수집 임대를 가진 노드만 MENTION_STREAM_POLL_SECONDS 마다 종류별 최신 FETCH_LIMIT 개를 읽고
+      (Reddit 호출은 스케줄러의 프로세스 전체 예산을 함께 씀), 이미 센 항목은 high-water mark 와 최근 id 로 건너뜀
+    - MENTION_CHECKPOINT_SECONDS 마다 변경된 카운터와 high-water mark 를 MongoDB 에 저장하여 재시작 후 이어서 셈
+    - 다른 노드는 같은 주기로 체크포인트를 읽어 읽기 전용 사본을 유지 (API 는 어느 노드에서나 응답)
+    - 언급이 급증한 티커는 스케줄러에 알려 다음 분석을 앞당김 (노드마다 자기가 담당하는 티커만)
+    - 읽은 모든 텍스트는 감시 목록 밖의 급증 심볼을 찾는 TrendingDiscovery 에도 전달 (후보 목록도 같은 주기로 저장/복사)
+    - scheduler 가 없으면(API 전용 모드) 스트림을 읽지 않고 항상 체크포인트 사본으로 동작
+    """
+
+    def __init__(self, db_service, scheduler=None, counters: Optional[MentionCounters] = None,
+                 discovery: Optional[TrendingDiscovery] = None):
+        self.db_service = db_service
+        self.scheduler = scheduler
+        self.counters = counters or MentionCounters()
+        self.discovery = discovery or TrendingDiscovery(scheduler)
+        self.enabled = os.getenv('MENTION_STREAM_ENABLED', 'true').lower() == 'true'
+        self.kinds = [kind.strip() for kind in os.getenv('MENTION_STREAM_KINDS', ','.join(STREAM_KINDS)).split(',')
+                      if kind.strip() in STREAM_KINDS]
+        self.poll_interval = float(os.getenv('MENTION_STREAM_POLL_SECONDS', '5'))
+        self.checkpoint_interval = float(os.getenv('MENTION_CHECKPOINT_SECONDS', '60'))
+        self.spike_min_mentions = int(os.getenv('MENTION_SPIKE_MIN_MENTIONS', '10'))
+        self.spike_factor = float(os.getenv('MENTION_SPIKE_FACTOR', '4'))
+        self.spike_cooldown = float(os.getenv('MENTION_SPIKE_COOLDOWN_SECONDS', '900'))
+        # 종류별 마지막으로 센 항목 {fullname, created_utc} 와 같은 초에 생긴 항목 구분용 최근 id
+        self._high_water: Dict[str, Dict[str, Any]] = {}
+        self._seen: Dict[str, "OrderedDict[str, None]"] = {kind: OrderedDict() for kind in STREAM_KINDS}
+        self._last_spike: Dict[str, float] = {}
+        self._tasks: List[asyncio.Task] = []
+        self.is_running = False
+        # 이 노드가 스트림을 읽는 중 (False 면 카운터는 체크포인트에서 읽은 사본)
+        self.live = False
+        self.polls = 0
+        self.errors = 0
+        self.gaps = 0
+        self.spikes = 0
+        self.last_checkpoint: Optional[float] = None
+
+    def _is_new(self, kind: str, item: Dict[str, Any]) -> bool:
+        high_water = self._high_water.get(kind)
+        if high_water is None or item['created_utc'] > high_water['created_utc']:
+            return True
+        return item['created_utc'] == high_water['created_utc'] and item['fullname'] not in self._seen[kind] \
+            and item['fullname'] != high_water['fullname']
+
+    async def poll_once(self, kind: str) -> int:
+        """종류 하나의 최신 항목을 읽어 새 항목의 언급을 셉니다. 센 항목 수를 반환합니다."""
+        await self.scheduler.reddit_budget.acquire(1)
+        with span("mention_stream_fetch"):
+            items = await self.scheduler.reddit_service.fetch_latest_async(kind, FETCH_LIMIT)
+        self.polls += 1
+        fresh = [item for item in items if self._is_new(kind, item)]
+        if not fresh:
+            return 0
+        # 읽은 목록이 모두 새 항목이면 그 사이에 FETCH_LIMIT 개보다 많이 생겨 일부를 놓쳤을 수 있음
+        if len(fresh) == len(items) and kind in self._high_water:
+            self.gaps += 1
+            logger.warning(f"Mention stream ({kind}) may have skipped items; consider a shorter poll interval")
+
+        matcher = self.scheduler.matcher
+        seen = self._seen[kind]
+        for item in reversed(fresh):  # 오래된 순으로 기록
+            tickers = matcher.match(item['text'])
+            if tickers:
+                self.counters.record(tickers, item['created_utc'])
+            self.discovery.observe(item['text'])
+            seen[item['fullname']] = None
+            while len(seen) > SEEN_LIMIT:
+                seen.popitem(last=False)
+        newest = max(fresh, key=lambda item: item['created_utc'])
+        high_water = self._high_water.get(kind)
+        if high_water is None or newest['created_utc'] >= high_water['created_utc']:
+            self._high_water[kind] = {'fullname': newest['fullname'], 'created_utc': newest['created_utc']}
+        return len(fresh)
+
+    async def _poll_loop(self, kind: str):
+        while self.is_running:
+            if self.live:
+                try:
+                    await self.poll_once(kind)
+                except Exception as e:
+                    self.errors += 1
+                    logger.error(f"Error polling mention stream ({kind}): {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _go_live(self):
+        """수집 임대를 얻었을 때 저장된 카운터와 high-water mark 에서 이어서 셉니다."""
+        self.counters.restore(await self.db_service.get_mention_counters(), replace=True)
+        checkpoints = await self.db_service.get_ingestion_checkpoints()
+        for kind in self.kinds:
+            checkpoint = checkpoints.get(f"stream:{kind}")
+            if checkpoint is not None:
+                self._high_water[kind] = {'fullname': checkpoint['fullname'], 'created_utc': checkpoint['created_utc']}
+            self._seen[kind].clear()
+        self.live = True
+        logger.info(f"Mention stream live ({', '.join(self.kinds)}, {len(self.counters)} tickers restored)")
+
+    async def checkpoint(self):
+        """변경된 카운터를 저장한 뒤 high-water mark 를 전진합니다. (카운터 저장 실패 시 다음 체크포인트에서 재시도)"""
+        self.counters.retain(self.scheduler.watchlist)
+        exported = self.counters.export()
+        try:
+            await self.db_service.save_mention_counters(exported)
+        except Exception:
+            self.counters.mark_dirty(exported)
+            raise
+        for kind, high_water in self._high_water.items():
+            await self.db_service.save_ingestion_checkpoint(f"stream:{kind}", high_water['fullname'],
+                                                            high_water['created_utc'])
+        self.last_checkpoint = time.time()
+
+    async def check_spikes(self):
+        if self.scheduler is None:
+            return
+        now = time.time()
+        spikes = [
+            ticker for ticker in self.counters.spiking(self.spike_min_mentions, self.spike_factor, now)
+            if now - self._last_spike.get(ticker, 0.0) >= self.spike_cooldown
+        ]
+        if not spikes:
+            return
+        for ticker in spikes:
+            self._last_spike[ticker] = now
+        self.spikes += len(spikes)
+        logger.info(f"Mention spike detected for {', '.join(sorted(spikes))}")
+        await self.scheduler.on_mention_spike(spikes)
+
+    async def _maintenance_loop(self):
+        while self.is_running:
+            try:
+                if self.scheduler is not None and self.scheduler.is_ingestion_leader:
+                    if not self.live:
+                        await self._go_live()
+                    else:
+                        await self.checkpoint()
+                        await self.discovery.promote()
+                        if self.discovery.enabled:
+                            await self.db_service.save_trending_snapshot(self.discovery.export())
+                else:
+                    if self.live:
+                        logger.info("Lost ingestion lease; mention stream switches to checkpoint replica")
+                        self.live = False
+                    self.counters.restore(await self.db_service.get_mention_counters(), replace=True)
+                    if self.discovery.enabled:
+                        self.discovery.replica = await self.db_service.get_trending_snapshot()
+                await self.check_spikes()
+            except Exception as e:
+                logger.error(f"Error in mention stream maintenance: {str(e)}")
+            await asyncio.sleep(self.checkpoint_interval)
+
+    async def start(self):
+        if not self.enabled or self.is_running:
+            return
+        self.is_running = True
+        self._tasks = [asyncio.create_task(self._maintenance_loop())]
+        if self.scheduler is not None:
+            self._tasks += [asyncio.create_task(self._poll_loop(kind)) for kind in self.kinds]
+        logger.info(f"Starting mention stream (poll every {self.poll_interval:g}s, "
+                    f"checkpoint every {self.checkpoint_interval:g}s)")
+
+    async def stop(self):
+        self.is_running = False
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.live:
+            try:
+                await self.checkpoint()
+            except Exception as e:
+                logger.error(f"Error saving final mention checkpoint: {str(e)}")
+            self.live = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "live": self.live,
+            **self.counters.stats(),
+            "polls": self.polls,
+            "errors": self.errors,
+            "gaps": self.gaps,
+            "spikes": self.spikes,
+            "checkpoint_age_seconds": round(time.time() - self.last_checkpoint, 1) if self.last_checkpoint else None,
+        }
@@ -1,93 +1,194 @@
-import openai
+import asyncio
 import os
 import json
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Optional, Set, Tuple
 import logging
+from services.analysis_cache import AnalysisCache
+from services.analyzer_service import BaseAnalyzer
+from services.llm_client import AsyncLLMClient, LLMUnavailableError
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class OpenAIService:
-    def __init__(self):
-        openai.api_key = os.getenv('OPENAI_API_KEY')
-
-    def analyze_sentiment(self, text: str) -> float:
+# 프롬프트를 바꾸면 버전을 올려 캐시된 이전 결과를 무효화합니다.
+PROMPT_VERSION = "batch-v1"
+
+BATCH_PROMPT = """
+다음은 주식 관련 Reddit 포스트 목록입니다. 각 포스트마다
+1) 감정을 -1(매우 부정)에서 1(매우 긍정) 사이의 점수로 평가하고
+2) 주식과 투자 관련 키워드를 우선하여 최대 {max_keywords}개의 주요 키워드를 추출해주세요.
+응답은 입력된 id 를 그대로 사용한 JSON 형식으로만 반환하세요:
+{{"results": [{{"id": 0, "sentiment": 0.5, "keywords": ["keyword1", "keyword2"]}}]}}
+
+포스트:
+{posts}
+"""
+
+
+class OpenAIService(BaseAnalyzer):
+    name = "openai"
+
+    def __init__(self, cache: Optional[AnalysisCache] = None, client: Optional[AsyncLLMClient] = None):
+        self.cache = cache
+        self.client = client or AsyncLLMClient()
+        self.model = os.getenv('OPENAI_MODEL', 'gpt-3.5-turbo')
+        # 한 번의 요청에 넣을 포스트 수와 입력 토큰 예산
+        self.batch_size = int(os.getenv('OPENAI_BATCH_SIZE', '10'))
+        self.chunk_token_budget = int(os.getenv('OPENAI_CHUNK_TOKEN_BUDGET', '3000'))
+        self.post_max_chars = int(os.getenv('OPENAI_POST_MAX_CHARS', '1200'))
+        self.max_keywords = 5
+
+    @staticmethod
+    def estimate_tokens(text: str) -> int:
+        """대략적인 토큰 수 (영문 기준 4글자당 1토큰)"""
+        return len(text) // 4 + 1
+
+    def _post_text(self, post: Dict[str, Any]) -> str:
+        text = f"{post['title']} {post.get('selftext', '')}"
+        return text[:self.post_max_chars]
+
+    def _build_chunks(self, texts: List[str]) -> List[List[int]]:
+        """배치 크기와 토큰 예산을 넘지 않도록 포스트 인덱스를 묶습니다."""
+        chunks: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+
+        for index, text in enumerate(texts):
+            tokens = self.estimate_tokens(text)
+            if current and (len(current) >= self.batch_size or current_tokens + tokens > self.chunk_token_budget):
+                chunks.append(current)
+                current, current_tokens = [], 0
+            current.append(index)
+            current_tokens += tokens
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    async def close(self):
+        await self.client.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return self.client.stats()
+
+    async def _chat_completion(self, prompt: str, max_tokens: int) -> str:
+        """rate limit·재시도·마감 시간이 적용된 ChatCompletion 호출"""
+        return await self.client.chat_completion(
+            [{"role": "user", "content": prompt}],
+            model=self.model,
+            max_tokens=max_tokens,
+            temperature=0.3,
+            estimated_prompt_tokens=self.estimate_tokens(prompt)
+        )
+
+    def _parse_results(self, raw: str, ids: List[int]) -> Dict[int, Tuple[float, List[str]]]:
         """
-        텍스트의 감정을 분석하여 -1(부정)에서 1(긍정) 사이의 점수를 반환합니다.
+        응답 JSON 에서 형식이 올바른 항목만 골라 반환합니다.
+        누락되었거나 잘못된 항목은 결과에서 빠지므로 호출자가 개별 재시도합니다.
         """
         try:
-            prompt = f"""
-            다음 텍스트의 감정을 분석하여 -1(매우 부정)에서 1(매우 긍정) 사이의 점수로 평가해주세요.
-            응답은 JSON 형식으로만 반환하세요: {{"sentiment": 0.5}}
-
-            텍스트: {text}
-            """
-
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=50,
-                temperature=0.3
-            )
-
-            result = response.choices[0].message.content.strip()
-            sentiment_data = json.loads(result)
-            sentiment_score = float(sentiment_data.get('sentiment', 0))
-
-            # 범위 제한
-            sentiment_score = max(-1, min(1, sentiment_score))
-
-            return sentiment_score
-
-        except Exception as e:
-            logger.error(f"Error analyzing sentiment: {str(e)}")
-            return 0.0
-
-    def extract_keywords(self, text: str, max_keywords: int = 5) -> List[str]:
+            data = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning("Malformed JSON in batch analysis response")
+            return {}
+
+        entries = data.get('results', []) if isinstance(data, dict) else data
+        if not isinstance(entries, list):
+            return {}
+
+        parsed = {}
+        expected = set(ids)
+        for entry in entries:
+            try:
+                post_id = int(entry['id'])
+                sentiment = max(-1.0, min(1.0, float(entry['sentiment'])))
+                keywords = entry.get('keywords', [])
+                if post_id not in expected or not isinstance(keywords, list):
+                    continue
+                parsed[post_id] = (sentiment, [str(k) for k in keywords][:self.max_keywords])
+            except (KeyError, TypeError, ValueError):
+                continue
+        return parsed
+
+    async def _analyze_chunk(self, texts: Dict[int, str]) -> Dict[int, Tuple[float, List[str]]]:
+        """하나의 요청으로 여러 포스트의 감정 점수와 키워드를 함께 얻습니다."""
+        listing = "\n".join(json.dumps({"id": i, "text": text}, ensure_ascii=False) for i, text in texts.items())
+        prompt = BATCH_PROMPT.format(max_keywords=self.max_keywords, posts=listing)
+        raw = await self._chat_completion(prompt, max_tokens=40 + 60 * len(texts))
+        return self._parse_results(raw, list(texts))
+
+    async def _run_chunks(self, chunks: List[Dict[int, str]]) -> Tuple[Dict[int, Tuple[float, List[str]]], Set[int]]:
         """
-        텍스트에서 주요 키워드를 추출합니다.
+        청크들을 동시에 요청합니다.
+        (파싱된 결과, 요청 자체가 실패한 포스트 번호 집합) 을 반환합니다.
         """
-        try:
-            prompt = f"""
-            다음 텍스트에서 최대 {max_keywords}개의 주요 키워드를 추출해주세요.
-            주식과 투자 관련 키워드를 우선적으로 선택하세요.
-            응답은 JSON 형식으로만 반환하세요: {{"keywords": ["keyword1", "keyword2"]}}
-
-            텍스트: {text}
-            """
-
-            response = openai.ChatCompletion.create(
-                model="gpt-3.5-turbo",
-                messages=[{"role": "user", "content": prompt}],
-                max_tokens=100,
-                temperature=0.3
-            )
-
-            result = response.choices[0].message.content.strip()
-            keyword_data = json.loads(result)
-            keywords = keyword_data.get('keywords', [])
-
-            return keywords[:max_keywords]
-
-        except Exception as e:
-            logger.error(f"Error extracting keywords: {str(e)}")
-            return []
-
-    def analyze_posts_batch(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        results: Dict[int, Tuple[float, List[str]]] = {}
+        failed: Set[int] = set()
+        outcomes = await asyncio.gather(*(self._analyze_chunk(chunk) for chunk in chunks), return_exceptions=True)
+        for chunk, outcome in zip(chunks, outcomes):
+            if isinstance(outcome, Exception):
+                if not isinstance(outcome, LLMUnavailableError):
+                    logger.error(f"Error analyzing batch of {len(chunk)} posts: {str(outcome)}")
+                failed.update(chunk)
+            else:
+                results.update(outcome)
+        return results, failed
+
+    async def analyze_posts_batch(self, posts: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """
         여러 포스트에 대한 감정 분석과 키워드 추출을 일괄 수행합니다.
+        OPENAI_BATCH_SIZE 개씩 묶어 요청하고, 응답에서 빠진 포스트만 개별 재시도합니다.
+        LLM 을 끝내 호출하지 못한 포스트는 analysis_status='unanalyzed', sentiment=None 으로 반환됩니다.
         """
-        analyzed_posts = []
-
-        for post in posts:
-            text = f"{post['title']} {post.get('selftext', '')}"
-            sentiment = self.analyze_sentiment(text)
-            keywords = self.extract_keywords(text)
+        texts = [self._post_text(post) for post in posts]
+        results: Dict[int, Tuple[float, List[str]]] = {}
+
+        # 캐시에 있는 포스트는 API 호출 없이 결과 재사용
+        keys = [AnalysisCache.make_key(text, self.model, PROMPT_VERSION) for text in texts]
+        if self.cache is not None:
+            cached = await self.cache.get_many(keys)
+            for index, key in enumerate(keys):
+                if key in cached:
+                    results[index] = (cached[key]['sentiment'], cached[key]['keywords'])
+
+        uncached = [i for i in range(len(posts)) if i not in results]
+        if uncached:
+            chunks = [
+                {uncached[j]: texts[uncached[j]] for j in chunk}
+                for chunk in self._build_chunks([texts[i] for i in uncached])
+            ]
+            fresh, failed = await self._run_chunks(chunks)
+
+            # 요청은 성공했지만 응답에서 빠졌거나 형식이 잘못된 포스트만 개별 재시도
+            missing = [i for i in uncached if i not in fresh and i not in failed]
+            if missing:
+                logger.info(f"Retrying {len(missing)} posts individually")
+                retried, failed_retries = await self._run_chunks([{i: texts[i]} for i in missing])
+                fresh.update(retried)
+                failed.update(failed_retries)
+
+            if failed:
+                logger.warning(f"{len(failed)} posts left unanalyzed because the LLM was unavailable")
+
+            if self.cache is not None:
+                await self.cache.set_many({
+                    keys[i]: {'sentiment': sentiment, 'keywords': keywords}
+                    for i, (sentiment, keywords) in fresh.items()
+                })
+            results.update(fresh)
 
+        analyzed_posts = []
+        for index, post in enumerate(posts):
             analyzed_post = post.copy()
-            analyzed_post['sentiment'] = sentiment
-            analyzed_post['keywords'] = keywords
-
+            analyzed_post['analyzer'] = self.name
+            if index in results:
+                analyzed_post['sentiment'], analyzed_post['keywords'] = results[index]
+                analyzed_post['analysis_status'] = 'analyzed'
+            else:
+                # 실패한 포스트는 중립(0.0)으로 저장하지 않고 미분석으로 표시
+                analyzed_post['sentiment'] = None
+                analyzed_post['keywords'] = []
+                analyzed_post['analysis_status'] = 'unanalyzed'
             analyzed_posts.append(analyzed_post)
 
-        return analyzed_posts
\ No newline at end of file
+        return analyzed_posts
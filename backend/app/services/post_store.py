@@ -0,0 +1,203 @@
+import asyncio
+import hashlib
+import os
+import re
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import logging
+from services.ticker_matcher import BODY_RELEVANCE
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 지문과 저장에 쓰는 본문 길이, 지문을 만들기에 너무 짧은 내용의 기준 (짧으면 우연히 같아질 수 있음)
+SELFTEXT_CHARS = 500
+MIN_FINGERPRINT_CHARS = 40
+STORED_FIELDS = ['title', 'score', 'comments', 'url', 'created_utc', 'subreddit']
+
+_URL_RE = re.compile(r'https?://\S+')
+_NON_WORD_RE = re.compile(r'[\W_]+')
+
+
+def content_fingerprint(post: Dict[str, Any]) -> str:
+    """
+    크로스포스트를 찾기 위한 내용 지문.
+    대소문자, 공백, 문장부호와 URL 을 무시한 제목 + 본문 앞부분의 해시이며,
+    내용이 너무 짧으면 다른 포스트와 합쳐지지 않도록 Reddit id 를 대신 씁니다.
+    """
+    text = f"{post.get('title') or ''} {(post.get('selftext') or '')[:SELFTEXT_CHARS]}"
+    normalized = ' '.join(_NON_WORD_RE.sub(' ', _URL_RE.sub(' ', text).lower()).split())
+    if len(normalized) < MIN_FINGERPRINT_CHARS:
+        return f"id:{post.get('id') or post['url']}"
+    return hashlib.blake2b(normalized.encode('utf-8'), digest_size=12).hexdigest()
+
+
+class PostStore:
+    """
+    티커/서브레딧과 무관하게 포스트를 한 번만 저장하고 한 번만 분석하는 저장소 (posts 컬렉션).
+    - 같은 Reddit id 나 같은 내용 지문(크로스포스트)은 대표 포스트 하나로 합쳐지고,
+      티커 문서와 대기 버퍼에는 대표 id 와 티커별 관련도(relevance)만 저장
+    - 이미 분석된 포스트는 저장된 결과를 재사용하고, 다른 티커 실행이 분석 중인 포스트는 그 결과를 기다림
+    - 최근 조회/분석한 포스트는 프로세스 내 LRU 에 두어 스냅샷 캐시의 참조 해석이 DB 를 다시 읽지 않음
+    """
+
+    def __init__(self, db_service, max_entries: Optional[int] = None):
+        self.db_service = db_service
+        self.max_entries = max_entries or int(os.getenv('POST_STORE_MAX_ENTRIES', '20000'))
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.registered = 0
+        self.merged = 0
+        self.analyzed = 0
+        self.reused = 0
+        self.waited = 0
+
+    def _remember(self, post: Dict[str, Any]):
+        post_id = post['id']
+        self._memory[post_id] = {key: value for key, value in post.items() if key != 'relevance'}
+        self._memory.move_to_end(post_id)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    async def canonicalize(self, mentions: Dict[str, List[Dict[str, Any]]]) -> Dict[str, str]:
+        """
+        티커별로 매칭된 포스트를 posts 컬렉션에 저장하고 {Reddit id: 대표 포스트 id} 를 반환합니다.
+        같은 Reddit id 나 같은 내용 지문(크로스포스트)은 대표 포스트 하나로 합쳐집니다.
+        """
+        unique: Dict[str, Dict[str, Any]] = {}
+        for ticker, posts in mentions.items():
+            for post in posts:
+                post_id = post.get('id') or post['url']
+                entry = unique.get(post_id)
+                if entry is None:
+                    entry = unique[post_id] = {
+                        **{field: post.get(field) for field in STORED_FIELDS},
+                        'id': post_id,
+                        'selftext': (post.get('selftext') or '')[:SELFTEXT_CHARS],
+                        'fingerprint': content_fingerprint(post),
+                        'tickers': [],
+                    }
+                entry['tickers'].append(ticker)
+        if not unique:
+            return {}
+
+        canonical = await self.db_service.upsert_posts(list(unique.values()))
+        self.registered += len(unique)
+        self.merged += sum(1 for post_id, target in canonical.items() if post_id != target)
+        return canonical
+
+    async def register(self, mentions: Dict[str, List[Dict[str, Any]]]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        티커별로 매칭된 포스트(relevance 포함)를 posts 컬렉션에 저장하고
+        티커별 참조 목록 [{id, created_utc, relevance}] 을 반환합니다. (id 는 대표 포스트 id)
+        """
+        canonical = await self.canonicalize(mentions)
+        if not canonical:
+            return {}
+
+        refs: Dict[str, List[Dict[str, Any]]] = {}
+        for ticker, posts in mentions.items():
+            seen = set()
+            for post in posts:
+                post_id = canonical[post.get('id') or post['url']]
+                if post_id in seen:
+                    continue  # 같은 티커의 크로스포스트
+                seen.add(post_id)
+                refs.setdefault(ticker, []).append({
+                    'id': post_id,
+                    'created_utc': post['created_utc'],
+                    'relevance': post.get('relevance', BODY_RELEVANCE),
+                })
+        return refs
+
+    async def get_many(self, post_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        대표 id 로 포스트를 조회합니다. 분석이 끝난 포스트만 메모리에서 꺼내고,
+        나머지는 다른 노드가 분석했을 수 있으므로 DB 에서 읽습니다.
+        """
+        found: Dict[str, Dict[str, Any]] = {}
+        missing = []
+        for post_id in dict.fromkeys(post_ids):
+            post = self._memory.get(post_id)
+            if post is not None and post.get('analysis_status') == 'analyzed':
+                self._memory.move_to_end(post_id)
+                found[post_id] = post
+            else:
+                missing.append(post_id)
+        if missing:
+            for post in await self.db_service.get_posts(missing):
+                self._remember(post)
+                found[post['id']] = self._memory[post['id']]
+        return found
+
+    async def load(self, refs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """참조 목록을 티커별 relevance 가 붙은 포스트로 바꿉니다. (보존 기간이 지나 삭제된 포스트는 제외)"""
+        posts = await self.get_many([ref['id'] for ref in refs])
+        return [
+            {**posts[ref['id']], 'relevance': ref.get('relevance', BODY_RELEVANCE)}
+            for ref in refs if ref['id'] in posts
+        ]
+
+    async def analyze(self, posts: List[Dict[str, Any]], analyzer) -> List[Dict[str, Any]]:
+        """
+        포스트별로 한 번만 분석합니다.
+        이미 분석된 포스트는 그대로 반환하고, 다른 실행이 분석 중인 포스트는 그 결과를 기다리며,
+        나머지만 분석기에 보낸 뒤 결과를 posts 컬렉션에 저장합니다. 반환 순서와 relevance 는 입력을 따릅니다.
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        todo = []
+        for post in posts:
+            if post.get('analysis_status') == 'analyzed':
+                results[post['id']] = post
+                self.reused += 1
+            elif post['id'] in self._inflight:
+                waiting[post['id']] = self._inflight[post['id']]
+            elif post['id'] not in results:
+                results[post['id']] = post  # 같은 목록 안의 중복은 한 번만 분석
+                todo.append(post)
+
+        if todo:
+            loop = asyncio.get_running_loop()
+            futures = {post['id']: loop.create_future() for post in todo}
+            self._inflight.update(futures)
+            try:
+                analyzed_posts = await analyzer.analyze_posts_batch(todo)
+                scored = [post for post in analyzed_posts if post.get('sentiment') is not None]
+                try:
+                    await self.db_service.save_post_analysis(scored)
+                except Exception as e:
+                    # 결과는 이번 집계에 그대로 쓰고, 저장되지 않은 포스트는 다음에 분석 캐시로 다시 채움
+                    logger.error(f"Error persisting analysis of {len(scored)} posts: {str(e)}")
+                for post in analyzed_posts:
+                    results[post['id']] = post
+                    futures[post['id']].set_result(post)
+                    if post.get('sentiment') is not None:
+                        self._remember(post)
+                self.analyzed += len(scored)
+            finally:
+                for post_id, future in futures.items():
+                    if not future.done():
+                        # 분석기가 예외로 끝나면 기다리던 실행은 미분석으로 처리하고 다음 실행에서 재시도
+                        future.set_result({**results[post_id], 'sentiment': None, 'keywords': [],
+                                           'analysis_status': 'unanalyzed'})
+                    if self._inflight.get(post_id) is future:
+                        del self._inflight[post_id]
+
+        if waiting:
+            self.waited += len(waiting)
+            for post_id, future in waiting.items():
+                results[post_id] = await asyncio.shield(future)
+
+        return [{**results[post['id']], 'relevance': post.get('relevance', BODY_RELEVANCE)} for post in posts]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._memory),
+            "in_flight": len(self._inflight),
+            "registered": self.registered,
+            "merged_crossposts": self.merged,
+            "analyzed": self.analyzed,
+            "reused": self.reused,
+            "waited": self.waited,
+        }
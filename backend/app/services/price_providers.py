@@ -0,0 +1,184 @@
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+import logging
+import aiohttp
+import numpy as np
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# (timestamps: 유닉스 시간 float64, closes: float64, volumes: float64), 시간 오름차순
+PriceSeries = Tuple[np.ndarray, np.ndarray, np.ndarray]
+
+
+class PriceProviderError(Exception):
+    """가격 공급자 호출 실패"""
+
+
+class PriceRateLimitError(PriceProviderError):
+    """공급자 호출 한도 초과"""
+
+
+class BasePriceProvider(ABC):
+    """인트라데이 가격 시계열 공급자 인터페이스"""
+
+    name = "base"
+    # 한 번의 호출로 가져올 수 있는 티커 수
+    max_batch = 1
+
+    @abstractmethod
+    async def fetch_series(self, tickers: List[str]) -> Dict[str, Optional[PriceSeries]]:
+        """티커별 시계열을 반환합니다. 데이터가 없는 티커는 None 입니다."""
+
+    async def close(self):
+        """공급자가 보유한 네트워크 자원 정리"""
+
+
+class AlphaVantageProvider(BasePriceProvider):
+    """
+    Alpha Vantage TIME_SERIES_INTRADAY.
+    15분 간격 compact(최근 100개) 응답은 약 4거래일을 담으므로 24시간 변동 계산에 충분합니다.
+    하나의 ClientSession(커넥션 풀)을 모든 호출이 공유합니다.
+    """
+
+    name = "alphavantage"
+    max_batch = 1
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None):
+        self.api_key = api_key or os.getenv('ALPHA_VANTAGE_API_KEY', 'demo')
+        self.base_url = base_url or os.getenv('ALPHA_VANTAGE_BASE_URL', 'https://www.alphavantage.co/query')
+        self.interval = os.getenv('PRICE_INTRADAY_INTERVAL', '15min')
+        self.max_connections = int(os.getenv('PRICE_MAX_CONNECTIONS', '4'))
+        self.timeout = aiohttp.ClientTimeout(total=float(os.getenv('PRICE_REQUEST_TIMEOUT', '10')))
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.max_connections),
+                timeout=self.timeout
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch_series(self, tickers: List[str]) -> Dict[str, Optional[PriceSeries]]:
+        return {ticker: await self._fetch_one(ticker) for ticker in tickers}
+
+    async def _fetch_one(self, ticker: str) -> Optional[PriceSeries]:
+        params = {
+            'function': 'TIME_SERIES_INTRADAY',
+            'symbol': ticker,
+            'interval': self.interval,
+            'outputsize': 'compact',
+            'apikey': self.api_key
+        }
+        async with self.session.get(self.base_url, params=params) as response:
+            if response.status != 200:
+                raise PriceProviderError(f"Alpha Vantage returned status {response.status}")
+            data = await response.json(content_type=None)
+
+        if 'Note' in data or 'Information' in data:
+            raise PriceRateLimitError(data.get('Note') or data.get('Information'))
+        if 'Error Message' in data:
+            logger.warning(f"Alpha Vantage has no data for {ticker}: {data['Error Message']}")
+            return None
+        return self.parse_series(data)
+
+    @staticmethod
+    def parse_series(data: Dict) -> Optional[PriceSeries]:
+        key = next((k for k in data if k.startswith('Time Series')), None)
+        if key is None or not data[key]:
+            return None
+        zone = ZoneInfo(data.get('Meta Data', {}).get('6. Time Zone', 'US/Eastern'))
+        rows = data[key]
+        timestamps = np.array([
+            datetime.strptime(stamp, '%Y-%m-%d %H:%M:%S').replace(tzinfo=zone).timestamp() for stamp in rows
+        ])
+        closes = np.array([float(row['4. close']) for row in rows.values()])
+        volumes = np.array([float(row.get('5. volume', 0)) for row in rows.values()])
+        order = np.argsort(timestamps)
+        return timestamps[order], closes[order], volumes[order]
+
+
+class FixturePriceProvider(BasePriceProvider):
+    """
+    네트워크 없이 쓰는 가격 공급자 (테스트/벤치마크 전용, PRICE_PROVIDER=fixture 로만 선택).
+    PRICE_FIXTURE_PATH 의 JSON({ticker: [[timestamp, close, volume], ...]})을 읽고,
+    파일에 없는 티커는 티커 이름으로 시드한 결정적 랜덤 워크를 만듭니다. (실제 가격이 아님)
+    """
+
+    name = "fixture"
+    max_batch = 1000
+
+    def __init__(self, path: Optional[str] = None, points: int = 100, step_seconds: int = 900,
+                 now: Optional[float] = None):
+        self.path = path or os.getenv('PRICE_FIXTURE_PATH')
+        self.points = points
+        self.step_seconds = step_seconds
+        self.now = now
+        self.fixtures: Dict[str, PriceSeries] = {}
+        if self.path:
+            with open(self.path) as f:
+                for ticker, rows in json.load(f).items():
+                    array = np.asarray(rows, dtype=np.float64)
+                    order = np.argsort(array[:, 0])
+                    self.fixtures[ticker.upper()] = (array[order, 0], array[order, 1], array[order, 2])
+
+    def _synthetic(self, ticker: str) -> PriceSeries:
+        seed = int.from_bytes(hashlib.md5(ticker.encode()).digest()[:4], 'little')
+        rng = np.random.default_rng(seed)
+        end = self.now if self.now is not None else time.time()
+        end -= end % self.step_seconds
+        timestamps = end - self.step_seconds * np.arange(self.points - 1, -1, -1, dtype=np.float64)
+        closes = (20 + seed % 480) * np.exp(np.cumsum(rng.normal(0, 0.004, self.points)))
+        volumes = rng.integers(1_000, 100_000, self.points).astype(np.float64)
+        return timestamps, closes, volumes
+
+    async def fetch_series(self, tickers: List[str]) -> Dict[str, Optional[PriceSeries]]:
+        return {ticker: self.fixtures.get(ticker) or self._synthetic(ticker) for ticker in tickers}
+
+
+class NullPriceProvider(BasePriceProvider):
+    """가격 공급자가 설정되지 않았을 때 사용. 모든 티커의 가격이 없음(None)으로 저장/응답됩니다."""
+
+    name = "none"
+    max_batch = 1000
+
+    async def fetch_series(self, tickers: List[str]) -> Dict[str, Optional[PriceSeries]]:
+        return {ticker: None for ticker in tickers}
+
+
+def create_price_provider(provider: Optional[str] = None) -> BasePriceProvider:
+    """
+    PRICE_PROVIDER 설정에 따라 가격 공급자를 생성합니다.
+    - alphavantage: Alpha Vantage 인트라데이 API
+    - fixture: 로컬 고정 데이터/결정적 합성 데이터 (테스트/벤치마크 전용)
+    - none: 가격 없음
+    - auto (기본값): ALPHA_VANTAGE_API_KEY 가 설정되어 있으면 alphavantage, 아니면 none
+    """
+    provider = (provider or os.getenv('PRICE_PROVIDER', 'auto')).lower()
+    if provider == 'auto':
+        api_key = os.getenv('ALPHA_VANTAGE_API_KEY')
+        provider = 'alphavantage' if api_key and api_key != 'demo' else 'none'
+        if provider == 'none':
+            logger.warning("ALPHA_VANTAGE_API_KEY is not set, price_change_24h will be null")
+
+    if provider == 'alphavantage':
+        return AlphaVantageProvider()
+    if provider == 'fixture':
+        logger.warning("Using fixture price provider, prices are synthetic")
+        return FixturePriceProvider()
+    if provider == 'none':
+        return NullPriceProvider()
+    raise ValueError(f"Unknown price provider: {provider}")
@@ -0,0 +1,164 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class SamplingProfiler:
+    """
+    실행 중에 켜는 샘플링 프로파일러.
+    별도 스레드가 PROFILER_INTERVAL_MS 마다 모든 스레드(이벤트 루프, 블로킹 executor)의 스택을 읽어
+    접힌 스택(collapsed stack, flamegraph 입력 형식)별 샘플 수를 셉니다.
+    arm() 으로 다음 스케줄 실행 N 개(또는 먼저 시작되는 수동 분석 사이클 한 번)만 프로파일하거나,
+    start()/stop() 으로 임의 구간을 측정합니다.
+    """
+
+    def __init__(self, interval: Optional[float] = None, max_depth: int = 64):
+        self.interval = interval or float(os.getenv('PROFILER_INTERVAL_MS', '5')) / 1000.0
+        self.max_depth = max_depth
+        self.armed = False
+        # arm() 이후 프로파일할 스케줄 실행 수와 진행 상황
+        self.target_runs = 0
+        self._completed_runs = 0
+        self._profiling_runs = False
+        self.report: Optional[Dict[str, Any]] = None
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started_at = 0.0
+        self._label = ''
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def arm(self, runs: int = 8):
+        """다음 스케줄 실행 runs 개를 (그 전에 수동 분석 사이클이 시작되면 그 사이클을) 프로파일합니다."""
+        self.armed = True
+        self.target_runs = runs
+
+    def start(self, label: str = 'manual'):
+        if self.running:
+            raise RuntimeError("profiler is already running")
+        self._stacks = Counter()
+        self._samples = 0
+        self._label = label
+        self._started_at = time.time()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample_loop, name='sampling-profiler', daemon=True)
+        self._thread.start()
+        logger.info(f"Sampling profiler started ({label}, every {self.interval * 1000:.1f}ms)")
+
+    def stop(self) -> Dict[str, Any]:
+        if not self.running:
+            raise RuntimeError("profiler is not running")
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.report = self._build_report()
+        logger.info(f"Sampling profiler stopped after {self._samples} samples")
+        return self.report
+
+    @asynccontextmanager
+    async def cycle(self, label: str) -> AsyncIterator[None]:
+        """arm() 되어 있으면 이 블록 실행 동안만 프로파일합니다. (이미 실행 중이면 그대로 둠)"""
+        if not self.armed or self.running:
+            yield
+            return
+        self.armed = False
+        self.start(label)
+        try:
+            yield
+        finally:
+            self.stop()
+
+    @asynccontextmanager
+    async def run(self, label: str) -> AsyncIterator[None]:
+        """
+        스케줄 실행 하나를 감쌉니다. arm() 되어 있으면 첫 실행에서 시작하고, 그 뒤(동시 실행 포함)
+        target_runs 개가 끝나면 멈춥니다.
+        """
+        if self.armed and not self.running:
+            self.armed = False
+            self._completed_runs = 0
+            self._profiling_runs = True
+            self.start(f"{self.target_runs} scheduled runs from {label}")
+        elif not self._profiling_runs:
+            yield
+            return
+        try:
+            yield
+        finally:
+            if self._profiling_runs:
+                self._completed_runs += 1
+                if self._completed_runs >= self.target_runs:
+                    self._profiling_runs = False
+                    if self.running:
+                        self.stop()
+
+    def _sample_loop(self):
+        own_id = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            if len(names) != threading.active_count():
+                names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    code = frame.f_code
+                    stack.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self._stacks[';'.join(reversed(stack))] += 1
+            self._samples += 1
+
+    def _build_report(self, top: int = 30) -> Dict[str, Any]:
+        """함수별 self/누적 샘플 수 상위 목록과 전체 접힌 스택"""
+        self_counts: Counter = Counter()
+        total_counts: Counter = Counter()
+        for stack, count in self._stacks.items():
+            frames = stack.split(';')[1:]
+            if not frames:
+                continue
+            self_counts[frames[-1]] += count
+            for frame in set(frames):
+                total_counts[frame] += count
+
+        # 비율은 (틱 수 × 스레드 수) 기준. 대기 중인 스레드(select, queue.get 등)도 샘플에 포함됩니다.
+        thread_samples = sum(self._stacks.values())
+
+        def ranked(counts: Counter) -> List[Dict[str, Any]]:
+            return [
+                {"function": function, "samples": count, "ratio": round(count / thread_samples, 3)}
+                for function, count in counts.most_common(top)
+            ]
+
+        return {
+            "label": self._label,
+            "started_at": self._started_at,
+            "duration_seconds": round(time.time() - self._started_at, 3),
+            "interval_ms": self.interval * 1000,
+            "samples": self._samples,
+            "thread_samples": thread_samples,
+            "top_self": ranked(self_counts),
+            "top_cumulative": ranked(total_counts),
+            "collapsed": [f"{stack} {count}" for stack, count in self._stacks.most_common()],
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "armed": self.armed,
+            "running": self.running,
+            "profiled_runs": self._completed_runs,
+            "last_samples": self.report["samples"] if self.report else 0,
+        }
@@ -0,0 +1,51 @@
+import asyncio
+import time
+from typing import Optional
+
+
+class TokenBucket:
+    """
+    분당 허용량 기반 토큰 버킷.
+    acquire() 는 토큰이 찰 때까지 비동기로 대기하므로 호출 측은 한도를 넘지 않습니다.
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate_per_second)
+        self.updated_at = now
+
+    async def acquire(self, amount: float = 1.0):
+        """amount 만큼 토큰을 소비합니다. 용량보다 큰 요청은 용량만큼으로 제한합니다."""
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate_per_second)
+
+    def try_acquire(self, amount: float = 1.0) -> bool:
+        """대기 없이 토큰 소비를 시도합니다."""
+        self._refill()
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def adjust(self, delta: float):
+        """실제 사용량이 추정치와 다를 때 차이만큼 보정합니다. (음수면 반환)"""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens - delta)
+
+    def wait_time(self, amount: float = 1.0) -> float:
+        """amount 만큼의 토큰이 찰 때까지 남은 시간(초)"""
+        self._refill()
+        return max(0.0, (min(amount, self.capacity) - self.tokens) / self.rate_per_second)
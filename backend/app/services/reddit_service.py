@@ -1,19 +1,49 @@
-import praw
 import os
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+import threading
+import time
+from typing import TYPE_CHECKING, List, Dict, Any, Optional
 import logging
+from services.concurrency import run_blocking
+from services.metrics import record_call
+
+if TYPE_CHECKING:
+    import praw
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SUBREDDITS = ['stocks', 'investing', 'wallstreetbets', 'StockMarket']
+
+
+def _is_rate_limited(error: Exception) -> bool:
+    from prawcore.exceptions import TooManyRequests
+    return isinstance(error, TooManyRequests)
+
+
 class RedditService:
     def __init__(self):
-        self.reddit = praw.Reddit(
-            client_id=os.getenv('REDDIT_CLIENT_ID'),
-            client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
-            user_agent=os.getenv('REDDIT_USER_AGENT', 'RedditStockMonitor/1.0')
-        )
+        # PRAW 인스턴스는 스레드 안전하지 않으므로 워커 스레드마다 따로 생성합니다.
+        self._local = threading.local()
+
+    @property
+    def reddit(self) -> "praw.Reddit":
+        reddit = getattr(self._local, 'reddit', None)
+        if reddit is None:
+            # praw(requests, aiohttp 포함)는 import 가 무거우므로 처음 Reddit 을 호출할 때 불러옴
+            import praw
+            # REDDIT_BASE_URL/REDDIT_OAUTH_URL 로 호환 서버(벤치마크용 가짜 서버 등) 지정 가능
+            endpoints = {
+                key: os.getenv(env_name) for key, env_name in
+                (('reddit_url', 'REDDIT_BASE_URL'), ('oauth_url', 'REDDIT_OAUTH_URL')) if os.getenv(env_name)
+            }
+            reddit = praw.Reddit(
+                client_id=os.getenv('REDDIT_CLIENT_ID'),
+                client_secret=os.getenv('REDDIT_CLIENT_SECRET'),
+                user_agent=os.getenv('REDDIT_USER_AGENT', 'RedditStockMonitor/1.0'),
+                **endpoints
+            )
+            self._local.reddit = reddit
+        return reddit
 
     def search_stock_mentions(self, ticker: str, limit: int = 100) -> List[Dict[str, Any]]:
         """
@@ -21,31 +51,104 @@ class RedditService:
         """
         try:
             posts = []
-            subreddits = ['stocks', 'investing', 'wallstreetbets', 'StockMarket']
 
-            for subreddit_name in subreddits:
+            for subreddit_name in SUBREDDITS:
                 subreddit = self.reddit.subreddit(subreddit_name)
 
                 # 최근 24시간 내 포스트 검색
-                for post in subreddit.search(f"{ticker}", limit=limit//len(subreddits), time_filter='day'):
+                for post in subreddit.search(f"{ticker}", limit=limit//len(SUBREDDITS), time_filter='day'):
                     if hasattr(post, 'title') and hasattr(post, 'score'):
-                        posts.append({
-                            'title': post.title,
-                            'score': post.score,
-                            'comments': post.num_comments,
-                            'url': f"https://reddit.com{post.permalink}",
-                            'created_utc': post.created_utc,
-                            'subreddit': subreddit_name,
-                            'selftext': getattr(post, 'selftext', '')[:500]  # 텍스트 일부만 저장
-                        })
+                        posts.append(self._to_post_dict(post, subreddit_name))
 
             logger.info(f"Found {len(posts)} posts for {ticker}")
+            record_call('reddit')
             return posts
 
         except Exception as e:
             logger.error(f"Error searching Reddit for {ticker}: {str(e)}")
+            record_call('reddit', 'rate_limited' if _is_rate_limited(e) else 'error')
             return []
 
+    def fetch_new_posts(self, subreddit_name: str, checkpoint: Optional[Dict[str, Any]] = None,
+                        max_age_hours: int = 24, scan_limit: int = 1000) -> List[Dict[str, Any]]:
+        """
+        서브레딧의 최신 포스트 중 체크포인트(마지막으로 본 포스트)보다 새로운 것만 가져옵니다.
+        체크포인트가 없거나 오래되었으면 max_age_hours 이내 포스트까지만 거슬러 올라갑니다.
+        결과는 최신순이며, 예외는 호출자에게 전달하여 체크포인트가 잘못 전진하지 않게 합니다.
+        """
+        posts = []
+        cutoff = time.time() - max_age_hours * 3600
+        last_fullname = checkpoint.get('fullname') if checkpoint else None
+        last_created = checkpoint.get('created_utc', 0.0) if checkpoint else 0.0
+
+        try:
+            for post in self.reddit.subreddit(subreddit_name).new(limit=scan_limit):
+                if post.name == last_fullname or post.created_utc < max(cutoff, last_created):
+                    break
+                posts.append(self._to_post_dict(post, subreddit_name, selftext_limit=None))
+        except Exception as e:
+            record_call('reddit', 'rate_limited' if _is_rate_limited(e) else 'error')
+            raise
+        record_call('reddit')
+
+        logger.info(f"Fetched {len(posts)} new posts from r/{subreddit_name}")
+        return posts
+
+    async def fetch_new_posts_async(self, subreddit_name: str, checkpoint: Optional[Dict[str, Any]] = None,
+                                    max_age_hours: int = 24, scan_limit: int = 1000) -> List[Dict[str, Any]]:
+        return await run_blocking('reddit', self.fetch_new_posts, subreddit_name, checkpoint, max_age_hours, scan_limit)
+
+    def fetch_latest(self, kind: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        감시 서브레딧 전체(r/a+b+...)의 최신 포스트(kind='submissions') 또는 댓글('comments')을 최신순으로 가져옵니다.
+        실시간 언급 카운터용이므로 티커 매칭에 필요한 텍스트와 시각만 반환합니다. 예외는 호출자에게 전달합니다.
+        """
+        subreddit = self.reddit.subreddit('+'.join(SUBREDDITS))
+        items = []
+        try:
+            if kind == 'submissions':
+                for post in subreddit.new(limit=limit):
+                    items.append({'fullname': post.name, 'created_utc': post.created_utc,
+                                  'text': f"{post.title} {(post.selftext or '')[:500]}"})
+            else:
+                for comment in subreddit.comments(limit=limit):
+                    items.append({'fullname': comment.name, 'created_utc': comment.created_utc,
+                                  'text': comment.body or ''})
+        except Exception as e:
+            record_call('reddit', 'rate_limited' if _is_rate_limited(e) else 'error')
+            raise
+        record_call('reddit')
+        return items
+
+    async def fetch_latest_async(self, kind: str, limit: int = 100) -> List[Dict[str, Any]]:
+        return await run_blocking('reddit', self.fetch_latest, kind, limit)
+
+    @staticmethod
+    def _to_post_dict(post, subreddit_name: str, selftext_limit: Optional[int] = 500) -> Dict[str, Any]:
+        selftext = getattr(post, 'selftext', '') or ''
+        # 크로스포스트에만 있는 속성이므로 getattr 대신 vars 로 확인 (없는 속성 접근은 PRAW 가 포스트를 다시 요청함)
+        parents = vars(post).get('crosspost_parent_list') or []
+        if not selftext and parents:
+            # 크로스포스트는 본문이 비어 있으므로 원문 본문을 사용 (원문과 같은 내용 지문이 되도록)
+            selftext = parents[0].get('selftext') or ''
+        return {
+            'id': post.id,
+            'fullname': post.name,
+            'title': post.title,
+            'score': post.score,
+            'comments': post.num_comments,
+            'url': f"https://reddit.com{post.permalink}",
+            'created_utc': post.created_utc,
+            'subreddit': subreddit_name,
+            'selftext': selftext[:selftext_limit] if selftext_limit else selftext  # 텍스트 일부만 저장
+        }
+
+    async def search_stock_mentions_async(self, ticker: str, limit: int = 100) -> List[Dict[str, Any]]:
+        """
+        search_stock_mentions 를 워커 스레드에서 실행하여 이벤트 루프를 막지 않습니다.
+        """
+        return await run_blocking('reddit', self.search_stock_mentions, ticker, limit)
+
     def get_top_posts_by_mentions(self, tickers: List[str], limit: int = 10) -> Dict[str, List[Dict[str, Any]]]:
         """
         여러 티커에 대한 최고 점수 포스트들을 반환합니다.
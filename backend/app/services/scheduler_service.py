@@ -1,106 +1,547 @@
 import asyncio
-from datetime import datetime, time
+import os
+import time
 import logging
-from typing import List
-from services.reddit_service import RedditService
-from services.openai_service import OpenAIService
-from services.database_service import DatabaseService
-from services.stock_price_service import StockPriceService
+from typing import Any, Dict, List, Optional, Set, Tuple
+from services.reddit_service import RedditService, SUBREDDITS
+from services.analyzer_service import create_analyzer
+from services.database_service import DatabaseService, StaleWriteError
+from services.analysis_cache import AnalysisCache
+from services.post_store import PostStore
+from services.aggregation import expired_window_ids, merge_ticker_aggregate
+from services.ticker_matcher import TickerMatcher, BODY_RELEVANCE
+from services.ticker_schedule import TickerSchedule, TickerState
+from services.rate_limiter import TokenBucket
+from services.coordination import ClusterCoordinator, rendezvous_owner
+from services.metrics import span
+from services.profiler import SamplingProfiler
+from services.lazy import Lazy
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DEFAULT_TICKERS = ["AAPL", "TSLA", "GOOGL", "MSFT", "NVDA"]
+
+
+def _create_stock_price_service():
+    from services.stock_price_service import StockPriceService
+    return StockPriceService()
+
 class SchedulerService:
-    def __init__(self, tickers: List[str] = None):
-        self.tickers = tickers or ["AAPL", "TSLA", "GOOGL", "MSFT", "NVDA"]
+    """
+    티커별 적응형 스케줄러.
+    - 감시 목록은 MongoDB(watchlist)에 저장되며 실행 중에도 추가/삭제 가능
+    - 각 티커는 다음 실행 시각 기준 우선순위 큐에서 꺼내 실행하고,
+      언급 속도와 감정 변동성에 따라 SCHEDULER_MIN_INTERVAL ~ SCHEDULER_MAX_INTERVAL 사이로 간격을 조정
+    - incremental 모드에서는 수집 루프가 새 포스트를 posts 컬렉션에 한 번 저장하고 티커별 대기 버퍼(pending_mentions)에
+      참조를 쌓으며, 티커 실행 시 버퍼의 포스트만 분석 (여러 티커에 걸친 포스트도 분석은 한 번)
+    - 실행 결과는 SCHEDULER_COMMIT_WINDOW_SECONDS 동안 모아 티커 수와 무관하게 bulk write 한 번으로 저장
+    - Reddit 호출과 분석 포스트 수는 프로세스 전체 분당 예산(토큰 버킷)으로 제한
+    - coordinator 가 주어지면 이 노드가 담당하는 티커만 스케줄하고, 수집은 수집 임대를 가진 노드만 수행
+    """
+
+    def __init__(self, tickers: List[str] = None, db_service: Optional[DatabaseService] = None,
+                 coordinator: Optional[ClusterCoordinator] = None):
+        env_tickers = [t.strip().upper() for t in os.getenv('WATCHLIST_DEFAULT', '').split(',') if t.strip()]
+        self.default_tickers = tickers or env_tickers or DEFAULT_TICKERS
+        # 연결 수명은 lifespan 이 관리하는 공유 DatabaseService 를 따릅니다.
+        self.db_service = db_service or DatabaseService()
+        self.coordinator = coordinator
+        self.analysis_cache = AnalysisCache(self.db_service)
+        # 티커/서브레딧에 걸쳐 포스트를 한 번만 저장하고 분석 (스냅샷 캐시와 공유)
+        self.post_store = PostStore(self.db_service)
         self.reddit_service = RedditService()
-        self.openai_service = OpenAIService()
-        self.stock_price_service = StockPriceService()
-        self.db_service = DatabaseService()
+        # ANALYZER_BACKEND 에 따라 OpenAI / 로컬 / OpenAI+로컬 대체 분석기 선택
+        # 분석기와 가격 서비스는 aiohttp/numpy 를 불러오므로 첫 분석 때 생성 (서버 시작 시간 단축)
+        self.lazy_analyzer = Lazy(lambda: create_analyzer(cache=self.analysis_cache), 'analyzer')
+        self.lazy_prices = Lazy(_create_stock_price_service, 'stock_price_service')
+        # 런타임에 켜서 다음 스케줄 실행 N 개(또는 수동 분석 사이클 한 번)를 프로파일
+        self.profiler = SamplingProfiler()
+        # incremental: 서브레딧별 체크포인트 이후 새 포스트만 수집 / search: 티커별 검색 (기존 방식)
+        self.ingestion_mode = os.getenv('REDDIT_INGESTION_MODE', 'incremental')
+        self.scan_limit = int(os.getenv('REDDIT_SCAN_LIMIT', '1000'))
+        self.window_seconds = int(os.getenv('AGGREGATE_WINDOW_HOURS', '24')) * 3600
+        self.price_timeout = float(os.getenv('PRICE_LOOKUP_TIMEOUT', '5'))
+
+        self.schedule = TickerSchedule(
+            min_interval=float(os.getenv('SCHEDULER_MIN_INTERVAL', '300')),
+            max_interval=float(os.getenv('SCHEDULER_MAX_INTERVAL', '3600')),
+            rate_reference=float(os.getenv('SCHEDULER_RATE_REFERENCE', '5')),
+            volatility_reference=float(os.getenv('SCHEDULER_VOLATILITY_REFERENCE', '0.1')),
+        )
+        # 전체 감시 목록 (수집 매칭용). 스케줄에는 이 노드가 담당하는 티커만 있음
+        self.watchlist: Set[str] = set(self.default_tickers)
+        self.schedule.sync(self.default_tickers)
+        self.max_concurrency = int(os.getenv('SCHEDULER_MAX_CONCURRENCY', '8'))
+        self.max_posts_per_run = int(os.getenv('SCHEDULER_MAX_POSTS_PER_RUN', '200'))
+        self.urgent_pending = int(os.getenv('SCHEDULER_URGENT_PENDING', '20'))
+        # 스케줄 실행 결과를 이 시간(초) 동안 모아 한 번의 bulk write 로 저장
+        self.commit_window = float(os.getenv('SCHEDULER_COMMIT_WINDOW_SECONDS', '1'))
+        self.ingest_interval = float(os.getenv('INGEST_INTERVAL_SECONDS', '300'))
+        self.watchlist_refresh_interval = float(os.getenv('WATCHLIST_REFRESH_SECONDS', '60'))
+        # 프로세스 전체 외부 API 예산 (분당)
+        self.reddit_budget = TokenBucket(float(os.getenv('REDDIT_CALLS_PER_MINUTE', '60')))
+        self.analysis_budget = TokenBucket(float(os.getenv('ANALYSIS_POSTS_PER_MINUTE', '600')))
+
+        self._matcher: Optional[TickerMatcher] = None
+        # 실행 중 추가된 티커는 첫 실행 때 검색으로 기존 언급을 채움
+        self._needs_seed: Set[str] = set()
+        self._running: Set[asyncio.Task] = set()
+        # 저장을 기다리는 스케줄 실행 결과 (상태, 결과 또는 예외, 결과를 받을 future)
+        self._commit_batch: List[Tuple[TickerState, Any, asyncio.Future]] = []
+        self._commit_added = asyncio.Event()
+        self._commit_task: Optional[asyncio.Task] = None
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        # 수집 루프와 수동 실행이 같은 체크포인트 구간을 동시에 수집하지 않도록 직렬화
+        self._ingest_lock = asyncio.Lock()
         self.is_running = False
+        self.runs = 0
+        self.failures = 0
+        self.commits = 0
+        self.max_lag = 0.0
+        if coordinator is not None:
+            coordinator.add_membership_listener(self.rebalance)
+
+    @property
+    def analyzer(self):
+        return self.lazy_analyzer.get()
+
+    @property
+    def stock_price_service(self):
+        return self.lazy_prices.get()
+
+    async def close(self):
+        """만들어진 분석기와 가격 서비스의 네트워크 자원 정리"""
+        for lazy in (self.lazy_analyzer, self.lazy_prices):
+            if lazy.created:
+                await lazy.peek().close()
+
+    @property
+    def tickers(self) -> List[str]:
+        return sorted(self.schedule.states)
+
+    @property
+    def matcher(self) -> TickerMatcher:
+        """감시 목록이 바뀌었을 때만 다시 만듭니다."""
+        if self._matcher is None or self._matcher.tickers != self.watchlist:
+            self._matcher = TickerMatcher(sorted(self.watchlist))
+        return self._matcher
+
+    def owner_of(self, ticker: str) -> Optional[str]:
+        if self.coordinator is None:
+            return None
+        return rendezvous_owner(ticker, self.coordinator.nodes)
+
+    def owns(self, ticker: str) -> bool:
+        return self.coordinator is None or self.coordinator.owns(ticker)
+
+    @property
+    def is_ingestion_leader(self) -> bool:
+        return self.coordinator is None or self.coordinator.is_leader
 
     async def initialize_database(self):
-        """데이터베이스 연결 초기화"""
+        """데이터베이스 연결 초기화 (이미 연결된 공유 클라이언트는 재사용)"""
         await self.db_service.connect()
+        await self.analysis_cache.ensure_indexes()
+        await self.db_service.seed_watchlist(self.default_tickers)
+        await self.load_watchlist()
+
+    async def load_watchlist(self):
+        """MongoDB 감시 목록과 스케줄을 맞춥니다. (다른 프로세스의 변경 반영)"""
+        self.watchlist = set(await self.db_service.get_watchlist())
+        await self.rebalance()
+
+    async def rebalance(self):
+        """감시 목록 중 이 노드가 담당하는 티커로 스케줄을 맞춥니다. (노드 참여/이탈 시에도 호출)"""
+        added, removed = self.schedule.sync(ticker for ticker in self.watchlist if self.owns(ticker))
+        if added or removed:
+            logger.info(f"Schedule synced: +{len(added)} -{len(removed)} "
+                        f"({len(self.schedule)} of {len(self.watchlist)} tickers owned)")
+            self._wakeup.set()
+
+    async def add_ticker(self, ticker: str, source: str = 'manual') -> bool:
+        """감시 목록에 티커를 추가하고 바로 실행하도록 예약합니다. (source: manual / discovered)"""
+        ticker = ticker.upper()
+        added = await self.db_service.add_watchlist_ticker(ticker, source=source)
+        self.watchlist.add(ticker)
+        # 다른 노드 담당이면 그 노드가 감시 목록을 다시 읽을 때 예약됨
+        if self.owns(ticker) and ticker not in self.schedule.states:
+            self.schedule.add(ticker, due=time.time())
+            self._needs_seed.add(ticker)
+            self._wakeup.set()
+        return added
+
+    async def remove_ticker(self, ticker: str) -> bool:
+        ticker = ticker.upper()
+        removed = await self.db_service.remove_watchlist_ticker(ticker)
+        self.watchlist.discard(ticker)
+        self.schedule.remove(ticker)
+        self._needs_seed.discard(ticker)
+        return removed
+
+    async def analyze_ticker(self, ticker: str, posts: Optional[List[dict]] = None,
+                             require_analysis: bool = False, defer_save: bool = False) -> Dict[str, Any]:
+        """
+        단일 티커 파이프라인 (수집 → 분석 → 가격 → 집계 병합 → 저장).
+        posts 가 주어지면 Reddit 검색 없이 새 포스트(post_store 에서 읽은 relevance 포함 포스트)만 분석하여 기존 집계에 병합합니다.
+        require_analysis 이면 포스트를 하나도 분석하지 못했을 때 저장하지 않고 LLMUnavailableError 를 발생시킵니다.
+        defer_save 이면 저장하지 않고 결과의 'write' 에 save_stock_data_many 용 항목을 담습니다.
+        """
+        logger.info(f"Analyzing {ticker}...")
+        with span("analyze_ticker"):
+            return await self._analyze_ticker(ticker, posts, require_analysis, defer_save)
 
-    async def analyze_single_stock(self, ticker: str):
-        """단일 주식 분석"""
+    async def _analyze_ticker(self, ticker: str, posts: Optional[List[dict]],
+                              require_analysis: bool, defer_save: bool) -> Dict[str, Any]:
+        # Reddit 데이터 수집
+        if posts is None:
+            with span("reddit_search"):
+                found = await self.reddit_service.search_stock_mentions_async(ticker, limit=20)
+            with span("post_register"):
+                matcher = self.matcher
+                refs = await self.post_store.register({
+                    ticker: [{**post, 'relevance': matcher.match_post(post).get(ticker, BODY_RELEVANCE)} for post in found]
+                })
+                posts = await self.post_store.load(refs.get(ticker, []))
+
+        with span("db_read"):
+            existing = await self.db_service.get_stock_data(ticker)
+        if not posts and existing is None:
+            logger.info(f"No posts found for {ticker}")
+            return {"ticker": ticker, "new_posts": 0, "analyzed": 0, "unanalyzed": 0, "mentions": 0, "sentiment": None}
+
+        # 감정 분석 및 키워드 추출 (새 포스트만, 다른 티커에서 이미 분석된 포스트는 결과 재사용)
+        with span("analysis"):
+            analyzed_posts = await self.post_store.analyze(posts, self.analyzer) if posts else []
+
+        # 미분석 포스트는 집계에 넣지 않고 다음 주기에 다시 시도
+        scored_posts = [post for post in analyzed_posts if post.get('sentiment') is not None]
+        unanalyzed = len(analyzed_posts) - len(scored_posts)
+        if unanalyzed:
+            logger.warning(f"{unanalyzed} posts for {ticker} could not be analyzed")
+            if require_analysis and not scored_posts:
+                from services.llm_client import LLMUnavailableError
+                raise LLMUnavailableError(f"no posts for {ticker} could be analyzed")
+
+        # 주식 가격 데이터 가져오기 (호출 한도로 늦어지면 이전 값을 유지하고 조회는 캐시에 채워짐)
         try:
-            logger.info(f"Analyzing {ticker}...")
+            with span("price_lookup"):
+                price_change = await asyncio.wait_for(
+                    self.stock_price_service.get_stock_price_change(ticker), timeout=self.price_timeout
+                )
+        except asyncio.TimeoutError:
+            price_change = None
+        if price_change is None and existing:
+            price_change = existing.get('price_change_24h')
+
+        # 기간이 지난 포스트의 분석 결과는 posts 에서 읽음 (대부분 post_store 메모리에 있음)
+        now = time.time()
+        expired = expired_window_ids(existing, now, self.window_seconds)
+        analyses, rebuild = {}, False
+        if expired:
+            with span("post_lookup"):
+                analyses = await self.post_store.get_many(expired)
+                if len(analyses) < len(expired):
+                    # 보존 기간이 지나 삭제된 포스트가 있으면 남은 창 전체로 누적값을 다시 계산
+                    analyses = await self.post_store.get_many([entry['id'] for entry in existing['window']])
+                    rebuild = True
+
+        # 기존 집계에 새 포스트 병합 (기간이 지난 포스트는 제거)
+        with span("aggregate"):
+            aggregate = merge_ticker_aggregate(existing, scored_posts, now=now, window_seconds=self.window_seconds,
+                                               analyses=analyses, rebuild=rebuild)
+        new_count = aggregate.pop('new_posts')
 
-            # Reddit 데이터 수집
-            posts = self.reddit_service.search_stock_mentions(ticker, limit=20)
+        stock_data = {
+            "ticker": ticker,
+            **aggregate,
+            "price_change_24h": price_change
+        }
 
-            if not posts:
-                logger.info(f"No posts found for {ticker}")
-                return
+        result = {
+            "ticker": ticker,
+            "new_posts": new_count,
+            "analyzed": len(scored_posts),
+            "unanalyzed": unanalyzed,
+            "mentions": aggregate['mentions'],
+            "sentiment": aggregate['sentiment']
+        }
+        expected_version = existing.get('version', 0) if existing else 0
+        if defer_save:
+            result["write"] = {"ticker": ticker, "data": stock_data, "expected_version": expected_version}
+            return result
 
-            # OpenAI로 감정 분석 및 키워드 추출
-            analyzed_posts = self.openai_service.analyze_posts_batch(posts)
+        # 데이터베이스에 저장 (읽은 뒤 다른 노드가 저장했으면 StaleWriteError, 다음 실행에서 다시 병합)
+        with span("db_save"):
+            await self.db_service.save_stock_data(ticker, stock_data, expected_version=expected_version)
 
-            # 주식 가격 데이터 가져오기
-            price_change = await self.stock_price_service.get_stock_price_change(ticker)
+        logger.info(f"Merged {new_count} new posts into {ticker} ({aggregate['mentions']} in window)")
+        return result
 
-            # 모든 키워드 수집
-            all_keywords = []
-            total_sentiment = 0.0
+    async def ingest_new_posts(self) -> Tuple[List[dict], Dict[str, dict]]:
+        """
+        서브레딧별 체크포인트 이후의 새 포스트만 수집합니다.
+        (새 포스트 목록, 갱신할 체크포인트) 를 반환합니다.
+        """
+        checkpoints = await self.db_service.get_ingestion_checkpoints()
+        results = await asyncio.gather(
+            *(self.reddit_service.fetch_new_posts_async(subreddit, checkpoints.get(subreddit),
+                                                        max_age_hours=self.window_seconds // 3600,
+                                                        scan_limit=self.scan_limit)
+              for subreddit in SUBREDDITS),
+            return_exceptions=True
+        )
 
-            for post in analyzed_posts:
-                all_keywords.extend(post.get('keywords', []))
-                total_sentiment += post.get('sentiment', 0.0)
+        new_posts: List[dict] = []
+        new_checkpoints: Dict[str, dict] = {}
+        for subreddit, result in zip(SUBREDDITS, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error fetching new posts from r/{subreddit}: {str(result)}")
+                continue
+            new_posts.extend(result)
+            if result:
+                # 결과는 최신순이므로 첫 포스트가 새 high-water mark
+                new_checkpoints[subreddit] = {'fullname': result[0]['fullname'], 'created_utc': result[0]['created_utc']}
+        return new_posts, new_checkpoints
 
-            # 평균 감정 점수 계산
-            avg_sentiment = total_sentiment / len(analyzed_posts) if analyzed_posts else 0.0
+    async def ingest_to_pending(self) -> int:
+        """
+        새 포스트를 감시 목록과 매칭하여 티커별 대기 버퍼에 저장한 뒤 체크포인트를 전진합니다.
+        버퍼에 많이 쌓인 티커는 다음 실행을 앞당깁니다. 수집한 새 포스트 수를 반환합니다.
+        """
+        async with self._ingest_lock:
+            await self.reddit_budget.acquire(len(SUBREDDITS))
+            with span("reddit_ingest"):
+                new_posts, new_checkpoints = await self.ingest_new_posts()
+            with span("ticker_match"):
+                matcher = self.matcher
+                mentions: Dict[str, List[dict]] = {}
+                for post in new_posts:
+                    for ticker, relevance in matcher.match_post(post).items():
+                        mentions.setdefault(ticker, []).append({**post, 'relevance': relevance})
 
-            # 상위 키워드 추출 (빈도 기준)
-            from collections import Counter
-            keyword_counts = Counter(all_keywords)
-            top_keywords = [k for k, v in keyword_counts.most_common(5)]
+            # 포스트는 티커 수와 무관하게 한 번만 저장하고 버퍼에는 참조만 저장
+            with span("post_register"):
+                mentions = await self.post_store.register(mentions)
 
-            # 데이터 구조화
-            stock_data = {
-                "ticker": ticker,
-                "sentiment": round(avg_sentiment, 3),
-                "mentions": len(analyzed_posts),
-                "price_change_24h": price_change,
-                "key_words": top_keywords,
-                "posts": analyzed_posts
-            }
+            # 버퍼에 저장된 뒤에만 체크포인트 전진 (저장 실패 시 다음 수집에서 다시 읽음)
+            with span("pending_write"):
+                added = await self.db_service.add_pending_mentions(mentions)
+                for subreddit, checkpoint in new_checkpoints.items():
+                    await self.db_service.save_ingestion_checkpoint(subreddit, checkpoint['fullname'], checkpoint['created_utc'])
 
-            # 데이터베이스에 저장
-            await self.db_service.save_stock_data(ticker, stock_data)
+            for ticker, count in added.items():
+                if count >= self.urgent_pending:
+                    self.schedule.expedite(ticker)
+            if added:
+                self._wakeup.set()
+            logger.info(f"Ingested {len(new_posts)} new posts, buffered {sum(added.values())} mentions for {len(added)} tickers")
+            return len(new_posts)
 
-            logger.info(f"Successfully analyzed and saved data for {ticker}")
+    async def on_mention_spike(self, tickers: List[str]):
+        """
+        실시간 언급이 급증한 티커의 다음 실행을 앞당깁니다. (이 노드가 담당하는 티커만)
+        incremental 모드에서 수집 임대를 가진 노드는 수집 주기를 기다리지 않고 새 포스트를 먼저 수집합니다.
+        """
+        if self.is_running and self.ingestion_mode != 'search' and self.is_ingestion_leader:
+            await self.ingest_to_pending()
+        for ticker in tickers:
+            self.schedule.expedite(ticker)
+        self._wakeup.set()
 
+    async def run_ticker(self, ticker: str, defer_save: bool = False) -> Dict[str, Any]:
+        """
+        스케줄된 티커 한 번 실행 (대기 버퍼 또는 검색 → 분석 → 저장).
+        defer_save 이면 결과의 'write' 에 저장 항목과 저장 후 실행할 정리 작업('on_saved')을 담아 반환합니다.
+        """
+        seeding = self.ingestion_mode == 'search' or ticker in self._needs_seed
+        if seeding:
+            await self.reddit_budget.acquire(1)
+            await self.analysis_budget.acquire(20)
+            posts, refs = None, []
+        else:
+            with span("pending_read"):
+                refs = await self.db_service.get_pending_mentions(ticker, self.max_posts_per_run)
+                posts = await self.post_store.load(refs)
+            unanalyzed = sum(1 for post in posts if post.get('analysis_status') != 'analyzed')
+            if unanalyzed:
+                await self.analysis_budget.acquire(unanalyzed)
+        result = await self.analyze_ticker(ticker, posts=posts, defer_save=defer_save)
+
+        async def on_saved():
+            if seeding:
+                self._needs_seed.discard(ticker)
+            # 모두 분석되었을 때만 버퍼에서 제거 (일부 실패 시 다음 실행에서 캐시로 재시도, 병합은 id 로 중복 제거)
+            elif refs and result['unanalyzed'] == 0:
+                # 보존 기간이 지나 posts 에서 삭제된 참조도 함께 정리
+                await self.db_service.delete_pending_mentions(ticker, [ref['id'] for ref in refs])
+                if len(refs) >= self.max_posts_per_run:
+                    self.schedule.expedite(ticker)
+
+        if result.get('write') is not None:
+            result['write']['on_saved'] = on_saved
+        else:
+            await on_saved()
+        return result
+
+    def _record_outcome(self, state: TickerState, result: Optional[Dict[str, Any]], error: Optional[Exception] = None) -> bool:
+        """실행 결과에 따라 다음 실행 시각을 정합니다. 성공(모든 포스트 분석) 여부를 반환합니다."""
+        self.runs += 1
+        self._wakeup.set()
+        if error is not None:
+            logger.error(f"Error analyzing {state.ticker}: {str(error)}")
+            self.failures += 1
+            self.schedule.record_failure(state.ticker)
+            return False
+        if result['unanalyzed'] and not result['analyzed']:
+            self.failures += 1
+            self.schedule.record_failure(state.ticker)
+            return False
+        self.schedule.record(state.ticker, result['new_posts'], result.get('sentiment'))
+        return result['unanalyzed'] == 0
+
+    async def _run_claimed(self, state: TickerState) -> bool:
+        """
+        꺼낸 티커를 실행하고 결과에 따라 다음 실행 시각을 정합니다.
+        저장은 미뤄 두었다가 commit_window 안에 끝난 다른 티커의 결과와 함께 _commit_cycle 로 반영합니다.
+        """
+        async with self.profiler.run(state.ticker):
+            try:
+                result = await self.run_ticker(state.ticker, defer_save=True)
+            except Exception as e:
+                result = e
+            future = asyncio.get_running_loop().create_future()
+            self._commit_batch.append((state, result, future))
+            self._commit_added.set()
+            if self._commit_task is None:
+                self._commit_task = asyncio.create_task(self._flush_commits())
+            return await future
+
+    async def _flush_commits(self):
+        """commit_window 가 지나거나 실행 중인 티커가 모두 결과를 내면 모아 둔 결과를 한 번에 저장합니다."""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.commit_window
+        # _running 에는 저장을 기다리는 티커도 포함되므로, 같으면 더 기다릴 실행이 없음
+        while len(self._commit_batch) < len(self._running) and loop.time() < deadline:
+            self._commit_added.clear()
+            try:
+                await asyncio.wait_for(self._commit_added.wait(), timeout=deadline - loop.time())
+            except asyncio.TimeoutError:
+                break
+        batch, self._commit_batch, self._commit_task = self._commit_batch, [], None
+        try:
+            outcomes = await self._commit_cycle([state for state, _, _ in batch], [result for _, result, _ in batch])
+            self.commits += 1
+        except Exception as e:
+            logger.error(f"Error committing {len(batch)} scheduled runs: {str(e)}")
+            outcomes = [False] * len(batch)
+        for (_, _, future), ok in zip(batch, outcomes):
+            if not future.done():
+                future.set_result(ok)
+
+    async def _commit_cycle(self, states: List[TickerState], results: List[Any]) -> List[bool]:
+        """
+        사이클에서 미뤄 둔 저장을 한 번의 bulk write 로 반영한 뒤 티커별 정리 작업과 스케줄 갱신을 합니다.
+        다른 노드가 먼저 저장한 티커(stale)는 실패로 기록되어 다음 실행에서 다시 병합됩니다.
+        """
+        writes = [result['write'] for result in results if isinstance(result, dict) and result.get('write')]
+        try:
+            with span("db_save"):
+                rejected = await self.db_service.save_stock_data_many(writes)
         except Exception as e:
-            logger.error(f"Error analyzing {ticker}: {str(e)}")
+            rejected = {write['ticker']: str(e) for write in writes}
 
-    async def analyze_all_stocks(self):
-        """모든 주식 분석"""
+        outcomes = []
+        for state, result in zip(states, results):
+            if isinstance(result, Exception):
+                outcomes.append(self._record_outcome(state, None, result))
+                continue
+            write = result.pop('write', None)
+            if write is not None and write['ticker'] in rejected:
+                reason = rejected[write['ticker']]
+                error = StaleWriteError(f"{state.ticker} was updated by another writer") if reason == 'stale' else RuntimeError(reason)
+                outcomes.append(self._record_outcome(state, None, error))
+                continue
+            try:
+                if write is not None:
+                    await write['on_saved']()
+            except Exception as e:
+                logger.error(f"Error cleaning up after {state.ticker}: {str(e)}")
+            outcomes.append(self._record_outcome(state, result))
+        return outcomes
+
+    async def analyze_all_stocks(self) -> Dict[str, Any]:
+        """감시 목록 전체를 지금 실행합니다. (수동 실행, 이미 실행 중인 티커는 건너뜀)"""
         logger.info("Starting batch analysis of all stocks...")
-        tasks = []
+        async with self.profiler.cycle('analyze_all_stocks'):
+            with span("cycle"):
+                ingest = self.ingestion_mode != 'search' and self.is_ingestion_leader
+                new_posts = await self.ingest_to_pending() if ingest else 0
 
-        for ticker in self.tickers:
-            tasks.append(self.analyze_single_stock(ticker))
+                states = [state for state in (self.schedule.claim(ticker) for ticker in self.tickers) if state]
+                self.stock_price_service.prefetch([state.ticker for state in states])
+                semaphore = asyncio.Semaphore(self.max_concurrency)
 
-        await asyncio.gather(*tasks)
-        logger.info("Batch analysis completed")
+                async def run(state: TickerState) -> Any:
+                    async with semaphore:
+                        try:
+                            return await self.run_ticker(state.ticker, defer_save=True)
+                        except Exception as e:
+                            return e
 
-    async def scheduled_task(self):
-        """주기적으로 실행되는 작업"""
+                # 분석은 동시에 실행하고 저장은 사이클 전체를 한 번의 bulk write 로
+                prepared = await asyncio.gather(*(run(state) for state in states))
+                results = await self._commit_cycle(states, prepared)
+        logger.info(f"Batch analysis completed ({len(states)} tickers, {new_posts} new posts)")
+        return {
+            "tickers": len(self.schedule),
+            "watchlist": len(self.watchlist),
+            "analyzed_tickers": len(states),
+            "new_posts": new_posts,
+            "failed": [state.ticker for state, ok in zip(states, results) if not ok]
+        }
+
+    async def _dispatch_loop(self):
+        """실행 시각이 된 티커를 동시 실행 한도 안에서 꺼내 실행합니다."""
         while self.is_running:
-            try:
-                now = datetime.now()
-                logger.info(f"Scheduled task running at {now}")
+            self._wakeup.clear()
+            now = time.time()
+            due = self.schedule.pop_due(now, self.max_concurrency - len(self._running))
+            if due:
+                # 함께 꺼낸 티커의 가격은 공급자 호출 한 번으로 미리 조회 (티커별 조회는 그 결과를 기다림)
+                self.stock_price_service.prefetch([state.ticker for _, state in due])
+            for due_at, state in due:
+                self.max_lag = max(self.max_lag, now - due_at)
+                task = asyncio.create_task(self._run_claimed(state))
+                self._running.add(task)
+                task.add_done_callback(self._running.discard)
 
-                await self.analyze_all_stocks()
+            next_due = self.schedule.next_due_at()
+            timeout = self.schedule.max_interval if next_due is None else max(0.0, next_due - time.time())
+            if len(self._running) >= self.max_concurrency:
+                timeout = self.schedule.max_interval  # 빈 슬롯이 생기면 깨어남
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
 
-                # 다음 실행까지 대기 (1시간)
-                await asyncio.sleep(3600)
+    async def _ingest_loop(self):
+        while self.is_running:
+            try:
+                if self.is_ingestion_leader:
+                    await self.ingest_to_pending()
+            except Exception as e:
+                logger.error(f"Error in ingestion loop: {str(e)}")
+            await asyncio.sleep(self.ingest_interval)
 
+    async def _watchlist_loop(self):
+        while self.is_running:
+            await asyncio.sleep(self.watchlist_refresh_interval)
+            try:
+                await self.load_watchlist()
             except Exception as e:
-                logger.error(f"Error in scheduled task: {str(e)}")
-                await asyncio.sleep(60)  # 오류 시 1분 대기
+                logger.error(f"Error refreshing watchlist: {str(e)}")
 
     async def start_scheduler(self):
         """스케줄러 시작"""
@@ -110,19 +551,44 @@ class SchedulerService:
 
         await self.initialize_database()
         self.is_running = True
-        logger.info("Starting scheduler service")
+        logger.info(f"Starting scheduler service ({len(self.schedule)} tickers, mode={self.ingestion_mode})")
 
         # 백그라운드에서 스케줄러 실행
-        asyncio.create_task(self.scheduled_task())
+        self._tasks = [asyncio.create_task(self._dispatch_loop()), asyncio.create_task(self._watchlist_loop())]
+        if self.ingestion_mode != 'search':
+            self._tasks.append(asyncio.create_task(self._ingest_loop()))
 
     async def stop_scheduler(self):
-        """스케줄러 중지"""
+        """스케줄러 중지 (DB 연결은 lifespan 에서 해제)"""
         self.is_running = False
-        await self.db_service.disconnect()
+        tasks = self._tasks + list(self._running) + ([self._commit_task] if self._commit_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+        self._commit_batch, self._commit_task = [], None
         logger.info("Scheduler stopped")
 
-    async def manual_run(self):
+    async def manual_run(self) -> Dict[str, Any]:
         """수동 실행"""
         await self.initialize_database()
-        await self.analyze_all_stocks()
-        await self.db_service.disconnect()
\ No newline at end of file
+        return await self.analyze_all_stocks()
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.time()
+        next_due = self.schedule.next_due_at()
+        return {
+            "mode": self.ingestion_mode,
+            "watchlist": len(self.watchlist),
+            "tickers": len(self.schedule),
+            "ingestion_leader": self.is_ingestion_leader,
+            "running": len(self._running),
+            "overdue": self.schedule.due_count(now),
+            "next_due_in": round(next_due - now, 1) if next_due is not None else None,
+            "max_lag_seconds": round(self.max_lag, 2),
+            "runs": self.runs,
+            "failures": self.failures,
+            "commits": self.commits,
+            "reddit_budget_wait": round(self.reddit_budget.wait_time(1), 2),
+            "analysis_budget_wait": round(self.analysis_budget.wait_time(1), 2),
+        }
@@ -0,0 +1,244 @@
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+import logging
+from services.database_service import DatabaseService, FULL_PROJECTION
+from services.post_store import PostStore
+
+try:
+    import orjson
+except ImportError:  # orjson 이 없으면 표준 json 사용
+    orjson = None
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CACHE_PROJECTION = {**FULL_PROJECTION, 'version': 1}
+DEFAULT_POSTS_LIMIT = 20
+
+
+def _json_default(value: Any):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """응답 본문 직렬화 (orjson 우선)"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, default=_json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def sort_posts(posts: List[Dict[str, Any]], sort_by: str, descending: bool) -> List[Dict[str, Any]]:
+    """값이 없는 포스트(미분석 sentiment 등)는 정렬 방향과 관계없이 뒤로 보냅니다."""
+    present = [post for post in posts if post.get(sort_by) is not None]
+    missing = [post for post in posts if post.get(sort_by) is None]
+    return sorted(present, key=lambda post: post[sort_by], reverse=descending) + missing
+
+
+class SnapshotCache:
+    """
+    읽기 API 응답을 미리 직렬화해 두는 프로세스 내 캐시.
+    - 같은 프로세스의 저장은 DatabaseService 쓰기 리스너로 즉시 반영
+    - 다른 레플리카의 저장은 공유 버전 카운터(meta 컬렉션)를 폴링하여 변경된 티커만 다시 읽음
+    직렬화 결과는 데이터가 바뀐 뒤 첫 요청에서 한 번만 만들어지고, 이후 요청은 DB 에 접근하지 않습니다.
+    티커 문서의 포스트 참조는 캐시에 넣을 때 post_store 로 본문과 분석 결과를 채웁니다.
+    """
+
+    def __init__(self, db_service: DatabaseService, poll_interval: Optional[float] = None,
+                 full_resync_interval: Optional[float] = None, post_store: Optional[PostStore] = None):
+        self.db_service = db_service
+        self.post_store = post_store or PostStore(db_service)
+        self.poll_interval = poll_interval or float(os.getenv('SNAPSHOT_POLL_INTERVAL', '1'))
+        self.full_resync_interval = full_resync_interval or float(os.getenv('SNAPSHOT_FULL_RESYNC_INTERVAL', '300'))
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+        self.ready = False
+        self._list_bytes: Dict[str, bytes] = {}
+        self._detail_bytes: Dict[str, bytes] = {}
+        # bump 와 저장 사이의 경합을 흡수하기 위해 한 폴링 주기만큼 겹쳐 다시 읽음
+        self._low_water = 0
+        self._prev_seen = 0
+        self._last_full_sync = 0.0
+        self._load_lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self._change_listeners: List[Callable[[str, Dict[str, Any]], None]] = []
+        db_service.add_write_listener(self._on_local_write)
+
+    def add_change_listener(self, listener: Callable[[str, Dict[str, Any]], None]):
+        """티커 문서가 새 버전으로 바뀔 때마다 동기적으로 호출될 콜백 (ticker, doc) 등록"""
+        self._change_listeners.append(listener)
+
+    async def start(self):
+        try:
+            await self.load_all()
+        except Exception as e:
+            logger.error(f"Initial snapshot load failed: {str(e)}")
+        self._task = asyncio.create_task(self._poll_loop())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def ensure_ready(self):
+        if not self.ready:
+            await self.load_all()
+
+    async def load_all(self):
+        """전체 티커를 다시 읽어 캐시를 교체합니다. (삭제된 티커 반영)"""
+        async with self._load_lock:
+            version = await self.db_service.get_data_version()
+            docs = await self.hydrate(await self.db_service.get_all_stock_data(CACHE_PROJECTION))
+            previous, was_ready = self.docs, self.ready
+            self.docs = {doc['ticker']: doc for doc in docs}
+            # ETag 가 캐시 내용과 어긋나지 않도록 버전은 실제로 반영한 문서에서만 가져옴
+            # (공유 카운터는 저장보다 먼저 증가하므로 아직 쓰이지 않은 버전일 수 있음)
+            self.version = max([0] + [doc.get('version', 0) for doc in docs])
+            self._low_water = self._prev_seen = version
+            self._list_bytes.clear()
+            self._detail_bytes.clear()
+            self._last_full_sync = time.monotonic()
+            self.ready = True
+            if was_ready:
+                # 폴링에서 놓친 변경도 전체 재동기화 시 구독자에게 전달
+                for doc in docs:
+                    current = previous.get(doc['ticker'])
+                    if current is None or current.get('version', 0) < doc.get('version', 0):
+                        self._notify(doc['ticker'], doc)
+            logger.info(f"Loaded snapshot of {len(docs)} tickers at version {self.version}")
+
+    async def hydrate(self, docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """포스트 참조를 포스트 본문(+티커별 relevance)으로 바꾼 문서 복사본. 보존 기간이 지난 포스트는 빠집니다."""
+        post_ids = [ref['id'] for doc in docs for ref in doc.get('posts', [])]
+        if not post_ids:
+            return docs
+        posts = await self.post_store.get_many(post_ids)
+        return [
+            {**doc, 'posts': [
+                {**ref, **posts[ref['id']], 'relevance': ref.get('relevance')}
+                for ref in doc['posts'] if ref['id'] in posts
+            ]} if doc.get('posts') else doc
+            for doc in docs
+        ]
+
+    def _apply(self, doc: Dict[str, Any]) -> bool:
+        ticker = doc['ticker']
+        current = self.docs.get(ticker)
+        if current is not None and current.get('version', 0) >= doc.get('version', 0):
+            return False
+        self.docs[ticker] = {key: doc[key] for key in CACHE_PROJECTION if key in doc}
+        self.version = max(self.version, doc.get('version', 0))
+        self._detail_bytes.pop(ticker, None)
+        self._list_bytes.clear()
+        self._notify(ticker, self.docs[ticker])
+        return True
+
+    def _notify(self, ticker: str, doc: Dict[str, Any]):
+        for listener in self._change_listeners:
+            try:
+                listener(ticker, doc)
+            except Exception as e:
+                logger.error(f"Snapshot change listener failed for {ticker}: {str(e)}")
+
+    async def _on_local_write(self, ticker: str, data: Dict[str, Any]):
+        if self.ready:
+            for doc in await self.hydrate([data]):
+                self._apply(doc)
+
+    async def poll_once(self):
+        """공유 버전이 바뀌었으면 변경된 티커만 다시 읽습니다."""
+        if not self.ready or time.monotonic() - self._last_full_sync >= self.full_resync_interval:
+            await self.load_all()
+            return
+
+        seen = await self.db_service.get_data_version()
+        if seen > self._low_water:
+            changed = await self.hydrate(await self.db_service.get_stock_data_since(self._low_water, CACHE_PROJECTION))
+            applied = sum(1 for doc in changed if self._apply(doc))
+            if applied:
+                logger.info(f"Snapshot refreshed {applied} tickers up to version {self.version}")
+        self._low_water, self._prev_seen = self._prev_seen, seen
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                await self.poll_once()
+            except Exception as e:
+                logger.error(f"Snapshot poll failed: {str(e)}")
+
+    @staticmethod
+    def summary(doc: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "sentiment": doc.get('sentiment', 0.0),
+            "mentions": doc.get('mentions', 0),
+            "price_change_24h": doc.get('price_change_24h'),
+            "key_words": doc.get('key_words', [])
+        }
+
+    def list_response(self, fields: str = 'full') -> bytes:
+        """GET /stocks 응답 본문. 데이터가 바뀐 뒤 처음 호출될 때만 직렬화합니다."""
+        body = self._list_bytes.get(fields)
+        if body is None:
+            stocks = {}
+            for ticker in sorted(self.docs):
+                doc = self.docs[ticker]
+                stocks[ticker] = self.summary(doc)
+                if fields == 'full':
+                    stocks[ticker]["posts"] = doc.get('posts', [])
+            body = dumps({
+                "timestamp": int(time.time()),
+                "stocks": stocks,
+                "total_mentions": sum(doc.get('mentions', 0) for doc in self.docs.values()),
+                "status": "success"
+            })
+            self._list_bytes[fields] = body
+        return body
+
+    def detail_response(self, ticker: str, offset: int = 0, limit: int = DEFAULT_POSTS_LIMIT,
+                        sort_by: str = 'score', descending: bool = True) -> Optional[bytes]:
+        """GET /stocks/{ticker} 응답 본문. 기본 페이지는 미리 직렬화된 값을 재사용합니다."""
+        doc = self.docs.get(ticker)
+        if doc is None:
+            return None
+
+        is_default = (offset, limit, sort_by, descending) == (0, DEFAULT_POSTS_LIMIT, 'score', True)
+        if is_default and ticker in self._detail_bytes:
+            return self._detail_bytes[ticker]
+
+        posts = doc.get('posts', [])
+        page = sort_posts(posts, sort_by, descending)[offset:offset + limit]
+        body = dumps({
+            "timestamp": int(time.time()),
+            "ticker": ticker,
+            "data": {
+                **self.summary(doc),
+                "posts": page,
+                "posts_total": len(posts),
+                "posts_offset": offset,
+                "posts_limit": limit
+            },
+            "status": "success"
+        })
+        if is_default:
+            self._detail_bytes[ticker] = body
+        return body
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "version": self.version,
+            "tickers": len(self.docs),
+            "serialized_lists": len(self._list_bytes),
+            "serialized_details": len(self._detail_bytes),
+            "encoder": "orjson" if orjson is not None else "json",
+        }
@@ -1,65 +1,232 @@
-import aiohttp
+import asyncio
 import os
-from typing import Dict, Any, Optional
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
 import logging
+import numpy as np
+from services.price_providers import (
+    BasePriceProvider, PriceSeries, PriceRateLimitError, create_price_provider
+)
+from services.rate_limiter import TokenBucket
+from services.metrics import record_call, span
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DAY_SECONDS = 86400
+# 세그먼트 번호를 더해 여러 티커의 시계열을 하나의 정렬된 배열로 합칠 때 사용하는 간격 (유닉스 시간보다 큼)
+SEGMENT_STRIDE = 1e11
+
+
+def compute_intraday_stats(series: Dict[str, PriceSeries], window_seconds: int = DAY_SECONDS) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 티커의 시계열을 한 번에 이어 붙여 24시간 변동과 구간 통계를 벡터 연산으로 계산합니다.
+    기준가는 마지막 시각에서 window_seconds 이전 또는 그 직전의 종가입니다. (거래 시간 외 구간 고려)
+    """
+    tickers = [ticker for ticker, value in series.items() if value is not None and len(value[0])]
+    if not tickers:
+        return {}
+
+    lengths = np.array([len(series[ticker][0]) for ticker in tickers])
+    ends = np.cumsum(lengths)
+    starts = ends - lengths
+    segment = np.repeat(np.arange(len(tickers)), lengths)
+    timestamps = np.concatenate([series[ticker][0] for ticker in tickers])
+    closes = np.concatenate([series[ticker][1] for ticker in tickers])
+    volumes = np.concatenate([series[ticker][2] for ticker in tickers])
+
+    # 세그먼트별로 정렬된 키에서 한 번의 searchsorted 로 티커별 기준 시점을 찾음
+    keys = segment * SEGMENT_STRIDE + timestamps
+    last_ts = timestamps[ends - 1]
+    cutoff = last_ts - window_seconds
+    base_index = np.searchsorted(keys, np.arange(len(tickers)) * SEGMENT_STRIDE + cutoff, side='right') - 1
+    base_index = np.maximum(base_index, starts)
+
+    last = closes[ends - 1]
+    base = closes[base_index]
+    change = np.round((last / base - 1.0) * 100.0, 2)
+
+    # 기준 시점 이후 구간의 고가/저가/VWAP/변동성
+    in_window = timestamps >= cutoff[segment]
+    window_closes = np.where(in_window, closes, np.nan)
+    high = np.fmax.reduceat(window_closes, starts)
+    low = np.fmin.reduceat(window_closes, starts)
+    window_volumes = np.where(in_window, volumes, 0.0)
+    volume_sum = np.add.reduceat(window_volumes, starts)
+    vwap = np.add.reduceat(window_volumes * closes, starts) / np.where(volume_sum > 0, volume_sum, np.nan)
+
+    log_returns = np.diff(np.log(closes), prepend=np.nan)
+    log_returns[starts] = np.nan  # 티커 경계의 수익률 제외
+    log_returns = np.where(in_window, log_returns, np.nan)
+    valid = ~np.isnan(log_returns)
+    count = np.add.reduceat(valid.astype(np.int64), starts)
+    returns = np.where(valid, log_returns, 0.0)
+    mean = np.add.reduceat(returns, starts) / np.maximum(count, 1)
+    variance = np.add.reduceat(np.where(valid, (returns - mean[segment]) ** 2, 0.0), starts) / np.maximum(count - 1, 1)
+    volatility = np.sqrt(variance) * np.sqrt(count) * 100.0
+
+    def clean(value: float, digits: int = 2) -> Optional[float]:
+        return None if np.isnan(value) else round(float(value), digits)
+
+    return {
+        ticker: {
+            "last": clean(last[i], 4),
+            "change_24h": clean(change[i]),
+            "high_24h": clean(high[i], 4),
+            "low_24h": clean(low[i], 4),
+            "vwap_24h": clean(vwap[i], 4),
+            "volatility_24h": clean(volatility[i], 3),
+            "points": int(lengths[i]),
+            "as_of": float(last_ts[i]),
+        }
+        for i, ticker in enumerate(tickers)
+    }
+
+
 class StockPriceService:
-    def __init__(self):
-        # 무료 주식 API 사용 (Alpha Vantage 등)
-        self.api_key = os.getenv('ALPHA_VANTAGE_API_KEY', 'demo')  # demo 키로 제한적 사용 가능
-        self.base_url = "https://www.alphavantage.co/query"
+    """
+    가격 시계열 캐시와 공급자 호출 관리.
+    - 티커별 시계열을 PRICE_CACHE_TTL_SECONDS 동안 캐시 (실패는 짧게 캐시하여 반복 호출 방지)
+    - 같은 티커를 동시에 요청하면 한 번만 가져옴
+    - 캐시에 없는 티커는 공급자의 배치 크기로 묶고 분당 호출 한도(PRICE_CALLS_PER_MINUTE) 안에서 가져옴
+    - 스케줄러는 함께 실행할 티커를 prefetch 로 미리 넘겨 티커별 조회가 배치 호출 하나를 함께 씀
+    """
+
+    def __init__(self, provider: Optional[BasePriceProvider] = None):
+        self.provider = provider or create_price_provider()
+        self.cache_ttl = float(os.getenv('PRICE_CACHE_TTL_SECONDS', '300'))
+        self.failure_ttl = float(os.getenv('PRICE_FAILURE_TTL_SECONDS', '60'))
+        self.max_entries = int(os.getenv('PRICE_CACHE_MAX_ENTRIES', '5000'))
+        self.call_budget = TokenBucket(float(os.getenv('PRICE_CALLS_PER_MINUTE', '5' if self.provider.max_batch == 1 else '600')))
+        # ticker -> (만료 시각, 시계열 또는 None)
+        self._cache: "OrderedDict[str, Tuple[float, Optional[PriceSeries]]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._fetch_tasks = set()
+        self.hits = 0
+        self.misses = 0
+        self.provider_calls = 0
+
+    async def close(self):
+        await self.provider.close()
+
+    def _cached(self, ticker: str) -> Tuple[bool, Optional[PriceSeries]]:
+        entry = self._cache.get(ticker)
+        if entry is None or entry[0] < time.monotonic():
+            return False, None
+        self._cache.move_to_end(ticker)
+        return True, entry[1]
+
+    def _store(self, ticker: str, value: Optional[PriceSeries]):
+        ttl = self.cache_ttl if value is not None else self.failure_ttl
+        self._cache[ticker] = (time.monotonic() + ttl, value)
+        self._cache.move_to_end(ticker)
+        while len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+
+    async def _fetch_chunk(self, tickers: List[str]):
+        """공급자 호출 한 번 (호출 한도 대기 포함). 결과는 대기 중인 Future 들에 전달"""
+        try:
+            await self.call_budget.acquire(1)
+            self.provider_calls += 1
+            with span("price_fetch"):
+                results = await self.provider.fetch_series(tickers)
+            record_call(self.provider.name)
+        except PriceRateLimitError as e:
+            logger.warning(f"{self.provider.name} price provider rate limited: {str(e)}")
+            record_call(self.provider.name, 'rate_limited')
+            self.call_budget.adjust(self.call_budget.capacity)  # 남은 토큰을 비워 한동안 호출 중단
+            results = {}
+        except Exception as e:
+            logger.error(f"Error fetching prices for {', '.join(tickers)}: {str(e)}")
+            record_call(self.provider.name, 'error')
+            results = {}
+
+        for ticker in tickers:
+            value = results.get(ticker)
+            self._store(ticker, value)
+            future = self._inflight.pop(ticker, None)
+            if future is not None and not future.done():
+                future.set_result(value)
+
+    def _lookup(self, tickers: List[str], count: bool = True) -> Tuple[Dict[str, Optional[PriceSeries]], Dict[str, asyncio.Future]]:
+        """
+        캐시와 진행 중인 조회에서 찾고, 나머지는 공급자의 배치 크기로 묶어 조회를 시작합니다.
+        (캐시에서 찾은 값, 기다릴 Future) 를 반환합니다. count 가 아니면 hits/misses 에 세지 않습니다.
+        """
+        found: Dict[str, Optional[PriceSeries]] = {}
+        waiting: Dict[str, asyncio.Future] = {}
+        missing: List[str] = []
+        loop = asyncio.get_running_loop()
+
+        for ticker in dict.fromkeys(t.upper() for t in tickers):
+            hit, value = self._cached(ticker)
+            if hit:
+                self.hits += count
+                found[ticker] = value
+            elif ticker in self._inflight:
+                waiting[ticker] = self._inflight[ticker]
+            else:
+                self.misses += count
+                future = loop.create_future()
+                self._inflight[ticker] = waiting[ticker] = future
+                missing.append(ticker)
+
+        batch = self.provider.max_batch
+        for i in range(0, len(missing), batch):
+            task = asyncio.create_task(self._fetch_chunk(missing[i:i + batch]))
+            self._fetch_tasks.add(task)
+            task.add_done_callback(self._fetch_tasks.discard)
+        return found, waiting
+
+    def prefetch(self, tickers: List[str]):
+        """
+        곧 실행할 티커들의 시계열 조회를 배치로 미리 시작합니다. (기다리지 않음)
+        이후 티커별 조회는 캐시나 진행 중인 조회를 기다리므로 공급자 호출을 함께 씁니다.
+        티커당 한 번 호출하는 공급자(max_batch 1)는 아낄 호출이 없으므로 가격이 필요한 티커만 그때 조회합니다.
+        """
+        if self.provider.max_batch > 1:
+            self._lookup(tickers, count=False)
+
+    async def get_series(self, tickers: List[str]) -> Dict[str, Optional[PriceSeries]]:
+        """티커별 시계열 (캐시 → 진행 중인 조회 → 공급자 순)"""
+        found, waiting = self._lookup(tickers)
+        if waiting:
+            # 호출자가 시간 초과로 취소해도 같은 티커를 기다리는 다른 호출자와 조회 자체는 계속 진행
+            values = await asyncio.gather(*(asyncio.shield(future) for future in waiting.values()))
+            found.update(zip(waiting.keys(), values))
+        return found
 
     async def get_stock_price_change(self, ticker: str) -> Optional[float]:
         """
         주식의 24시간 가격 변동을 퍼센트로 반환합니다.
-        실제 구현에서는 유료 주식 API를 사용하는 것이 좋습니다.
         """
-        try:
-            # 현재는 시뮬레이션된 데이터 반환
-            # 실제로는 Alpha Vantage나 다른 주식 API를 사용
-            import random
-            price_change = round(random.uniform(-5.0, 5.0), 2)
-            return price_change
-
-        except Exception as e:
-            logger.error(f"Error getting stock price for {ticker}: {str(e)}")
-            return None
+        stats = await self.get_intraday_data(ticker)
+        return stats['change_24h'] if stats else None
 
     async def get_intraday_data(self, ticker: str) -> Optional[Dict[str, Any]]:
         """
-        주식의 인트라데이 데이터를 가져옵니다.
+        주식의 인트라데이 통계(최근가, 24시간 변동, 고가/저가, VWAP, 변동성)를 반환합니다.
         """
-        try:
-            params = {
-                'function': 'TIME_SERIES_INTRADAY',
-                'symbol': ticker,
-                'interval': '5min',
-                'apikey': self.api_key
-            }
-
-            async with aiohttp.ClientSession() as session:
-                async with session.get(self.base_url, params=params) as response:
-                    if response.status == 200:
-                        data = await response.json()
-                        return data
-                    else:
-                        logger.warning(f"Alpha Vantage API returned status {response.status}")
-                        return None
+        stats = await self.get_intraday_batch([ticker])
+        return stats.get(ticker.upper())
 
+    async def get_intraday_batch(self, tickers: List[str]) -> Dict[str, Dict[str, Any]]:
+        """여러 티커의 인트라데이 통계를 한 번에 계산합니다."""
+        try:
+            series = await self.get_series(tickers)
+            return compute_intraday_stats(series)
         except Exception as e:
-            logger.error(f"Error fetching intraday data for {ticker}: {str(e)}")
-            return None
+            logger.error(f"Error computing intraday stats: {str(e)}")
+            return {}
 
-    async def get_batch_price_changes(self, tickers: list) -> Dict[str, float]:
-        """
-        여러 티커의 가격 변동을 일괄 조회합니다.
-        """
-        results = {}
-        for ticker in tickers:
-            change = await self.get_stock_price_change(ticker)
-            if change is not None:
-                results[ticker] = change
-        return results
\ No newline at end of file
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "provider": self.provider.name,
+            "cached": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else None,
+            "provider_calls": self.provider_calls,
+        }
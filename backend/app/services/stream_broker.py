@@ -0,0 +1,128 @@
+import asyncio
+import os
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Set, Tuple
+import logging
+from services.snapshot_cache import SnapshotCache, dumps
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 구독자별로 보낼 이벤트 수는 티커 수를 넘지 않음 (같은 티커의 밀린 이벤트는 최신 것으로 합쳐짐)
+DELTA_FIELDS = ['sentiment', 'mentions', 'analyzed_mentions', 'price_change_24h', 'key_words', 'last_updated']
+
+
+class Subscriber:
+    """SSE 연결 하나의 구독 상태"""
+
+    def __init__(self, tickers: Optional[Set[str]]):
+        self.tickers = tickers
+        # ticker -> (version, 직렬화된 이벤트). 느린 클라이언트는 티커별 최신 이벤트만 받음
+        self.pending: "OrderedDict[str, Tuple[int, bytes]]" = OrderedDict()
+        self.wakeup = asyncio.Event()
+        self.coalesced = 0
+
+    def wants(self, ticker: str) -> bool:
+        return self.tickers is None or ticker in self.tickers
+
+    def push(self, ticker: str, version: int, message: bytes):
+        if ticker in self.pending:
+            self.coalesced += 1
+            del self.pending[ticker]
+        self.pending[ticker] = (version, message)
+        self.wakeup.set()
+
+    def drain(self) -> bytes:
+        """밀린 이벤트를 버전 순으로 한 청크로 묶어 반환"""
+        messages = sorted(self.pending.values(), key=lambda item: item[0])
+        self.pending.clear()
+        self.wakeup.clear()
+        return b"".join(message for _, message in messages)
+
+
+class StreamBroker:
+    """
+    스냅샷 캐시의 티커 변경을 SSE 구독자에게 전달합니다.
+    - 이벤트는 변경마다 한 번만 직렬화되어 모든 구독자가 같은 바이트를 공유
+    - 이벤트 id 는 공유 데이터 버전이므로 다른 레플리카로 재접속해도 Last-Event-ID 로 이어받기 가능
+    - 소비가 느린 구독자는 큐가 쌓이지 않고 티커별 최신 값으로 합쳐짐 (메모리는 티커 수로 제한)
+    """
+
+    def __init__(self, snapshot_cache: SnapshotCache, max_subscribers: Optional[int] = None,
+                 keepalive_seconds: Optional[float] = None):
+        self.snapshot_cache = snapshot_cache
+        self.max_subscribers = max_subscribers or int(os.getenv('SSE_MAX_SUBSCRIBERS', '1000'))
+        self.keepalive_seconds = keepalive_seconds or float(os.getenv('SSE_KEEPALIVE_SECONDS', '15'))
+        self.subscribers: Set[Subscriber] = set()
+        self.closed = False
+        self.events_published = 0
+        snapshot_cache.add_change_listener(self.publish)
+
+    @staticmethod
+    def format_event(ticker: str, doc: Dict[str, Any]) -> Tuple[int, bytes]:
+        version = doc.get('version', 0)
+        payload = {"ticker": ticker, "version": version, **{key: doc.get(key) for key in DELTA_FIELDS}}
+        return version, b"id: %d\nevent: stock\ndata: %s\n\n" % (version, dumps(payload))
+
+    def publish(self, ticker: str, doc: Dict[str, Any]):
+        """스냅샷 변경 콜백. 구독 중인 연결에 티커 델타를 전달합니다."""
+        if not self.subscribers:
+            return
+        version, message = self.format_event(ticker, doc)
+        self.events_published += 1
+        for subscriber in self.subscribers:
+            if subscriber.wants(ticker):
+                subscriber.push(ticker, version, message)
+
+    def subscribe(self, tickers: Optional[Set[str]] = None, last_event_id: Optional[int] = None) -> Subscriber:
+        """
+        구독자를 등록합니다. 구독자 수 한도를 넘으면 OverflowError 를 발생시킵니다.
+        last_event_id 가 주어지면 그 이후 버전으로 바뀐 티커의 현재 값을 먼저 보냅니다.
+        """
+        if len(self.subscribers) >= self.max_subscribers:
+            raise OverflowError("too many stream subscribers")
+        subscriber = Subscriber(tickers)
+        if last_event_id is not None:
+            for ticker, doc in self.snapshot_cache.docs.items():
+                if subscriber.wants(ticker) and doc.get('version', 0) > last_event_id:
+                    subscriber.push(ticker, *self.format_event(ticker, doc))
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        self.subscribers.discard(subscriber)
+
+    async def events(self, subscriber: Subscriber,
+                     is_disconnected: Callable[[], Awaitable[bool]]) -> AsyncIterator[bytes]:
+        """SSE 본문 스트림. 이벤트가 없으면 keepalive 주석을 보내고 연결 종료를 확인합니다."""
+        try:
+            yield b"retry: 3000\n\n"
+            while not self.closed:
+                if not subscriber.pending:
+                    try:
+                        await asyncio.wait_for(subscriber.wakeup.wait(), timeout=self.keepalive_seconds)
+                    except asyncio.TimeoutError:
+                        if await is_disconnected():
+                            break
+                        yield b": keepalive\n\n"
+                        continue
+                if self.closed:
+                    break
+                chunk = subscriber.drain()
+                if chunk:
+                    yield chunk
+        finally:
+            self.unsubscribe(subscriber)
+
+    def close(self):
+        """애플리케이션 종료 시 열린 스트림을 모두 끝냄"""
+        self.closed = True
+        for subscriber in list(self.subscribers):
+            subscriber.wakeup.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": len(self.subscribers),
+            "events_published": self.events_published,
+            "coalesced": sum(subscriber.coalesced for subscriber in self.subscribers),
+        }
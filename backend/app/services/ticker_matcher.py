@@ -0,0 +1,76 @@
+import re
+from typing import Dict, Iterable, List, Set
+
+# 일반 영어 단어와 겹치는 심볼. 이런 심볼은 캐시태그($IT)로 쓰였을 때만 인정합니다.
+AMBIGUOUS_SYMBOLS = frozenset({
+    "A", "I", "AI", "ALL", "AM", "AN", "ANY", "ARE", "AS", "AT", "BE", "BIG", "BY",
+    "CAN", "CEO", "DD", "DO", "EDIT", "EOD", "EPS", "FOR", "GO", "HAS", "HE", "IMO",
+    "IN", "IPO", "IS", "IT", "ITS", "LOVE", "MAN", "ME", "MY", "NEW", "NOW", "OF",
+    "ON", "ONE", "OPEN", "OR", "OUT", "PM", "RUN", "SEE", "SO", "TA", "THE", "TO",
+    "TV", "UK", "UP", "US", "USA", "WE", "YOLO", "YOU",
+})
+
+# 포스트와 티커의 관련도: 제목에 언급되면 1.0, 본문에만 있으면 0.5 를 함께 언급된 티커 수로 나눔
+TITLE_RELEVANCE = 1.0
+BODY_RELEVANCE = 0.5
+
+# 캐시태그($aapl) 또는 독립된 심볼 토큰(AAPL, BRK.B)
+_TOKEN_RE = re.compile(r"(?<![\w$])(\$)?([A-Za-z]{1,5}(?:\.[A-Za-z])?)(?![\w])")
+
+
+def find_cashtags(text: str) -> Set[str]:
+    """텍스트의 모든 캐시태그 심볼 ($gme → GME). 감시 목록과 무관하게 새 심볼 후보를 찾을 때 사용합니다."""
+    return {symbol.upper() for cashtag, symbol in _TOKEN_RE.findall(text or '') if cashtag}
+
+
+class TickerMatcher:
+    """
+    감시 목록 전체에 대해 텍스트를 한 번만 스캔하여 언급된 티커를 찾습니다.
+    토큰화 후 집합 조회만 하므로 비용은 텍스트 길이에 비례하고 티커 수와는 무관합니다.
+    """
+
+    def __init__(self, tickers: Iterable[str], ambiguous: Iterable[str] = AMBIGUOUS_SYMBOLS):
+        self.tickers: Set[str] = {ticker.upper() for ticker in tickers}
+        ambiguous = {symbol.upper() for symbol in ambiguous}
+        # 한 글자 심볼(F, T 등)도 캐시태그로만 매칭
+        self.cashtag_only: Set[str] = {
+            ticker for ticker in self.tickers if ticker in ambiguous or len(ticker) == 1
+        }
+
+    def match(self, text: str) -> Set[str]:
+        """텍스트에서 언급된 감시 목록 티커 집합을 반환합니다."""
+        found: Set[str] = set()
+        if not text:
+            return found
+
+        for cashtag, symbol in _TOKEN_RE.findall(text):
+            if cashtag:
+                symbol = symbol.upper()
+                if symbol in self.tickers:
+                    found.add(symbol)
+            elif symbol.isupper() and symbol in self.tickers and symbol not in self.cashtag_only:
+                # 캐시태그가 없으면 대문자로 쓰인 경우만 인정 (예: "it" 은 제외)
+                found.add(symbol)
+        return found
+
+    def match_post(self, post: Dict) -> Dict[str, float]:
+        """포스트에서 언급된 감시 목록 티커별 관련도를 반환합니다. ("AAPL vs MSFT" 는 각각 0.5)"""
+        in_title = self.match(post.get('title') or '')
+        mentioned = in_title | self.match(post.get('selftext') or '')
+        if not mentioned:
+            return {}
+        share = 1.0 / len(mentioned)
+        return {
+            ticker: round((TITLE_RELEVANCE if ticker in in_title else BODY_RELEVANCE) * share, 3)
+            for ticker in mentioned
+        }
+
+    def fan_out(self, posts: Iterable[Dict], text_fields: List[str] = None) -> Dict[str, List[Dict]]:
+        """포스트 목록을 한 번 순회하며 티커별 포스트 목록으로 분배합니다."""
+        text_fields = text_fields or ['title', 'selftext']
+        results: Dict[str, List[Dict]] = {ticker: [] for ticker in self.tickers}
+        for post in posts:
+            text = " ".join(post.get(field) or '' for field in text_fields)
+            for ticker in self.match(text):
+                results[ticker].append(post)
+        return results
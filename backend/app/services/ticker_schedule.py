@@ -0,0 +1,180 @@
+import heapq
+import random
+import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class TickerState:
+    """티커별 스케줄 상태와 최근 활동 지표 (지수 이동 평균)"""
+
+    __slots__ = ('ticker', 'interval', 'next_due', 'rate', 'volatility', 'last_sentiment',
+                 'last_run', 'runs', 'failures', 'running', 'expedited')
+
+    def __init__(self, ticker: str, interval: float, next_due: float):
+        self.ticker = ticker
+        self.interval = interval
+        self.next_due = next_due
+        self.rate = 0.0          # 시간당 새 언급 수
+        self.volatility = 0.0    # 주기 간 평균 감정 변화량
+        self.last_sentiment: Optional[float] = None
+        self.last_run: Optional[float] = None
+        self.runs = 0
+        self.failures = 0
+        # 실행 중에 앞당기기 요청이 오면 실행이 끝난 직후 다시 실행
+        self.running = False
+        self.expedited = False
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "ticker": self.ticker,
+            "interval": round(self.interval, 1),
+            "next_due": self.next_due,
+            "mention_rate": round(self.rate, 3),
+            "volatility": round(self.volatility, 4),
+            "running": self.running,
+            "runs": self.runs,
+            "failures": self.failures,
+        }
+
+
+class TickerSchedule:
+    """
+    다음 실행 시각 기준 우선순위 큐.
+    언급 속도와 감정 변동성이 클수록 분석 간격이 짧아지고 조용한 티커는 최대 간격까지 늘어납니다.
+    힙 항목은 지연 삭제하므로 추가/삭제/앞당기기는 모두 O(log n) 입니다.
+    """
+
+    def __init__(self, min_interval: float, max_interval: float, rate_reference: float,
+                 volatility_reference: float, smoothing: float = 0.3):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.rate_reference = rate_reference
+        self.volatility_reference = volatility_reference
+        self.smoothing = smoothing
+        self.states: Dict[str, TickerState] = {}
+        self._heap: List[Tuple[float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.states)
+
+    def _push(self, state: TickerState):
+        heapq.heappush(self._heap, (state.next_due, state.ticker))
+
+    def add(self, ticker: str, due: Optional[float] = None):
+        """새 티커 추가. 한꺼번에 몰리지 않도록 기본 시작 시각을 최소 간격 안에서 분산합니다."""
+        if ticker in self.states:
+            return
+        now = time.time()
+        due = due if due is not None else now + random.uniform(0, self.min_interval)
+        state = TickerState(ticker, self.max_interval, due)
+        self.states[ticker] = state
+        self._push(state)
+
+    def remove(self, ticker: str):
+        self.states.pop(ticker, None)
+
+    def sync(self, tickers: Iterable[str]) -> Tuple[Set[str], Set[str]]:
+        """감시 목록과 맞춥니다. (추가된 티커, 제거된 티커) 를 반환합니다."""
+        wanted = set(tickers)
+        current = set(self.states)
+        for ticker in wanted - current:
+            self.add(ticker)
+        for ticker in current - wanted:
+            self.remove(ticker)
+        return wanted - current, current - wanted
+
+    def expedite(self, ticker: str, due: Optional[float] = None):
+        """티커의 다음 실행을 앞당깁니다. (이미 더 이르면 그대로)"""
+        state = self.states.get(ticker)
+        if state is None:
+            return
+        due = due if due is not None else time.time()
+        if state.running:
+            state.expedited = True
+        elif due < state.next_due:
+            state.next_due = due
+            self._push(state)
+
+    def next_due_at(self) -> Optional[float]:
+        self._drop_stale()
+        return self._heap[0][0] if self._heap else None
+
+    def _drop_stale(self):
+        while self._heap:
+            due, ticker = self._heap[0]
+            state = self.states.get(ticker)
+            if state is not None and state.next_due == due:
+                return
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: float, limit: int) -> List[Tuple[float, TickerState]]:
+        """
+        실행 시각이 된 티커를 이른 순으로 최대 limit 개 꺼냅니다. (원래 실행 시각, 상태) 목록을 반환하며
+        꺼낸 티커는 결과를 기록할 때까지 큐에 없습니다.
+        """
+        due: List[Tuple[float, TickerState]] = []
+        while len(due) < limit:
+            self._drop_stale()
+            if not self._heap or self._heap[0][0] > now:
+                break
+            due_at, ticker = heapq.heappop(self._heap)
+            due.append((due_at, self._start(self.states[ticker])))
+        return due
+
+    def claim(self, ticker: str) -> Optional[TickerState]:
+        """실행 시각과 관계없이 지금 실행하도록 꺼냅니다. 이미 실행 중이면 None"""
+        state = self.states.get(ticker)
+        if state is None or state.running:
+            return None
+        return self._start(state)
+
+    @staticmethod
+    def _start(state: TickerState) -> TickerState:
+        state.next_due = float('inf')
+        state.running = True
+        return state
+
+    def due_count(self, now: float) -> int:
+        return sum(1 for state in self.states.values() if state.next_due <= now)
+
+    def compute_interval(self, state: TickerState) -> float:
+        activity = 1.0 + state.rate / self.rate_reference + state.volatility / self.volatility_reference
+        return min(self.max_interval, max(self.min_interval, self.max_interval / activity))
+
+    def record(self, ticker: str, new_mentions: int, sentiment: Optional[float], now: Optional[float] = None):
+        """성공한 실행 결과로 활동 지표를 갱신하고 다음 실행 시각을 정합니다."""
+        state = self.states.get(ticker)
+        if state is None:
+            return
+        now = now if now is not None else time.time()
+        elapsed = max(now - state.last_run, self.min_interval) if state.last_run else state.interval
+        rate = new_mentions * 3600.0 / elapsed
+        change = abs(sentiment - state.last_sentiment) if sentiment is not None and state.last_sentiment is not None else 0.0
+
+        alpha = self.smoothing
+        state.rate = rate if state.runs == 0 else alpha * rate + (1 - alpha) * state.rate
+        state.volatility = alpha * change + (1 - alpha) * state.volatility
+        if sentiment is not None:
+            state.last_sentiment = sentiment
+        state.last_run = now
+        state.runs += 1
+        state.failures = 0
+        state.interval = self.compute_interval(state)
+        self._reschedule(state, now + state.interval, now)
+
+    def record_failure(self, ticker: str, now: Optional[float] = None):
+        """실패 시 최소 간격부터 두 배씩 늘려 다시 시도 (최대 간격까지)"""
+        state = self.states.get(ticker)
+        if state is None:
+            return
+        now = now if now is not None else time.time()
+        state.failures += 1
+        delay = min(self.max_interval, self.min_interval * (2 ** (state.failures - 1)))
+        self._reschedule(state, now + delay, now)
+
+    def _reschedule(self, state: TickerState, due: float, now: float):
+        if state.expedited:
+            due = now
+        state.running = state.expedited = False
+        state.next_due = due
+        self._push(state)
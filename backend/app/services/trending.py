@@ -0,0 +1,294 @@
+import hashlib
+import os
+import time
+from array import array
+from collections import deque
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+import logging
+from services.ticker_matcher import TickerMatcher, find_cashtags
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def load_symbol_universe(path: Optional[str]) -> Optional[FrozenSet[str]]:
+    """
+    심볼 목록 파일(한 줄에 하나, CSV 면 첫 열)을 읽습니다. 경로가 없으면 None.
+    '#' 으로 시작하는 줄과 헤더(Symbol 등 소문자가 섞인 값)는 건너뜁니다.
+    """
+    if not path:
+        return None
+    symbols = set()
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            symbol = line.split(',')[0].strip().strip('"')
+            if symbol and not symbol.startswith('#') and symbol.isupper():
+                symbols.add(symbol)
+    logger.info(f"Loaded {len(symbols)} symbols from {path}")
+    return frozenset(symbols)
+
+
+class CountMinSketch:
+    """
+    고정 크기 Count-Min sketch (depth 행 × width 열 카운터).
+    추정값은 실제 빈도 이상이며 초과분은 높은 확률로 (e / width) × 전체 개수 이하입니다.
+    카운터를 더하고 뺄 수 있으므로(선형) 구간별 sketch 를 합쳐 기간 합계를 유지할 수 있습니다.
+    """
+    __slots__ = ('width', 'depth', 'rows', 'total')
+
+    def __init__(self, width: int, depth: int):
+        self.width = width
+        self.depth = depth
+        self.rows = [array('I', [0]) * width for _ in range(depth)]
+        self.total = 0
+
+    def _indexes(self, key: str) -> List[int]:
+        # 해시 하나에서 행별 인덱스를 만듦 (h1 + i * h2, Kirsch-Mitzenmacher)
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest()
+        h1 = int.from_bytes(digest[:4], 'little')
+        h2 = int.from_bytes(digest[4:], 'little') | 1
+        return [(h1 + i * h2) % self.width for i in range(self.depth)]
+
+    def add(self, key: str, count: int = 1) -> int:
+        """카운트를 더하고 새 추정값을 반환합니다."""
+        estimate = None
+        for row, index in zip(self.rows, self._indexes(key)):
+            row[index] += count
+            estimate = row[index] if estimate is None else min(estimate, row[index])
+        self.total += count
+        return estimate
+
+    def estimate(self, key: str) -> int:
+        return min(row[index] for row, index in zip(self.rows, self._indexes(key)))
+
+    def merge(self, other: "CountMinSketch", sign: int = 1):
+        """other 의 카운터를 더하거나(sign=1) 뺍니다(sign=-1)."""
+        for row, other_row in zip(self.rows, other.rows):
+            for index, value in enumerate(other_row):
+                if value:
+                    row[index] += sign * value
+        self.total += sign * other.total
+
+    def clear(self):
+        for row in self.rows:
+            for index in range(self.width):
+                row[index] = 0
+        self.total = 0
+
+    @property
+    def memory_bytes(self) -> int:
+        return sum(row.itemsize * len(row) for row in self.rows)
+
+
+class TrendingDetector:
+    """
+    전체 텍스트 스트림의 심볼 빈도를 고정 메모리로 추적하여 평소보다 급증한 심볼을 찾습니다.
+    - 빈도는 epoch(DISCOVERY_EPOCH_MINUTES) 별 Count-Min sketch 에 세고, 최근 구간은 현재 + 직전 epoch,
+      기준선은 그 이전 baseline_epochs 개 epoch 의 합(sketch 를 더하고 빼서 유지)으로 추정
+    - 후보는 최근 구간 추정값 상위 top_k 개만 보관 (heavy hitters)
+    - 메모리는 (baseline_epochs + 3) 개 sketch 와 top_k 항목으로 고정되며 심볼 수와 무관
+    """
+
+    def __init__(self, width: int = 4096, depth: int = 4, epoch_seconds: float = 3600,
+                 baseline_epochs: int = 24, top_k: int = 100):
+        self.width = width
+        self.depth = depth
+        self.epoch_seconds = epoch_seconds
+        self.baseline_epochs = baseline_epochs
+        self.top_k = top_k
+        self.current = CountMinSketch(width, depth)
+        # 닫힌 epoch (최신순). closed[0] 은 최근 구간, 나머지는 기준선
+        self.closed: deque = deque()
+        self.baseline = CountMinSketch(width, depth)
+        self.epoch_started = time.time()
+        self.candidates: Dict[str, int] = {}
+        self._floor = 0
+        self.events = 0
+
+    def _rotate(self, now: float):
+        while now - self.epoch_started >= self.epoch_seconds:
+            self.closed.appendleft(self.current)
+            if len(self.closed) >= 2:
+                self.baseline.merge(self.closed[1])
+            if len(self.closed) > self.baseline_epochs + 1:
+                expired = self.closed.pop()
+                self.baseline.merge(expired, sign=-1)
+                expired.clear()
+                self.current = expired  # 새로 할당하지 않고 재사용
+            else:
+                self.current = CountMinSketch(self.width, self.depth)
+            self.epoch_started += self.epoch_seconds
+            if now - self.epoch_started >= self.epoch_seconds * (self.baseline_epochs + 2):
+                # 오래 비어 있었으면 빈 epoch 를 하나씩 돌리지 않고 새로 시작
+                self.closed.clear()
+                self.baseline.clear()
+                self.current.clear()
+                self.epoch_started = now
+            self.candidates = {symbol: count for symbol, count in
+                               ((symbol, self.recent_count(symbol)) for symbol in self.candidates) if count}
+            self._floor = min(self.candidates.values(), default=0)
+
+    def recent_count(self, symbol: str) -> int:
+        return self.current.estimate(symbol) + (self.closed[0].estimate(symbol) if self.closed else 0)
+
+    def observe(self, symbols: Set[str], now: Optional[float] = None):
+        """텍스트 하나(포스트/댓글)에서 찾은 심볼들을 한 번씩 셉니다."""
+        now = now if now is not None else time.time()
+        self._rotate(now)
+        self.events += 1
+        previous = self.closed[0] if self.closed else None
+        for symbol in symbols:
+            count = self.current.add(symbol) + (previous.estimate(symbol) if previous is not None else 0)
+            if symbol in self.candidates or len(self.candidates) < self.top_k:
+                self.candidates[symbol] = count
+            elif count > self._floor:
+                # 가장 적은 후보를 밀어냄 (밀어낼 때만 O(top_k))
+                del self.candidates[min(self.candidates, key=self.candidates.get)]
+                self.candidates[symbol] = count
+                self._floor = min(self.candidates.values())
+
+    @property
+    def baseline_hours(self) -> float:
+        return max(len(self.closed) - 1, 0) * self.epoch_seconds / 3600
+
+    def rates(self, symbol: str, now: Optional[float] = None) -> Tuple[int, float, float]:
+        """(최근 구간 언급 수, 최근 시간당 속도, 기준선 시간당 속도)"""
+        now = now if now is not None else time.time()
+        recent = self.recent_count(symbol)
+        recent_hours = (now - self.epoch_started + (self.epoch_seconds if self.closed else 0)) / 3600
+        baseline_hours = self.baseline_hours
+        baseline_rate = self.baseline.estimate(symbol) / baseline_hours if baseline_hours else 0.0
+        return recent, recent / max(recent_hours, 1 / 60), baseline_rate
+
+    def trending(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """후보 심볼별 최근/기준선 속도와 비율 (비율 내림차순)"""
+        now = now if now is not None else time.time()
+        self._rotate(now)
+        results = []
+        for symbol in self.candidates:
+            recent, recent_rate, baseline_rate = self.rates(symbol, now)
+            results.append({
+                'symbol': symbol,
+                'recent_mentions': recent,
+                'recent_rate': round(recent_rate, 2),
+                'baseline_rate': round(baseline_rate, 2),
+                # 기준선이 거의 없는 심볼은 시간당 1회를 기준으로 비교
+                'ratio': round(recent_rate / max(baseline_rate, 1.0), 2),
+            })
+        return sorted(results, key=lambda entry: entry['ratio'], reverse=True)
+
+    @property
+    def memory_bytes(self) -> int:
+        return self.current.memory_bytes * (len(self.closed) + 2)
+
+
+class TrendingDiscovery:
+    """
+    감시 목록 밖의 심볼 중 언급이 급증한 심볼을 찾아 감시 목록에 자동으로 추가합니다.
+    후보 심볼은 캐시태그($XYZ)이며, SYMBOL_UNIVERSE_PATH 가 있으면 그 목록에 있는 심볼만
+    (캐시태그 또는 대문자 심볼, 흔한 단어와 겹치는 심볼은 캐시태그일 때만) 인정합니다.
+    실시간 언급 스트림이 읽는 모든 포스트/댓글을 observe() 로 받습니다.
+    자동 추가는 DISCOVERY_AUTO_ADD 이고 심볼 목록이 있을 때만 합니다. (임의의 캐시태그가 감시 목록에 들어가지 않도록)
+    sketch 는 수집 노드에만 있으므로, 수집 노드는 후보 목록을 export() 로 저장하고 다른 노드와 API 전용 서버는
+    그 사본(replica)으로 응답합니다. 수집 노드가 바뀌면 기준선은 처음부터 다시 쌓입니다.
+    scheduler 가 없으면(API 전용 모드) 감시 목록에 추가하지 않습니다.
+    """
+
+    def __init__(self, scheduler=None, universe: Optional[FrozenSet[str]] = None):
+        self.scheduler = scheduler
+        self.universe = universe if universe is not None else load_symbol_universe(os.getenv('SYMBOL_UNIVERSE_PATH'))
+        self.matcher = TickerMatcher(self.universe) if self.universe else None
+        self.enabled = os.getenv('DISCOVERY_ENABLED', 'true').lower() == 'true'
+        self.auto_add = os.getenv('DISCOVERY_AUTO_ADD', 'false').lower() == 'true'
+        if self.auto_add and not self.universe:
+            logger.warning("DISCOVERY_AUTO_ADD requires SYMBOL_UNIVERSE_PATH; trending symbols will not be added")
+            self.auto_add = False
+        self.detector = TrendingDetector(
+            width=int(os.getenv('DISCOVERY_SKETCH_WIDTH', '4096')),
+            depth=int(os.getenv('DISCOVERY_SKETCH_DEPTH', '4')),
+            epoch_seconds=float(os.getenv('DISCOVERY_EPOCH_MINUTES', '60')) * 60,
+            baseline_epochs=int(os.getenv('DISCOVERY_BASELINE_EPOCHS', '24')),
+            top_k=int(os.getenv('DISCOVERY_TOP_K', '100')),
+        )
+        self.min_mentions = int(os.getenv('DISCOVERY_MIN_MENTIONS', '20'))
+        self.spike_factor = float(os.getenv('DISCOVERY_SPIKE_FACTOR', '5'))
+        # 기준선이 이만큼(epoch 수) 쌓이기 전(시작/수집 노드 변경 직후)에는 급증으로 판단하지 않음
+        self.warmup_epochs = int(os.getenv('DISCOVERY_WARMUP_EPOCHS', '3'))
+        self.max_tickers = int(os.getenv('DISCOVERY_MAX_TICKERS', '50'))
+        self.added: List[str] = []
+        # 다른 노드(수집 노드)가 저장한 후보 목록 사본
+        self.replica: Optional[Dict[str, Any]] = None
+
+    @property
+    def watchlist(self) -> Set[str]:
+        return self.scheduler.watchlist if self.scheduler is not None else set()
+
+    @property
+    def warm(self) -> bool:
+        return len(self.detector.closed) - 1 >= self.warmup_epochs
+
+    def observe(self, text: str, now: Optional[float] = None):
+        if not self.enabled:
+            return
+        symbols = self.matcher.match(text) if self.matcher is not None else find_cashtags(text)
+        if symbols:
+            self.detector.observe(symbols, now)
+
+    def flagged(self, now: Optional[float] = None) -> List[Dict[str, Any]]:
+        """감시 목록에 없고 최근 언급이 DISCOVERY_MIN_MENTIONS 이상이며 기준선의 DISCOVERY_SPIKE_FACTOR 배 이상인 심볼"""
+        # trending() 이 epoch 를 먼저 돌린 뒤에 워밍업 여부를 판단
+        trending = self.detector.trending(now)
+        if not self.warm:
+            return []
+        return [
+            entry for entry in trending
+            if entry['symbol'] not in self.watchlist
+            and entry['recent_mentions'] >= self.min_mentions and entry['ratio'] >= self.spike_factor
+        ]
+
+    async def promote(self) -> List[str]:
+        """급증한 심볼을 감시 목록에 추가합니다. (자동 추가 티커는 DISCOVERY_MAX_TICKERS 개까지)"""
+        if not (self.enabled and self.auto_add) or self.scheduler is None:
+            return []
+        flagged = self.flagged()
+        if not flagged:
+            return []
+        room = self.max_tickers - await self.scheduler.db_service.count_watchlist(source='discovered')
+        added = []
+        for entry in flagged[:max(room, 0)]:
+            if await self.scheduler.add_ticker(entry['symbol'], source='discovered'):
+                added.append(entry['symbol'])
+                logger.info(f"Discovered trending ticker {entry['symbol']} "
+                            f"({entry['recent_rate']}/h vs baseline {entry['baseline_rate']}/h)")
+        if len(flagged) > room:
+            logger.warning(f"Discovery limit reached ({self.max_tickers} tickers); skipped {len(flagged) - max(room, 0)}")
+        self.added.extend(added)
+        return added
+
+    def export(self, now: Optional[float] = None) -> Dict[str, Any]:
+        """다른 노드가 그대로 응답할 수 있도록 후보 목록(감시/flagged 여부 포함)과 상태를 반환합니다."""
+        now = now if now is not None else time.time()
+        flagged = {entry['symbol'] for entry in self.flagged(now)}
+        watchlist = self.watchlist
+        return {
+            'warm': self.warm,
+            'symbols': [
+                {**entry, 'watched': entry['symbol'] in watchlist, 'flagged': entry['symbol'] in flagged}
+                for entry in self.detector.trending(now)
+            ],
+            'added': list(self.added),
+            'updated_at': now,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "auto_add": self.auto_add,
+            "universe": len(self.universe) if self.universe else 0,
+            "events": self.detector.events,
+            "candidates": len(self.detector.candidates),
+            "epochs": len(self.detector.closed),
+            "warm": self.warm,
+            "added": len(self.added),
+            "memory_bytes": self.detector.memory_bytes,
+        }
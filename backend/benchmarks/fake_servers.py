@@ -0,0 +1,215 @@
+"""
+벤치마크용 가짜 Reddit / OpenAI HTTP 서버.
+별도 스레드의 이벤트 루프에서 실행되므로 측정 대상 프로세스의 이벤트 루프와 경쟁하지 않습니다.
+"""
+import asyncio
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from aiohttp import web
+
+BULLISH = ['moon', 'calls', 'buy', 'bullish', 'beat', 'rocket', 'upgrade']
+BEARISH = ['puts', 'sell', 'bearish', 'miss', 'dump', 'downgrade', 'crash']
+FILLER = ['earnings', 'guidance', 'revenue', 'chart', 'volume', 'dividend', 'valuation', 'options']
+
+
+def generate_posts(tickers: List[str], posts_per_ticker: int, subreddits: List[str], seed: int = 42,
+                   now: Optional[float] = None, crosspost_rate: float = 0.0) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    서브레딧별 포스트 목록(최신순)을 만듭니다. 일부 포스트는 두 티커를 함께 언급하고,
+    crosspost_rate 비율의 포스트는 다른 서브레딧에 크로스포스트됩니다. (본문은 원문에만 있음)
+    """
+    rng = random.Random(seed)
+    now = now or time.time()
+    by_subreddit: Dict[str, List[Dict[str, Any]]] = {name: [] for name in subreddits}
+    counter = 0
+    for ticker in tickers:
+        for _ in range(posts_per_ticker):
+            counter += 1
+            words = rng.sample(BULLISH if rng.random() < 0.5 else BEARISH, 2) + rng.sample(FILLER, 3)
+            other = f" vs ${rng.choice(tickers)}" if rng.random() < 0.1 else ""
+            post_id = f"b{counter:07x}"
+            subreddit = rng.choice(subreddits)
+            post = {
+                'id': post_id,
+                'name': f"t3_{post_id}",
+                'title': f"${ticker} {' '.join(words[:3])}{other}",
+                'selftext': ' '.join(words) + ' ' + ' '.join(rng.choices(FILLER, k=20)),
+                'score': rng.randint(0, 5000),
+                'num_comments': rng.randint(0, 500),
+                'created_utc': now - rng.uniform(60, 20 * 3600),
+            }
+            by_subreddit[subreddit].append(post)
+            if len(subreddits) > 1 and rng.random() < crosspost_rate:
+                crosspost_id = f"x{counter:07x}"
+                by_subreddit[rng.choice([name for name in subreddits if name != subreddit])].append({
+                    **post,
+                    'id': crosspost_id,
+                    'name': f"t3_{crosspost_id}",
+                    'selftext': '',
+                    'score': rng.randint(0, 500),
+                    'created_utc': post['created_utc'] + rng.uniform(60, 3600),
+                    'crosspost_parent': post['name'],
+                    'crosspost_parent_list': [{'id': post_id, 'selftext': post['selftext']}],
+                })
+    for posts in by_subreddit.values():
+        posts.sort(key=lambda post: post['created_utc'], reverse=True)
+    return by_subreddit
+
+
+class FakeServer:
+    """지연 시간과 오류율을 설정할 수 있는 가짜 서버의 공통 부분"""
+
+    def __init__(self, latency_ms: float = 0.0, error_rate: float = 0.0, seed: int = 7):
+        self.latency = latency_ms / 1000.0
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.requests: Counter = Counter()
+        self.errors = 0
+        self.port: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._runner: Optional[web.AppRunner] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def build_app(self) -> web.Application:
+        raise NotImplementedError
+
+    async def simulate(self, route: str) -> Optional[web.Response]:
+        """지연 후 오류율에 따라 오류 응답을 반환합니다. 정상이면 None"""
+        self.requests[route] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=503, text='simulated outage')
+        return None
+
+    def start(self):
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            self._runner = web.AppRunner(self.build_app(), access_log=None)
+            self._loop.run_until_complete(self._runner.setup())
+            site = web.TCPSite(self._runner, '127.0.0.1', 0)
+            self._loop.run_until_complete(site.start())
+            self.port = site._server.sockets[0].getsockname()[1]
+            started.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+
+    def snapshot(self) -> Dict[str, int]:
+        return {**self.requests, 'errors': self.errors}
+
+
+class FakeRedditServer(FakeServer):
+    """PRAW 가 사용하는 OAuth 토큰, /r/{sub}/new, /r/{sub}/search 엔드포인트만 흉내 냅니다."""
+
+    def __init__(self, posts: Dict[str, List[Dict[str, Any]]], **kwargs):
+        super().__init__(**kwargs)
+        self.posts = posts
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/api/v1/access_token', self.access_token)
+        app.router.add_get(r'/r/{subreddit}/new{slash:/?}', self.new)
+        app.router.add_get(r'/r/{subreddit}/search{slash:/?}', self.search)
+        return app
+
+    async def access_token(self, request: web.Request) -> web.Response:
+        self.requests['token'] += 1
+        return web.json_response({'access_token': 'bench', 'token_type': 'bearer', 'expires_in': 86400, 'scope': '*'})
+
+    @staticmethod
+    def listing(posts: List[Dict[str, Any]], subreddit: str, after: Optional[str]) -> Dict[str, Any]:
+        return {'kind': 'Listing', 'data': {
+            'after': after,
+            'before': None,
+            'dist': len(posts),
+            'children': [{'kind': 't3', 'data': {
+                **post,
+                'subreddit': subreddit,
+                'permalink': f"/r/{subreddit}/comments/{post['id']}/",
+            }} for post in posts],
+        }}
+
+    def page(self, posts: List[Dict[str, Any]], request: web.Request) -> Dict[str, Any]:
+        limit = min(int(request.query.get('limit', 25)), 100)
+        start = 0
+        after = request.query.get('after')
+        if after:
+            start = next((i + 1 for i, post in enumerate(posts) if post['name'] == after), len(posts))
+        chunk = posts[start:start + limit]
+        next_after = chunk[-1]['name'] if len(chunk) == limit and start + limit < len(posts) else None
+        return self.listing(chunk, request.match_info['subreddit'], next_after)
+
+    async def new(self, request: web.Request) -> web.Response:
+        error = await self.simulate('new')
+        if error:
+            return error
+        return web.json_response(self.page(self.posts.get(request.match_info['subreddit'], []), request))
+
+    async def search(self, request: web.Request) -> web.Response:
+        error = await self.simulate('search')
+        if error:
+            return error
+        query = request.query.get('q', '').upper()
+        posts = [post for post in self.posts.get(request.match_info['subreddit'], []) if query in post['title'].upper()]
+        return web.json_response(self.page(posts, request))
+
+
+class FakeOpenAIServer(FakeServer):
+    """
+    /chat/completions 만 흉내 냅니다. 배치 프롬프트의 {"id", "text"} 줄마다
+    텍스트 해시로 정한 감정 점수와 키워드를 돌려줍니다.
+    """
+
+    LINE_RE = re.compile(r'^\{"id": ?(\d+).*\}$', re.MULTILINE)
+
+    def build_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post('/chat/completions', self.chat_completions)
+        return app
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        payload = await request.json()
+        error = await self.simulate('chat')
+        if error:
+            return error
+        prompt = payload['messages'][-1]['content']
+        results = []
+        for line in self.LINE_RE.finditer(prompt):
+            self.requests['posts'] += 1
+            entry = json.loads(line.group(0))
+            digest = hashlib.md5(entry['text'].encode()).digest()
+            words = [word for word in re.findall(r'[a-z]+', entry['text'].lower()) if len(word) > 3]
+            results.append({
+                'id': entry['id'],
+                'sentiment': round(digest[0] / 127.5 - 1.0, 2),
+                'keywords': list(dict.fromkeys(words))[:5],
+            })
+        content = json.dumps({'results': results})
+        return web.json_response({
+            'choices': [{'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'total_tokens': len(prompt) // 4 + len(content) // 4},
+        })
@@ -0,0 +1,252 @@
+"""
+벤치마크용 메모리 내 DatabaseService.
+MongoDB 없이 스케줄러/스냅샷 캐시가 사용하는 메서드만 구현합니다.
+문서는 저장/조회 시 복사하여 BSON 직렬화 비용을 대략적으로 흉내 내고, 호출마다 지연을 줄 수 있습니다.
+"""
+import asyncio
+import copy
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import bson
+from services.database_service import DatabaseService, StaleWriteError, POST_FIELDS
+
+
+class InMemoryDatabaseService(DatabaseService):
+
+    def __init__(self, latency_ms: float = 0.0):
+        super().__init__(mongodb_url='memory://')
+        self.latency = latency_ms / 1000.0
+        self.calls: Counter = Counter()
+        self.stocks: Dict[str, Dict[str, Any]] = {}
+        self.history: List[Dict[str, Any]] = []
+        self.checkpoints: Dict[str, Dict[str, Any]] = {}
+        self.watchlist: Dict[str, Dict[str, Any]] = {}
+        self.pending: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.posts: Dict[str, Dict[str, Any]] = {}
+        self.post_ids: Dict[str, str] = {}
+        self.fingerprints: Dict[str, str] = {}
+        self.mention_counters: Dict[str, Dict[str, Any]] = {}
+        self.trending: Optional[Dict[str, Any]] = None
+        self.backfill_state: Dict[str, Dict[str, Any]] = {}
+        self.version = 0
+
+    async def _op(self, name: str):
+        self.calls[name] += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    @property
+    def is_connected(self) -> bool:
+        return True
+
+    async def connect(self):
+        pass
+
+    async def disconnect(self):
+        pass
+
+    async def bootstrap(self):
+        pass
+
+    async def health_check(self) -> Dict[str, Any]:
+        return {"status": "ok", "backend": "memory"}
+
+    @staticmethod
+    def _project(doc: Dict[str, Any], projection: Optional[Dict[str, int]]) -> Dict[str, Any]:
+        if not projection:
+            return copy.deepcopy(doc)
+        return {key: copy.deepcopy(doc[key]) for key, include in projection.items() if include and key in doc}
+
+    def storage_bytes(self) -> Dict[str, int]:
+        """컬렉션별 BSON 인코딩 크기 합계 (인덱스 제외)"""
+        sizes = {
+            'stock_data_bytes': sum(len(bson.encode(doc)) for doc in self.stocks.values()),
+            'posts_bytes': sum(len(bson.encode(doc)) for doc in self.posts.values()),
+            'pending_bytes': sum(len(bson.encode(ref)) for refs in self.pending.values() for ref in refs.values()),
+        }
+        return {**sizes, 'total_bytes': sum(sizes.values())}
+
+    async def get_data_version(self) -> int:
+        await self._op('get_data_version')
+        return self.version
+
+    async def save_stock_data(self, ticker: str, data: Dict[str, Any], expected_version: Optional[int] = None):
+        await self._op('save_stock_data')
+        await self._store(ticker, data, expected_version)
+
+    async def save_stock_data_many(self, writes: List[Dict[str, Any]]) -> Dict[str, str]:
+        await self._op('save_stock_data_many')
+        rejected: Dict[str, str] = {}
+        for write in writes:
+            try:
+                await self._store(write['ticker'], write['data'], write.get('expected_version'))
+            except StaleWriteError:
+                rejected[write['ticker'].upper()] = 'stale'
+        return rejected
+
+    async def _store(self, ticker: str, data: Dict[str, Any], expected_version: Optional[int]):
+        ticker = ticker.upper()
+        current = self.stocks.get(ticker)
+        if expected_version is not None and (current.get('version', 0) if current else 0) != expected_version:
+            raise StaleWriteError(f"{ticker} was updated by another writer (expected version {expected_version})")
+        self.version += 1
+        data['last_updated'] = datetime.utcnow()
+        data['ticker'] = ticker
+        data['version'] = self.version
+        self.stocks[ticker] = copy.deepcopy(data)
+        self.history.append({
+            'timestamp': data['last_updated'], 'ticker': ticker, 'sentiment': data.get('sentiment'),
+            'mentions': data.get('mentions', 0), 'price_change_24h': data.get('price_change_24h'),
+        })
+        for listener in self._write_listeners:
+            await listener(ticker, data)
+
+    async def save_history_entries(self, snapshots: List[Dict[str, Any]], skip_existing: bool = False) -> int:
+        await self._op('save_history_entries')
+        entries = [self._history_entry(data) for data in snapshots]
+        if skip_existing:
+            existing = {(entry['ticker'], entry['timestamp']) for entry in self.history}
+            entries = [entry for entry in entries if (entry['ticker'], entry['timestamp']) not in existing]
+        self.history.extend(entries)
+        return len(entries)
+
+    async def get_stock_data(self, ticker: str) -> Optional[Dict[str, Any]]:
+        await self._op('get_stock_data')
+        doc = self.stocks.get(ticker.upper())
+        return copy.deepcopy(doc) if doc else None
+
+    async def get_all_stock_data(self, projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        await self._op('get_all_stock_data')
+        return [self._project(doc, projection) for doc in self.stocks.values()]
+
+    async def get_stock_data_since(self, version: int, projection: Optional[Dict[str, int]] = None) -> List[Dict[str, Any]]:
+        await self._op('get_stock_data_since')
+        return [self._project(doc, projection) for doc in self.stocks.values() if doc.get('version', 0) > version]
+
+    async def get_ingestion_checkpoints(self) -> Dict[str, Dict[str, Any]]:
+        await self._op('get_ingestion_checkpoints')
+        return copy.deepcopy(self.checkpoints)
+
+    async def save_ingestion_checkpoint(self, subreddit: str, fullname: str, created_utc: float):
+        await self._op('save_ingestion_checkpoint')
+        current = self.checkpoints.get(subreddit)
+        if current is None or current['created_utc'] <= created_utc:
+            self.checkpoints[subreddit] = {'_id': subreddit, 'fullname': fullname, 'created_utc': created_utc}
+
+    async def get_watchlist(self) -> List[str]:
+        await self._op('get_watchlist')
+        return list(self.watchlist)
+
+    async def seed_watchlist(self, tickers: List[str]):
+        await self._op('seed_watchlist')
+        if not self.watchlist:
+            self.watchlist = {ticker.upper(): {'source': 'default'} for ticker in tickers}
+
+    async def add_watchlist_ticker(self, ticker: str, source: str = 'manual') -> bool:
+        await self._op('add_watchlist_ticker')
+        added = ticker.upper() not in self.watchlist
+        self.watchlist.setdefault(ticker.upper(), {'source': source})
+        return added
+
+    async def count_watchlist(self, source: Optional[str] = None) -> int:
+        await self._op('count_watchlist')
+        return sum(1 for entry in self.watchlist.values() if source is None or entry['source'] == source)
+
+    async def remove_watchlist_ticker(self, ticker: str) -> bool:
+        await self._op('remove_watchlist_ticker')
+        self.pending.pop(ticker.upper(), None)
+        return self.watchlist.pop(ticker.upper(), None) is not None
+
+    async def add_pending_mentions(self, mentions: Dict[str, List[Dict[str, Any]]]) -> Dict[str, int]:
+        await self._op('add_pending_mentions')
+        added: Dict[str, int] = {}
+        for ticker, refs in mentions.items():
+            buffer = self.pending.setdefault(ticker, {})
+            for ref in refs:
+                if ref['id'] not in buffer:
+                    buffer[ref['id']] = dict(ref)
+                    added[ticker] = added.get(ticker, 0) + 1
+        return added
+
+    async def get_pending_mentions(self, ticker: str, limit: int) -> List[Dict[str, Any]]:
+        await self._op('get_pending_mentions')
+        refs = sorted(self.pending.get(ticker.upper(), {}).values(), key=lambda ref: ref['created_utc'])
+        return copy.deepcopy(refs[:limit])
+
+    async def delete_pending_mentions(self, ticker: str, post_ids: List[str]):
+        await self._op('delete_pending_mentions')
+        buffer = self.pending.get(ticker.upper(), {})
+        for post_id in post_ids:
+            buffer.pop(post_id, None)
+
+    async def upsert_posts(self, posts: List[Dict[str, Any]]) -> Dict[str, str]:
+        await self._op('upsert_posts')
+        canonical: Dict[str, str] = {}
+        for post in posts:
+            target = self.post_ids.get(post['id']) or self.fingerprints.setdefault(post['fingerprint'], post['id'])
+            canonical[post['id']] = self.post_ids[post['id']] = target
+            doc = self.posts.get(target)
+            if doc is None:
+                doc = self.posts[target] = {
+                    '_id': target, 'fingerprint': post['fingerprint'], 'title': post['title'], 'url': post['url'],
+                    'selftext': post.get('selftext', ''), 'created_utc': post['created_utc'],
+                    'sentiment': None, 'keywords': [], 'analysis_status': 'pending',
+                    'subreddits': [], 'tickers': [], 'score': post['score'], 'comments': post['comments'],
+                }
+            if post['id'] != target and post['id'] not in doc.setdefault('aliases', []):
+                doc['aliases'].append(post['id'])
+            if post['subreddit'] not in doc['subreddits']:
+                doc['subreddits'].append(post['subreddit'])
+            doc['tickers'] = sorted(set(doc['tickers']) | set(post['tickers']))
+            doc['score'] = max(doc['score'], post['score'])
+            doc['comments'] = max(doc['comments'], post['comments'])
+            doc['last_seen'] = datetime.utcnow()
+        return canonical
+
+    async def get_posts(self, post_ids: List[str]) -> List[Dict[str, Any]]:
+        await self._op('get_posts')
+        return [
+            {'id': post_id, 'subreddit': self.posts[post_id]['subreddits'][0],
+             **{field: copy.deepcopy(self.posts[post_id].get(field)) for field in POST_FIELDS if field in self.posts[post_id]}}
+            for post_id in post_ids if post_id in self.posts
+        ]
+
+    async def save_post_analysis(self, posts: List[Dict[str, Any]]):
+        await self._op('save_post_analysis')
+        for post in posts:
+            doc = self.posts.get(post['id'])
+            if doc is not None and doc['analysis_status'] != 'analyzed':
+                doc.update(sentiment=post['sentiment'], keywords=list(post.get('keywords', [])),
+                           analyzer=post.get('analyzer'), analysis_status='analyzed')
+
+    async def save_mention_counters(self, checkpoints: Dict[str, Dict[str, Any]]):
+        await self._op('save_mention_counters')
+        for ticker, checkpoint in checkpoints.items():
+            self.mention_counters[ticker] = {'head': checkpoint['head'], 'counts': bytes(checkpoint['counts'])}
+
+    async def get_mention_counters(self) -> Dict[str, Dict[str, Any]]:
+        await self._op('get_mention_counters')
+        return copy.deepcopy(self.mention_counters)
+
+    async def save_trending_snapshot(self, snapshot: Dict[str, Any]):
+        await self._op('save_trending_snapshot')
+        self.trending = copy.deepcopy(snapshot)
+
+    async def get_trending_snapshot(self) -> Optional[Dict[str, Any]]:
+        await self._op('get_trending_snapshot')
+        return copy.deepcopy(self.trending)
+
+    async def get_backfill_checkpoint(self, source: str):
+        await self._op('get_backfill_checkpoint')
+        return copy.deepcopy(self.checkpoints.get(f"backfill:{source}")), copy.deepcopy(self.backfill_state.get(source, {}))
+
+    async def save_backfill_checkpoint(self, source: str, checkpoint: Dict[str, Any], states: Dict[str, Dict[str, Any]]):
+        await self._op('save_backfill_checkpoint')
+        self.backfill_state.setdefault(source, {}).update(copy.deepcopy(states))
+        self.checkpoints[f"backfill:{source}"] = {**copy.deepcopy(checkpoint), 'updated_at': datetime.utcnow()}
+
+    async def delete_backfill_checkpoint(self, source: str):
+        await self._op('delete_backfill_checkpoint')
+        self.backfill_state.pop(source, None)
+        self.checkpoints.pop(f"backfill:{source}", None)
@@ -0,0 +1,379 @@
+"""
+오프라인 종단간 벤치마크.
+
+가짜 Reddit/OpenAI 서버와 메모리 내 DatabaseService 로 실제 SchedulerService 와 읽기 API 를 실행하여
+분석 사이클 시간, 사이클당 외부 호출 수, API 지연(p50/p99), 최대 메모리를 측정하고 JSON 으로 저장합니다.
+
+    cd backend
+    python benchmarks/run_benchmark.py --tickers 500 --posts-per-ticker 20 --clients 50
+    python benchmarks/run_benchmark.py --baseline benchmarks/results/baseline.json --tolerance 0.2
+
+--baseline 을 주면 기준 결과보다 tolerance 비율 이상 나빠진 지표를 출력하고 종료 코드 1 을 반환합니다.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, '..', 'app'))
+sys.path.insert(0, BENCHMARK_DIR)
+
+import aiohttp
+import numpy as np
+from fake_servers import FakeOpenAIServer, FakeRedditServer, generate_posts
+
+# 기준 결과와 비교할 지표 (모두 값이 클수록 나쁨)
+REGRESSION_METRICS = [
+    'cycles.first.seconds',
+    'cycles.steady.seconds',
+    'cycles.first.reddit_calls',
+    'cycles.first.openai_calls',
+    'cycles.first.openai_posts',
+    'cycles.first.db_calls',
+    'api.list.p50_ms',
+    'api.list.p99_ms',
+    'api.detail.p50_ms',
+    'api.detail.p99_ms',
+    'memory.peak_rss_mb',
+    'storage.total_bytes',
+]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark for the scheduler and read API")
+    parser.add_argument('--tickers', type=int, default=200, help="watchlist size")
+    parser.add_argument('--posts-per-ticker', type=int, default=20)
+    parser.add_argument('--crosspost-rate', type=float, default=0.1, help="share of posts cross-posted to another subreddit")
+    parser.add_argument('--clients', type=int, default=20, help="concurrent API clients")
+    parser.add_argument('--requests', type=int, default=2000, help="API requests per endpoint")
+    parser.add_argument('--cycles', type=int, default=2, help="analysis cycles (first one ingests everything)")
+    parser.add_argument('--analyzer', default='openai', choices=['openai', 'local', 'auto'])
+    parser.add_argument('--reddit-latency-ms', type=float, default=50.0)
+    parser.add_argument('--reddit-error-rate', type=float, default=0.0)
+    parser.add_argument('--openai-latency-ms', type=float, default=200.0)
+    parser.add_argument('--openai-error-rate', type=float, default=0.0)
+    parser.add_argument('--db-latency-ms', type=float, default=1.0)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--label', default='run', help="result file name prefix")
+    parser.add_argument('--output', help="result path (default: benchmarks/results/<label>-<timestamp>.json)")
+    parser.add_argument('--baseline', help="previous result JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression")
+    parser.add_argument('--verbose', action='store_true', help="keep service INFO logs")
+    return parser.parse_args(argv)
+
+
+def ticker_names(count: int) -> List[str]:
+    """Q로 시작하는 네 글자 합성 티커 (실제 심볼/일반 단어와 겹치지 않도록)"""
+    letters = 'ABCDEFGHIJKLMNOPQRSTUVWXYZ'
+    names = []
+    for i in range(count):
+        names.append('Q' + letters[i // 676 % 26] + letters[i // 26 % 26] + letters[i % 26])
+    return names
+
+
+def configure_environment(args: argparse.Namespace, reddit: FakeRedditServer, openai: FakeOpenAIServer,
+                          total_posts: int):
+    """서비스 생성 전에 가짜 서버 주소와 예산을 설정합니다. (예산은 환경 변수로 덮어쓸 수 있음)"""
+    os.environ.update({
+        'REDDIT_CLIENT_ID': 'bench',
+        'REDDIT_CLIENT_SECRET': 'bench',
+        'REDDIT_BASE_URL': reddit.url,
+        'REDDIT_OAUTH_URL': reddit.url,
+        'OPENAI_API_BASE': openai.url,
+        'OPENAI_API_KEY': 'bench',
+        'ANALYZER_BACKEND': args.analyzer,
+        'PRICE_PROVIDER': 'fixture',
+        'REDDIT_SCAN_LIMIT': str(total_posts),
+    })
+    for name, value in (
+        ('REDDIT_CALLS_PER_MINUTE', '1000000'),
+        ('ANALYSIS_POSTS_PER_MINUTE', '100000000'),
+        ('OPENAI_RPM_LIMIT', '1000000'),
+        ('OPENAI_TPM_LIMIT', '1000000000'),
+        ('SCHEDULER_MAX_POSTS_PER_RUN', str(max(200, args.posts_per_ticker * 2))),
+    ):
+        os.environ.setdefault(name, value)
+
+
+def percentiles(samples: List[float]) -> Dict[str, float]:
+    values = np.asarray(samples) * 1000.0
+    return {
+        'count': len(samples),
+        'mean_ms': round(float(values.mean()), 3),
+        'p50_ms': round(float(np.percentile(values, 50)), 3),
+        'p90_ms': round(float(np.percentile(values, 90)), 3),
+        'p99_ms': round(float(np.percentile(values, 99)), 3),
+        'max_ms': round(float(values.max()), 3),
+    }
+
+
+def peak_rss_mb() -> float:
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux 는 KB, macOS 는 바이트
+    return round(usage / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def call_delta(after: Dict[str, int], before: Dict[str, int]) -> Dict[str, int]:
+    return {key: after.get(key, 0) - before.get(key, 0) for key in after if after.get(key, 0) != before.get(key, 0)}
+
+
+async def run_cycles(args: argparse.Namespace, scheduler, db, reddit: FakeRedditServer,
+                     openai: FakeOpenAIServer) -> Dict[str, Any]:
+    await scheduler.initialize_database()
+    cycles = []
+    for _ in range(args.cycles):
+        reddit_before, openai_before, db_before = reddit.snapshot(), openai.snapshot(), Counter(db.calls)
+        started = time.perf_counter()
+        result = await scheduler.analyze_all_stocks()
+        elapsed = time.perf_counter() - started
+        reddit_calls = call_delta(reddit.snapshot(), reddit_before)
+        openai_calls = call_delta(openai.snapshot(), openai_before)
+        db_calls = call_delta(db.calls, db_before)
+        cycles.append({
+            'seconds': round(elapsed, 3),
+            'tickers': result['analyzed_tickers'],
+            'new_posts': result['new_posts'],
+            'failed': len(result['failed']),
+            'reddit_calls': sum(count for key, count in reddit_calls.items() if key not in ('token', 'errors')),
+            'openai_calls': openai_calls.get('chat', 0),
+            'openai_posts': openai_calls.get('posts', 0),
+            'db_calls': sum(db_calls.values()),
+            'detail': {'reddit': reddit_calls, 'openai': openai_calls, 'db': db_calls},
+        })
+
+    return {
+        'first': cycles[0],
+        # 첫 사이클 이후(새 포스트가 없을 때)의 평균
+        'steady': {
+            'seconds': round(sum(c['seconds'] for c in cycles[1:]) / max(len(cycles) - 1, 1), 3),
+            'reddit_calls': sum(c['reddit_calls'] for c in cycles[1:]) // max(len(cycles) - 1, 1),
+            'openai_calls': sum(c['openai_calls'] for c in cycles[1:]) // max(len(cycles) - 1, 1),
+        } if len(cycles) > 1 else None,
+        'all': cycles,
+        'analysis_cache': scheduler.analysis_cache.stats(),
+        'prices': scheduler.stock_price_service.stats(),
+    }
+
+
+class ApiServer:
+    """읽기 API 를 별도 스레드의 이벤트 루프에서 실행합니다. (클라이언트 부하와 서버 루프 분리)"""
+
+    def __init__(self, db):
+        self.db = db
+        self.port: Optional[int] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def build_app(self):
+        from contextlib import asynccontextmanager
+        from fastapi import FastAPI
+        from api.endpoints import stock_data
+        from services.snapshot_cache import SnapshotCache
+
+        snapshot_cache = SnapshotCache(self.db)
+
+        @asynccontextmanager
+        async def lifespan(app: FastAPI):
+            app.state.db_service = self.db
+            app.state.snapshot_cache = snapshot_cache
+            await snapshot_cache.start()
+            yield
+            await snapshot_cache.stop()
+
+        app = FastAPI(lifespan=lifespan)
+        app.include_router(stock_data.router, prefix="/api/v1")
+        return app
+
+    def start(self):
+        import uvicorn
+        started = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(self._loop)
+            config = uvicorn.Config(self.build_app(), host='127.0.0.1', port=0, log_level='warning',
+                                    access_log=False, lifespan='on')
+            self._server = uvicorn.Server(config)
+            self._loop.run_until_complete(self._serve(started))
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        started.wait()
+
+    async def _serve(self, started: threading.Event):
+        task = asyncio.create_task(self._server.serve())
+        while not self._server.started and not task.done():
+            await asyncio.sleep(0.01)
+        if self._server.started:
+            self.port = self._server.servers[0].sockets[0].getsockname()[1]
+        started.set()
+        await task
+
+    def stop(self):
+        if self._server is not None:
+            self._server.should_exit = True
+            self._thread.join()
+
+
+async def load_endpoint(base_url: str, paths: List[str], clients: int, requests: int) -> Dict[str, Any]:
+    """clients 개의 동시 클라이언트로 paths 를 번갈아 requests 번 호출합니다."""
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    counter = iter(range(requests))
+
+    async def client(session: aiohttp.ClientSession):
+        for i in counter:
+            started = time.perf_counter()
+            async with session.get(base_url + paths[i % len(paths)]) as response:
+                await response.read()
+                statuses[response.status] += 1
+            latencies.append(time.perf_counter() - started)
+
+    connector = aiohttp.TCPConnector(limit=clients)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        started = time.perf_counter()
+        await asyncio.gather(*(client(session) for _ in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return {**percentiles(latencies), 'rps': round(requests / elapsed, 1), 'statuses': dict(statuses)}
+
+
+async def run_api(args: argparse.Namespace, db, tickers: List[str]) -> Dict[str, Any]:
+    server = ApiServer(db)
+    server.start()
+    base_url = f"http://127.0.0.1:{server.port}/api/v1"
+    try:
+        # 워밍업 (스냅샷 로드, 커넥션 생성)
+        await load_endpoint(base_url, ['/stocks'], min(args.clients, 4), min(args.clients, 4) * 5)
+        return {
+            'list': await load_endpoint(base_url, ['/stocks'], args.clients, args.requests),
+            'list_summary': await load_endpoint(base_url, ['/stocks?fields=summary'], args.clients, args.requests),
+            'detail': await load_endpoint(base_url, [f"/stocks/{ticker}" for ticker in tickers], args.clients, args.requests),
+        }
+    finally:
+        server.stop()
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=BENCHMARK_DIR,
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except Exception:
+        return None
+
+
+def lookup(result: Dict[str, Any], path: str) -> Optional[float]:
+    value: Any = result
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value if isinstance(value, (int, float)) else None
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """기준 결과 대비 tolerance 이상 나빠진 지표 목록"""
+    if result['params'] != baseline.get('params'):
+        print("warning: benchmark parameters differ from the baseline", file=sys.stderr)
+    regressions = []
+    for path in REGRESSION_METRICS:
+        current, previous = lookup(result, path), lookup(baseline, path)
+        if current is None or not previous:
+            continue
+        change = current / previous - 1.0
+        status = 'REGRESSION' if change > tolerance else 'ok'
+        print(f"{path:32s} {previous:>12.3f} -> {current:>12.3f} ({change:+.1%}) {status}")
+        if change > tolerance:
+            regressions.append(path)
+    return regressions
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    tickers = ticker_names(args.tickers)
+
+    from services.reddit_service import SUBREDDITS
+    posts = generate_posts(tickers, args.posts_per_ticker, SUBREDDITS, seed=args.seed,
+                           crosspost_rate=args.crosspost_rate)
+    reddit = FakeRedditServer(posts, latency_ms=args.reddit_latency_ms, error_rate=args.reddit_error_rate)
+    openai = FakeOpenAIServer(latency_ms=args.openai_latency_ms, error_rate=args.openai_error_rate)
+    reddit.start()
+    openai.start()
+    configure_environment(args, reddit, openai, total_posts=sum(len(p) for p in posts.values()))
+
+    from memory_db import InMemoryDatabaseService
+    from services.concurrency import shutdown_executor
+    from services.scheduler_service import SchedulerService
+
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    db = InMemoryDatabaseService(latency_ms=args.db_latency_ms)
+    scheduler = SchedulerService(tickers, db_service=db)
+    rss_before = peak_rss_mb()
+    try:
+        cycles = await run_cycles(args, scheduler, db, reddit, openai)
+        api = await run_api(args, db, tickers)
+    finally:
+        await scheduler.close()
+        reddit.stop()
+        openai.stop()
+        shutdown_executor()
+
+    return {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'params': {key: value for key, value in vars(args).items()
+                   if key not in ('label', 'output', 'baseline', 'tolerance', 'verbose')},
+        'cycles': cycles,
+        'api': api,
+        'memory': {'rss_before_mb': rss_before, 'peak_rss_mb': peak_rss_mb()},
+        'storage': db.storage_bytes(),
+        'fake_servers': {'reddit': reddit.snapshot(), 'openai': openai.snapshot()},
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    result = asyncio.run(run(args))
+
+    output = args.output or os.path.join(
+        BENCHMARK_DIR, 'results', f"{args.label}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    first = result['cycles']['first']
+    print(f"first cycle: {first['seconds']}s, {first['tickers']} tickers, {first['new_posts']} posts, "
+          f"reddit={first['reddit_calls']} openai={first['openai_calls']} db={first['db_calls']} calls")
+    if result['cycles']['steady']:
+        print(f"steady cycle: {result['cycles']['steady']['seconds']}s")
+    for name, stats in result['api'].items():
+        print(f"{name}: p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms {stats['rps']} req/s {stats['statuses']}")
+    print(f"peak RSS: {result['memory']['peak_rss_mb']} MB")
+    print(f"results written to {output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(result, baseline, args.tolerance)
+        if regressions:
+            print(f"{len(regressions)} metric(s) regressed more than {args.tolerance:.0%}", file=sys.stderr)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
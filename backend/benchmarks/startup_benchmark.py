@@ -0,0 +1,144 @@
+"""
+서버 시작(import) 시간 벤치마크.
+
+새 인터프리터에서 `import main` 을 APP_MODE 별로 여러 번 실행하여 중앙값을 측정하고 JSON 으로 저장합니다.
+MongoDB 연결 이후의 시작 시간은 실행 중인 서버의 /health (startup) 와 /metrics (rsm_startup_*) 에서 확인합니다.
+
+    cd backend
+    python benchmarks/startup_benchmark.py --runs 7
+    python benchmarks/startup_benchmark.py --budget benchmarks/startup_budget.json
+    python benchmarks/startup_benchmark.py --baseline benchmarks/results/startup-<timestamp>.json --tolerance 0.2
+
+--budget 을 주면 모드별 예산(초)을 넘거나 첫 사용 시점으로 미룬 무거운 모듈이 시작 시 import 되면 종료 코드 1 을 반환합니다.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(BENCHMARK_DIR, '..', 'app')
+sys.path.insert(0, BENCHMARK_DIR)
+
+from run_benchmark import git_revision, lookup
+
+MODES = ['all', 'api']
+# 첫 사용 시점에 불러오도록 미룬 모듈 (서버 시작 시 import 되면 안 됨)
+DEFERRED_MODULES = ['praw', 'prawcore', 'aiohttp', 'numpy']
+# 기준 결과와 비교할 지표 (모두 값이 클수록 나쁨)
+REGRESSION_METRICS = [f"modes.{mode}.import_seconds" for mode in MODES]
+
+MEASURE = """
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({'seconds': elapsed, 'deferred': [name for name in %r if name in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Measure cold import time of the API server per APP_MODE")
+    parser.add_argument('--runs', type=int, default=5, help="fresh interpreters per mode (after one warm-up)")
+    parser.add_argument('--modes', default=','.join(MODES), help="comma separated APP_MODE values")
+    parser.add_argument('--label', default='startup', help="result file name prefix")
+    parser.add_argument('--output', help="result path (default: benchmarks/results/<label>-<timestamp>.json)")
+    parser.add_argument('--budget', help="JSON of per-mode budgets, e.g. {\"api\": {\"import_seconds\": 1.0}}")
+    parser.add_argument('--baseline', help="previous result JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.2, help="allowed relative regression")
+    return parser.parse_args(argv)
+
+
+def measure_import(mode: str) -> Dict[str, Any]:
+    env = {**os.environ, 'APP_MODE': mode}
+    output = subprocess.check_output([sys.executable, '-c', MEASURE], cwd=APP_DIR, env=env,
+                                     stderr=subprocess.DEVNULL, text=True)
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_mode(mode: str, runs: int) -> Dict[str, Any]:
+    # 첫 실행은 바이트코드 컴파일/디스크 캐시가 섞이므로 버림
+    measure_import(mode)
+    samples = [measure_import(mode) for _ in range(runs)]
+    seconds = [sample['seconds'] for sample in samples]
+    return {
+        'import_seconds': round(statistics.median(seconds), 3),
+        'min_seconds': round(min(seconds), 3),
+        'max_seconds': round(max(seconds), 3),
+        'deferred_imported': sorted({name for sample in samples for name in sample['deferred']}),
+    }
+
+
+def check_budget(result: Dict[str, Any], budget: Dict[str, Any]) -> List[str]:
+    """예산을 넘은 지표와 시작 시 import 된 지연 모듈 목록"""
+    violations = []
+    for mode, stats in result['modes'].items():
+        for metric, limit in budget.get(mode, {}).items():
+            value = stats.get(metric)
+            status = 'OVER BUDGET' if value is not None and value > limit else 'ok'
+            print(f"{mode + '.' + metric:32s} {value:>8.3f} / {limit:.3f}s {status}")
+            if status != 'ok':
+                violations.append(f"{mode}.{metric}")
+        if stats['deferred_imported']:
+            print(f"{mode}: deferred modules imported at startup: {', '.join(stats['deferred_imported'])}")
+            violations.append(f"{mode}.deferred_imported")
+    return violations
+
+
+def compare(result: Dict[str, Any], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """기준 결과 대비 tolerance 이상 나빠진 지표 목록"""
+    regressions = []
+    for path in REGRESSION_METRICS:
+        current, previous = lookup(result, path), lookup(baseline, path)
+        if current is None or not previous:
+            continue
+        change = current / previous - 1.0
+        status = 'REGRESSION' if change > tolerance else 'ok'
+        print(f"{path:32s} {previous:>12.3f} -> {current:>12.3f} ({change:+.1%}) {status}")
+        if change > tolerance:
+            regressions.append(path)
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    modes = [mode.strip() for mode in args.modes.split(',') if mode.strip()]
+    result = {
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'params': {'runs': args.runs},
+        'modes': {mode: measure_mode(mode, args.runs) for mode in modes},
+    }
+
+    output = args.output or os.path.join(
+        BENCHMARK_DIR, 'results', f"{args.label}-{datetime.utcnow().strftime('%Y%m%dT%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(result, f, indent=2)
+
+    for mode, stats in result['modes'].items():
+        print(f"{mode}: import {stats['import_seconds']}s (min {stats['min_seconds']}s, max {stats['max_seconds']}s)")
+    print(f"results written to {output}")
+
+    failed = []
+    if args.budget:
+        with open(args.budget) as f:
+            failed += check_budget(result, json.load(f))
+    if args.baseline:
+        with open(args.baseline) as f:
+            failed += compare(result, json.load(f), args.tolerance)
+    if failed:
+        print(f"{len(failed)} startup check(s) failed", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,8 @@
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 서버와 같은 방식(from services.x import ...)으로 import 하고, 벤치마크의 가짜 서버를 재사용
+sys.path.insert(0, os.path.join(BACKEND_DIR, 'app'))
+sys.path.insert(1, os.path.join(BACKEND_DIR, 'benchmarks'))
@@ -0,0 +1,138 @@
+"""
+AsyncLLMClient 를 로컬 가짜 OpenAI 서버에 붙여 호출 한도(429 + Retry-After) 상황의 재시도, 마감 시간,
+미분석 처리를 확인합니다.
+
+    cd backend
+    python -m pytest tests
+"""
+import asyncio
+import time
+
+import pytest
+from aiohttp import web
+
+from fake_servers import FakeOpenAIServer
+from services.llm_client import AsyncLLMClient, LLMUnavailableError
+from services.openai_service import OpenAIService
+
+MESSAGES = [{"role": "user", "content": 'Analyze:\n{"id": 0, "text": "TSLA to the moon"}'}]
+
+
+class ThrottlingOpenAIServer(FakeOpenAIServer):
+    """처음 throttled 번의 요청(-1 이면 전부)에 429 와 Retry-After 를 반환하는 가짜 서버"""
+
+    def __init__(self, throttled: int, retry_after: float = 0.2, status: int = 429, **kwargs):
+        super().__init__(**kwargs)
+        self.throttled = throttled
+        self.retry_after = retry_after
+        self.status = status
+        self.arrivals = []
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        self.arrivals.append(time.monotonic())
+        if self.throttled < 0 or len(self.arrivals) <= self.throttled:
+            return web.Response(status=self.status, headers={'Retry-After': f"{self.retry_after:g}"},
+                                text='rate limited')
+        return await super().chat_completions(request)
+
+
+@pytest.fixture
+def server_factory():
+    servers = []
+
+    def create(*args, **kwargs) -> ThrottlingOpenAIServer:
+        server = ThrottlingOpenAIServer(*args, **kwargs)
+        server.start()
+        servers.append(server)
+        return server
+
+    yield create
+    for server in servers:
+        server.stop()
+
+
+def make_client(server: FakeOpenAIServer, **kwargs) -> AsyncLLMClient:
+    options = {'api_key': 'test', 'base_url': server.url, 'requests_per_minute': 100000,
+               'tokens_per_minute': 10000000, 'base_backoff': 0.01, 'max_backoff': 0.05, **kwargs}
+    return AsyncLLMClient(**options)
+
+
+async def complete(client: AsyncLLMClient) -> str:
+    try:
+        return await client.chat_completion(MESSAGES, model='test', max_tokens=50)
+    finally:
+        await client.close()
+
+
+def test_retries_throttled_requests_after_retry_after(server_factory):
+    server = server_factory(throttled=2, retry_after=0.2)
+    client = make_client(server, max_retries=4, deadline=5)
+
+    content = asyncio.run(complete(client))
+
+    assert '"results"' in content
+    assert len(server.arrivals) == 3
+    assert client.stats() == {"requests": 3, "retries": 2, "rate_limited": 2, "failures": 0}
+    # 지터 백오프(최대 0.05초)보다 긴 Retry-After 만큼 기다린 뒤 재시도
+    gaps = [later - earlier for earlier, later in zip(server.arrivals, server.arrivals[1:])]
+    assert all(gap >= 0.19 for gap in gaps)
+
+
+def test_gives_up_when_retry_after_would_pass_deadline(server_factory):
+    server = server_factory(throttled=-1, retry_after=0.3)
+    client = make_client(server, max_retries=10, deadline=0.5)
+
+    started = time.monotonic()
+    with pytest.raises(LLMUnavailableError, match="HTTP 429"):
+        asyncio.run(complete(client))
+    elapsed = time.monotonic() - started
+
+    # 두 번째 429 뒤의 대기(0.3초)는 마감 시간을 넘기므로 재시도하지 않고 바로 포기
+    assert len(server.arrivals) == 2
+    assert elapsed < 0.5
+    assert client.failures == 1 and client.rate_limited == 2
+
+
+def test_stops_after_max_retries(server_factory):
+    server = server_factory(throttled=-1, retry_after=0)
+    client = make_client(server, max_retries=2, deadline=5)
+
+    with pytest.raises(LLMUnavailableError):
+        asyncio.run(complete(client))
+
+    assert len(server.arrivals) == 3
+    assert client.retries == 2
+
+
+def test_does_not_retry_non_retryable_status(server_factory):
+    server = server_factory(throttled=-1, status=400)
+    client = make_client(server, max_retries=4, deadline=5)
+
+    with pytest.raises(LLMUnavailableError, match="HTTP 400"):
+        asyncio.run(complete(client))
+
+    assert len(server.arrivals) == 1
+    assert client.retries == 0
+
+
+def test_posts_are_unanalyzed_while_llm_is_unavailable(server_factory):
+    server = server_factory(throttled=-1, retry_after=0.3)
+    posts = [{'id': f"p{i}", 'title': f"TSLA calls {i}", 'selftext': 'to the moon'} for i in range(3)]
+
+    async def analyze():
+        service = OpenAIService(client=make_client(server, max_retries=10, deadline=0.5))
+        try:
+            return await service.analyze_posts_batch(posts)
+        finally:
+            await service.close()
+
+    analyzed = asyncio.run(analyze())
+
+    # 중립(0.0)으로 채우지 않고 미분석으로 표시하여 집계에서 제외되고 다음 실행에서 다시 시도됨
+    assert [post['analysis_status'] for post in analyzed] == ['unanalyzed'] * 3
+    assert all(post['sentiment'] is None and post['keywords'] == [] for post in analyzed)
+
+    server.throttled = 0
+    analyzed = asyncio.run(analyze())
+    assert [post['analysis_status'] for post in analyzed] == ['analyzed'] * 3
+    assert all(post['sentiment'] is not None for post in analyzed)
@@ -0,0 +1,136 @@
+"""
+분 단위 언급 링 버퍼(MinuteRing)와 MentionCounters 의 전진/정리, 오래된 이벤트 처리, 가속도 구간,
+체크포인트 바이트 왕복을 명시적인 시각으로 확인합니다.
+"""
+from services.mention_counters import MentionCounters, MinuteRing
+
+MINUTE = 60
+
+
+def filled_ring() -> MinuteRing:
+    """크기 5, head 10 에서 분 8/9/10 에 1/2/3 개를 기록한 링"""
+    ring = MinuteRing(size=5, head=10)
+    for minute, count in ((8, 1), (9, 2), (10, 3)):
+        assert ring.add(minute, count)
+    return ring
+
+
+def test_advance_clears_only_passed_slots_across_wrap_around():
+    ring = filled_ring()
+
+    ring.advance(12)  # 분 11, 12 가 칸 1, 2 를 비움 (분 8~10 은 남음)
+    assert ring.head == 12
+    assert ring.series(5) == [1, 2, 3, 0, 0]
+    assert ring.total(5) == 6
+
+    ring.add(12, 4)
+    ring.advance(14)  # 분 13, 14 가 분 8, 9 의 칸(3, 4)을 재사용
+    assert ring.series(5) == [3, 0, 4, 0, 0]
+    assert ring.total(5) == 7
+
+    ring.advance(13)  # 되돌아가는 전진은 무시
+    assert ring.head == 14 and ring.total(5) == 7
+
+
+def test_advance_past_whole_ring_resets_counts():
+    ring = filled_ring()
+
+    ring.advance(15)  # 링 크기(5분) 이상 건너뛰면 전부 비움
+    assert ring.head == 15
+    assert ring.series(5) == [0] * 5
+
+
+def test_add_drops_events_older_than_ring():
+    ring = MinuteRing(size=5, head=20)
+
+    assert not ring.add(15)  # head - size 이하는 이미 링 밖
+    assert not ring.dirty
+    assert ring.add(16)  # 링에 남은 가장 오래된 분
+    assert ring.add(18, 2)
+    assert ring.series(5) == [1, 0, 2, 0, 0]
+    assert ring.dirty
+
+    assert ring.add(22)  # 미래 분은 head 를 전진시키고 지나간 칸(분 16, 17)을 비움
+    assert ring.head == 22
+    assert ring.series(5) == [2, 0, 0, 0, 1]
+
+
+def test_total_with_end_is_clamped_to_ring():
+    ring = filled_ring()
+
+    assert ring.total(2, end=9) == 3  # 분 8, 9
+    assert ring.total(5, end=9) == 3  # 분 5~7 은 링 밖(분 6, 7 만 남아 있고 0)
+    assert ring.total(1, end=8) == 1
+
+
+def test_counters_report_rates_and_acceleration():
+    counters = MentionCounters(size=60)
+    now = 1000 * MINUTE
+
+    for _ in range(3):
+        counters.record(['TSLA'], created_utc=992 * MINUTE, now=now)  # 이전 5분 구간 (분 991~995)
+    for _ in range(6):
+        counters.record(['TSLA'], created_utc=998 * MINUTE + 30, now=now)  # 최근 5분 구간 (분 996~1000)
+    counters.record(['TSLA'], created_utc=900 * MINUTE, now=now)  # 60분 링보다 오래됨
+    counters.record(['GME'], created_utc=now + 600, now=now)  # 미래 시각은 현재 분으로
+
+    snapshot = counters.snapshot('TSLA', now=now)
+    assert snapshot['mentions_5m'] == 6
+    assert snapshot['mentions_1h'] == 9
+    assert snapshot['rate_5m'] == 72.0
+    assert snapshot['acceleration'] == 36.0  # (6 - 3) 건 / 5분 → 시간당
+    assert counters.snapshot('GME', now=now)['mentions_5m'] == 1
+    assert counters.stats()['events'] == 11 and counters.stats()['dropped_old'] == 1
+
+    # 7분 뒤에는 최근 5분(분 1003~1007)이 비고 이전 5분 구간(분 998~1002)에 분 998 의 6건이 들어감
+    later = counters.snapshot('TSLA', now=now + 7 * MINUTE)
+    assert later['mentions_5m'] == 0
+    assert later['acceleration'] == -72.0
+    assert counters.snapshot('AAPL', now=now) is None
+
+
+def test_export_restore_round_trip_and_dirty_flag():
+    counters = MentionCounters(size=60)
+    now = 5000 * MINUTE
+    counters.record(['TSLA', 'GME'], created_utc=now - 2 * MINUTE, now=now)
+    counters.record(['TSLA'], created_utc=now, now=now)
+
+    exported = counters.export()
+    assert set(exported) == {'TSLA', 'GME'}
+    assert exported['TSLA']['head'] == 5000
+    raw = exported['TSLA']['counts']
+    assert len(raw) == 60 * 4
+    # little-endian uint32, 분 m 은 m % size 칸
+    assert int.from_bytes(raw[(5000 % 60) * 4:(5000 % 60) * 4 + 4], 'little') == 1
+    assert int.from_bytes(raw[(4998 % 60) * 4:(4998 % 60) * 4 + 4], 'little') == 1
+
+    # 내보낸 티커는 dirty 가 풀리고, 새 기록이나 mark_dirty 로 다시 포함
+    assert counters.export() == {}
+    counters.record(['GME'], created_utc=now, now=now)
+    assert set(counters.export()) == {'GME'}
+    counters.mark_dirty(['TSLA', 'AAPL'])
+    assert set(counters.export()) == {'TSLA'}
+    assert set(counters.export(dirty_only=False)) == {'TSLA', 'GME'}
+
+    restored = MentionCounters(size=60)
+    restored.restore(counters.export(dirty_only=False))
+    for ticker in ('TSLA', 'GME'):
+        assert restored.snapshot(ticker, now=now, series_minutes=60) == counters.snapshot(ticker, now=now, series_minutes=60)
+    assert restored.export() == {}  # 복원한 카운터는 저장할 변경이 없음
+
+
+def test_restore_skips_mismatched_size_and_replace_drops_missing():
+    counters = MentionCounters(size=60)
+    counters.record(['TSLA'], created_utc=0, now=0)
+    checkpoint = counters.export()
+
+    other = MentionCounters(size=30)
+    other.restore(checkpoint)  # 설정이 바뀌어 크기가 다르면 무시
+    assert len(other) == 0
+
+    replica = MentionCounters(size=60)
+    replica.record(['GME'], created_utc=0, now=0)
+    replica.restore(checkpoint)
+    assert {'TSLA', 'GME'} == {row['ticker'] for row in replica.snapshot_all(now=0)}
+    replica.restore(checkpoint, replace=True)
+    assert [row['ticker'] for row in replica.snapshot_all(now=0)] == ['TSLA']
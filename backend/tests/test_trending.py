@@ -0,0 +1,145 @@
+"""
+TrendingDetector 의 epoch 회전(기준선에 더하고 빼기, 만료 sketch 재사용, 긴 공백 후 초기화)과
+TrendingDiscovery 의 워밍업 판단을 명시적인 시각으로 확인합니다.
+"""
+import pytest
+
+from services.trending import CountMinSketch, TrendingDetector, TrendingDiscovery
+
+EPOCH = 60
+BASELINE_EPOCHS = 3
+
+
+def make_detector() -> TrendingDetector:
+    detector = TrendingDetector(width=1024, depth=4, epoch_seconds=EPOCH, baseline_epochs=BASELINE_EPOCHS, top_k=50)
+    detector.epoch_started = 0.0
+    return detector
+
+
+def observe_epoch(detector: TrendingDetector, epoch: int):
+    """epoch 마다 고유 심볼 E<epoch> 를 epoch + 1 번, 공통 심볼 AAA 를 한 번 관측"""
+    now = epoch * EPOCH + 1
+    for _ in range(epoch + 1):
+        detector.observe({f"E{epoch}"}, now)
+    detector.observe({'AAA'}, now)
+
+
+def summed_rows(sketches) -> list:
+    rows = [[0] * sketches[0].width for _ in range(sketches[0].depth)] if sketches else []
+    for sketch in sketches:
+        for row, sketch_row in zip(rows, sketch.rows):
+            for index, value in enumerate(sketch_row):
+                row[index] += value
+    return rows
+
+
+def test_rotation_moves_epochs_into_and_out_of_baseline():
+    detector = make_detector()
+
+    for epoch in range(10):
+        observe_epoch(detector, epoch)
+        detector.trending(epoch * EPOCH + 1)
+
+        closed = list(detector.closed)
+        assert len(closed) == min(epoch, BASELINE_EPOCHS + 1)
+        # 기준선은 closed[1:] 의 합과 칸 단위로 같아야 함 (빼기가 어긋나면 unsigned 배열이 틀어짐)
+        baseline = [list(row) for row in detector.baseline.rows]
+        assert baseline == (summed_rows(closed[1:]) or [[0] * 1024] * 4)
+        assert detector.baseline.total == sum(sketch.total for sketch in closed[1:])
+
+        # 최근 구간 = 현재 + 직전 epoch, 기준선 = 그 이전 BASELINE_EPOCHS 개 epoch
+        assert detector.recent_count(f"E{epoch}") == epoch + 1
+        if epoch >= 1:
+            assert detector.recent_count(f"E{epoch - 1}") == epoch
+        in_baseline = range(max(epoch - 1 - BASELINE_EPOCHS, 0), epoch - 1)
+        for past in range(epoch + 1):
+            expected = past + 1 if past in in_baseline else 0
+            assert detector.baseline.estimate(f"E{past}") == expected
+        assert detector.baseline.estimate('AAA') == len(in_baseline)
+        assert detector.baseline_hours == len(in_baseline) * EPOCH / 3600
+
+
+def test_rotation_reuses_expired_sketch():
+    detector = make_detector()
+    for epoch in range(BASELINE_EPOCHS + 2):
+        observe_epoch(detector, epoch)
+    assert len(detector.closed) == BASELINE_EPOCHS + 1
+    oldest = detector.closed[-1]
+    assert oldest.estimate('E0') == 1
+
+    detector.trending((BASELINE_EPOCHS + 2) * EPOCH)
+
+    assert detector.current is oldest
+    assert detector.current.total == 0 and detector.current.estimate('E0') == 0
+    assert detector.baseline.estimate('E0') == 0
+    assert len(detector.closed) == BASELINE_EPOCHS + 1
+
+
+def test_gap_shorter_than_reset_rotates_out_old_epochs():
+    detector = make_detector()
+    for epoch in range(3):
+        observe_epoch(detector, epoch)
+
+    # 현재 epoch(2) 이후 BASELINE_EPOCHS + 2 개 epoch 가 비어 있으면 하나씩 돌려 모두 밀려남
+    now = (2 + BASELINE_EPOCHS + 2) * EPOCH + 1
+    trending = detector.trending(now)
+
+    assert detector.epoch_started == (2 + BASELINE_EPOCHS + 2) * EPOCH
+    assert len(detector.closed) == BASELINE_EPOCHS + 1
+    assert detector.baseline.total == 0 and all(sketch.total == 0 for sketch in detector.closed)
+    assert trending == [] and detector.candidates == {}
+
+
+def test_long_gap_resets_instead_of_rotating_empty_epochs():
+    detector = make_detector()
+    for epoch in range(3):
+        observe_epoch(detector, epoch)
+
+    now = (2 + BASELINE_EPOCHS + 3) * EPOCH + 30
+    detector.observe({'NEW'}, now)
+
+    assert detector.epoch_started == now
+    assert len(detector.closed) == 0
+    assert detector.baseline.total == 0
+    assert detector.current.total == 1
+    assert detector.candidates == {'NEW': 1}
+
+
+def test_subtracting_more_than_was_added_fails_instead_of_wrapping():
+    sketch = CountMinSketch(width=16, depth=2)
+    extra = CountMinSketch(width=16, depth=2)
+    extra.add('AAA')
+    with pytest.raises(OverflowError):
+        sketch.merge(extra, sign=-1)
+
+
+@pytest.fixture
+def discovery(monkeypatch) -> TrendingDiscovery:
+    for name, value in {'DISCOVERY_ENABLED': 'true', 'DISCOVERY_EPOCH_MINUTES': '1',
+                        'DISCOVERY_BASELINE_EPOCHS': '4', 'DISCOVERY_WARMUP_EPOCHS': '2',
+                        'DISCOVERY_MIN_MENTIONS': '3', 'DISCOVERY_SPIKE_FACTOR': '2',
+                        'DISCOVERY_SKETCH_WIDTH': '1024', 'DISCOVERY_TOP_K': '10'}.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv('SYMBOL_UNIVERSE_PATH', raising=False)
+    discovery = TrendingDiscovery()
+    discovery.detector.epoch_started = 0.0
+    return discovery
+
+
+def test_flagged_waits_for_warmup_epochs(discovery):
+    for epoch in range(2):
+        discovery.observe("$AAA earnings", epoch * EPOCH + 1)
+    for _ in range(5):
+        discovery.observe("$MOON squeeze", 2 * EPOCH + 1)
+
+    # 닫힌 epoch 2 개 = 기준선 1 epoch 로는 급증으로 판단하지 않음 (후보에는 있음)
+    assert not discovery.warm
+    assert discovery.flagged(2 * EPOCH + 30) == []
+    assert [entry['symbol'] for entry in discovery.detector.trending(2 * EPOCH + 30)][0] == 'MOON'
+
+    # 다음 epoch 에서 기준선이 2 epoch 가 되면 같은 급증(직전 epoch 의 5건)이 잡힘
+    flagged = discovery.flagged(3 * EPOCH + 1)
+    assert discovery.warm
+    assert [entry['symbol'] for entry in flagged] == ['MOON']
+    assert flagged[0]['recent_mentions'] == 5 and flagged[0]['baseline_rate'] == 0.0
+    assert discovery.export(3 * EPOCH + 1)['symbols'][0]['flagged']